@@ -0,0 +1,39 @@
+"""task due counters read model
+
+Revision ID: 0007_task_due_counters
+Revises: 0006_push_subscriptions
+Create Date: 2026-10-17
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007_task_due_counters"
+down_revision = "0006_push_subscriptions"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "task_due_counters",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("company_id", sa.Integer(), sa.ForeignKey("companies.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("task_date", sa.Date(), nullable=False),
+        sa.Column("open_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("user_id", "company_id", "task_date"),
+    )
+
+    # Backfill from the source of truth.
+    op.execute("""
+        INSERT INTO task_due_counters (user_id, company_id, task_date, open_count)
+        SELECT assigned_user_id, company_id, task_date, COUNT(*)
+        FROM tasks
+        WHERE status = 'todo' AND deleted_at IS NULL
+        GROUP BY assigned_user_id, company_id, task_date
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table("task_due_counters")
@@ -0,0 +1,63 @@
+"""recurring task series
+
+Revision ID: 0008_task_recurrences
+Revises: 0007_task_due_counters
+Create Date: 2026-10-17
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008_task_recurrences"
+down_revision = "0007_task_due_counters"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "task_recurrences",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("company_id", sa.Integer(), sa.ForeignKey("companies.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("rule", sa.String(length=200), nullable=False),
+        sa.Column("dtstart", sa.Date(), nullable=False),
+        sa.Column("task_time", sa.Time(), nullable=True),
+        sa.Column("category", sa.String(length=60), nullable=False, server_default="general"),
+        sa.Column("title", sa.String(length=200), nullable=False),
+        sa.Column("maps_url", sa.String(length=500), nullable=False, server_default=""),
+        sa.Column("patient_id", sa.Integer(), sa.ForeignKey("patients.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("patient_name", sa.String(length=190), nullable=False, server_default=""),
+        sa.Column("patient_address", sa.String(length=500), nullable=False, server_default=""),
+        sa.Column("patient_phone", sa.String(length=80), nullable=False, server_default=""),
+        sa.Column("bonus_details", sa.Text(), nullable=False, server_default=""),
+        sa.Column("active", sa.Boolean(), nullable=False, server_default=sa.text("true")),
+        sa.Column("materialized_through", sa.Date(), nullable=True),
+        sa.Column("created_by_user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.text("now()")),
+    )
+    op.create_index("ix_task_recurrences_company_id", "task_recurrences", ["company_id"])
+
+    op.create_table(
+        "task_recurrence_assignees",
+        sa.Column("recurrence_id", sa.Integer(), sa.ForeignKey("task_recurrences.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.PrimaryKeyConstraint("recurrence_id", "user_id"),
+    )
+
+    op.add_column("tasks", sa.Column("recurrence_id", sa.Integer(), sa.ForeignKey("task_recurrences.id", ondelete="SET NULL"), nullable=True))
+    op.create_index(
+        "uq_tasks_recurrence_user_date",
+        "tasks",
+        ["recurrence_id", "assigned_user_id", "task_date"],
+        unique=True,
+        postgresql_where=sa.text("recurrence_id IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_tasks_recurrence_user_date", table_name="tasks")
+    op.drop_column("tasks", "recurrence_id")
+    op.drop_table("task_recurrence_assignees")
+    op.drop_index("ix_task_recurrences_company_id", table_name="task_recurrences")
+    op.drop_table("task_recurrences")
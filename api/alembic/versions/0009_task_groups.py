@@ -0,0 +1,83 @@
+"""task groups: shared payload per assignment
+
+Revision ID: 0009_task_groups
+Revises: 0008_task_recurrences
+Create Date: 2026-10-17
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009_task_groups"
+down_revision = "0008_task_recurrences"
+branch_labels = None
+depends_on = None
+
+PAYLOAD = ["title", "maps_url", "patient_id", "patient_name", "patient_address", "patient_phone", "bonus_details"]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "task_groups",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("company_id", sa.Integer(), sa.ForeignKey("companies.id", ondelete="RESTRICT"), nullable=False),
+        sa.Column("title", sa.String(length=200), nullable=False),
+        sa.Column("maps_url", sa.String(length=500), nullable=False, server_default=""),
+        sa.Column("patient_id", sa.Integer(), sa.ForeignKey("patients.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("patient_name", sa.String(length=190), nullable=False, server_default=""),
+        sa.Column("patient_address", sa.String(length=500), nullable=False, server_default=""),
+        sa.Column("patient_phone", sa.String(length=80), nullable=False, server_default=""),
+        sa.Column("bonus_details", sa.Text(), nullable=False, server_default=""),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.text("now()")),
+        # Backfill helper only; dropped below.
+        sa.Column("_task_id", sa.Integer(), nullable=True),
+    )
+    op.create_index("ix_task_groups_company_id", "task_groups", ["company_id"])
+    op.create_index("ix_task_groups_patient_id", "task_groups", ["patient_id"])
+
+    op.add_column("tasks", sa.Column("group_id", sa.Integer(), sa.ForeignKey("task_groups.id", ondelete="RESTRICT"), nullable=True))
+
+    # Backfill: one group per existing task. Tasks don't record which assignment created them, and
+    # separate assignments can share a date and payload; merging those would let a group-wide edit
+    # leak from one into the other. Only new assignments share a group.
+    cols = ", ".join(PAYLOAD)
+    op.execute(f"""
+        INSERT INTO task_groups (company_id, _task_id, {cols}, created_at)
+        SELECT company_id, id, {cols}, created_at
+        FROM tasks
+    """)
+    op.execute("""
+        UPDATE tasks t SET group_id = g.id
+        FROM task_groups g
+        WHERE g._task_id = t.id
+    """)
+    op.drop_column("task_groups", "_task_id")
+
+    op.alter_column("tasks", "group_id", nullable=False)
+    op.create_index("ix_tasks_group_id", "tasks", ["group_id"])
+
+    op.drop_index("ix_tasks_patient_id", table_name="tasks")
+    for c in PAYLOAD:
+        op.drop_column("tasks", c)
+
+
+def downgrade() -> None:
+    op.add_column("tasks", sa.Column("title", sa.String(length=200), nullable=True))
+    op.add_column("tasks", sa.Column("maps_url", sa.String(length=500), nullable=False, server_default=""))
+    op.add_column("tasks", sa.Column("patient_id", sa.Integer(), sa.ForeignKey("patients.id", ondelete="SET NULL"), nullable=True))
+    op.add_column("tasks", sa.Column("patient_name", sa.String(length=190), nullable=False, server_default=""))
+    op.add_column("tasks", sa.Column("patient_address", sa.String(length=500), nullable=False, server_default=""))
+    op.add_column("tasks", sa.Column("patient_phone", sa.String(length=80), nullable=False, server_default=""))
+    op.add_column("tasks", sa.Column("bonus_details", sa.Text(), nullable=False, server_default=""))
+    op.create_index("ix_tasks_patient_id", "tasks", ["patient_id"])
+
+    sets = ", ".join(f"{c} = g.{c}" for c in PAYLOAD)
+    op.execute(f"UPDATE tasks t SET {sets} FROM task_groups g WHERE g.id = t.group_id")
+    op.alter_column("tasks", "title", nullable=False)
+
+    op.drop_index("ix_tasks_group_id", table_name="tasks")
+    op.drop_column("tasks", "group_id")
+    op.drop_index("ix_task_groups_patient_id", table_name="task_groups")
+    op.drop_index("ix_task_groups_company_id", table_name="task_groups")
+    op.drop_table("task_groups")
@@ -0,0 +1,24 @@
+"""task status_changed_at for offline batch conflict resolution
+
+Revision ID: 0010_task_status_changed_at
+Revises: 0009_task_groups
+Create Date: 2026-10-17
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010_task_status_changed_at"
+down_revision = "0009_task_groups"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("tasks", sa.Column("status_changed_at", sa.DateTime(), nullable=True))
+    op.execute("UPDATE tasks SET status_changed_at = COALESCE(forced_done_at, completed_at) WHERE status = 'done'")
+
+
+def downgrade() -> None:
+    op.drop_column("tasks", "status_changed_at")
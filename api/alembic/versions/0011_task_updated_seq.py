@@ -0,0 +1,77 @@
+"""task change cursor (updated_xid, updated_seq) for delta sync
+
+Revision ID: 0011_task_updated_seq
+Revises: 0010_task_status_changed_at
+Create Date: 2026-10-17
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0011_task_updated_seq"
+down_revision = "0010_task_status_changed_at"
+branch_labels = None
+depends_on = None
+
+CURRENT_XID = "pg_current_xact_id()::text::bigint"
+
+
+def upgrade() -> None:
+    op.execute(sa.text("CREATE SEQUENCE IF NOT EXISTS task_change_seq"))
+    # Volatile default: existing rows each get their own value during the rewrite.
+    op.add_column(
+        "tasks",
+        sa.Column("updated_seq", sa.BigInteger(), nullable=False, server_default=sa.text("nextval('task_change_seq')")),
+    )
+    # updated_seq is taken when a row is written, not when its transaction commits, so a long
+    # writer can commit seqs below a cursor a client already holds. updated_xid (the 64-bit id of
+    # the writing transaction) orders changes instead: every transaction below the snapshot xmin
+    # has finished, so a cursor at that xmin never skips a later commit.
+    op.add_column(
+        "tasks",
+        sa.Column("updated_xid", sa.BigInteger(), nullable=False, server_default=sa.text(CURRENT_XID)),
+    )
+    op.create_index("ix_tasks_company_user_xid_seq", "tasks", ["company_id", "assigned_user_id", "updated_xid", "updated_seq"])
+    op.create_index("ix_tasks_company_xid_seq", "tasks", ["company_id", "updated_xid", "updated_seq"])
+
+    # Every UPDATE of a task (ORM or set-based SQL) takes a fresh cursor value, and so
+    # does every task sharing a task_group whose payload changes.
+    op.execute(f"""
+        CREATE FUNCTION tasks_bump_updated_seq() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_seq := nextval('task_change_seq');
+            NEW.updated_xid := {CURRENT_XID};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER tasks_bump_updated_seq BEFORE UPDATE ON tasks
+        FOR EACH ROW EXECUTE FUNCTION tasks_bump_updated_seq()
+    """)
+    op.execute("""
+        CREATE FUNCTION task_groups_bump_updated_seq() RETURNS trigger AS $$
+        BEGIN
+            UPDATE tasks SET updated_seq = 0 WHERE group_id = NEW.id;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER task_groups_bump_updated_seq AFTER UPDATE ON task_groups
+        FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*)
+        EXECUTE FUNCTION task_groups_bump_updated_seq()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS task_groups_bump_updated_seq ON task_groups")
+    op.execute("DROP FUNCTION IF EXISTS task_groups_bump_updated_seq()")
+    op.execute("DROP TRIGGER IF EXISTS tasks_bump_updated_seq ON tasks")
+    op.execute("DROP FUNCTION IF EXISTS tasks_bump_updated_seq()")
+    op.drop_index("ix_tasks_company_xid_seq", table_name="tasks")
+    op.drop_index("ix_tasks_company_user_xid_seq", table_name="tasks")
+    op.drop_column("tasks", "updated_xid")
+    op.drop_column("tasks", "updated_seq")
+    op.execute(sa.text("DROP SEQUENCE IF EXISTS task_change_seq"))
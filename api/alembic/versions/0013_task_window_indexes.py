@@ -0,0 +1,59 @@
+"""partial indexes matching the task-list windows; drop single-column indexes they supersede
+
+Revision ID: 0013_task_window_indexes
+Revises: 0011_task_updated_seq
+Create Date: 2026-10-17
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0013_task_window_indexes"
+down_revision = "0011_task_updated_seq"
+branch_labels = None
+depends_on = None
+
+LIVE = sa.text("deleted_at IS NULL")
+
+
+def upgrade() -> None:
+    # Employee window: company + assignee, date range, in list order (task_date, task_time NULLS LAST,
+    # category, task_num). ASC is NULLS LAST by default, so the scan needs no Sort.
+    op.create_index(
+        "ix_tasks_user_window", "tasks",
+        ["company_id", "assigned_user_id", "task_date", "task_time", "category", "task_num"],
+        postgresql_where=LIVE,
+    )
+    # Admin per-company window, same order.
+    op.create_index(
+        "ix_tasks_company_window", "tasks",
+        ["company_id", "task_date", "task_time", "category", "task_num"],
+        postgresql_where=LIVE,
+    )
+    # Admin cross-company window: ORDER BY task_date DESC, task_num DESC LIMIT n as a backward scan.
+    op.create_index("ix_tasks_live_date_num", "tasks", ["task_date", "task_num"], postgresql_where=LIVE)
+    # Open (due) tasks per user/company/day: index-only source for the due-counter rebuild/verify.
+    op.create_index(
+        "ix_tasks_open_due", "tasks",
+        ["assigned_user_id", "company_id", "task_date"],
+        postgresql_where=sa.text("deleted_at IS NULL AND status = 'todo'"),
+    )
+
+    # Never selective on their own, or a prefix of a composite index above / ix_tasks_company_user_date.
+    op.drop_index("ix_tasks_category", table_name="tasks")
+    op.drop_index("ix_tasks_status", table_name="tasks")
+    op.drop_index("ix_tasks_task_time", table_name="tasks")
+    op.drop_index("ix_tasks_company_id", table_name="tasks")
+
+
+def downgrade() -> None:
+    op.create_index("ix_tasks_company_id", "tasks", ["company_id"])
+    op.create_index("ix_tasks_task_time", "tasks", ["task_time"])
+    op.create_index("ix_tasks_status", "tasks", ["status"])
+    op.create_index("ix_tasks_category", "tasks", ["category"])
+
+    op.drop_index("ix_tasks_open_due", table_name="tasks")
+    op.drop_index("ix_tasks_live_date_num", table_name="tasks")
+    op.drop_index("ix_tasks_company_window", table_name="tasks")
+    op.drop_index("ix_tasks_user_window", table_name="tasks")
@@ -0,0 +1,47 @@
+"""(..., task_date, task_num) indexes behind the admin task grid filters and keyset pagination
+
+Revision ID: 0014_admin_task_grid_indexes
+Revises: 0013_task_window_indexes
+Create Date: 2026-10-17
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0014_admin_task_grid_indexes"
+down_revision = "0013_task_window_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Equality filters first, then the keyset columns, so every page is a bounded range scan
+    # starting at (task_date, task_num) > cursor. Every status flip is a non-HOT update
+    # (updated_seq changes), so each index here is paid on every write: only the common filter
+    # shapes get one. Category, deleted-only and forced-only views are checked on the rows of
+    # the company's date range instead.
+    op.create_index("ix_tasks_company_date_num", "tasks", ["company_id", "task_date", "task_num"])
+    # Assignee filter, deleted rows included.
+    op.create_index("ix_tasks_company_user_date_num", "tasks", ["company_id", "assigned_user_id", "task_date", "task_num"])
+    # Status filter on the live view.
+    op.create_index(
+        "ix_tasks_company_status_date_num", "tasks", ["company_id", "status", "task_date", "task_num"],
+        postgresql_where=sa.text("deleted_at IS NULL"),
+    )
+    # All companies with deleted rows; the live cross-company view uses ix_tasks_live_date_num (0013).
+    op.create_index("ix_tasks_date_num", "tasks", ["task_date", "task_num"])
+
+    # Prefixes of the indexes above.
+    op.drop_index("ix_tasks_company_user_date", table_name="tasks")
+    op.drop_index("ix_tasks_task_date", table_name="tasks")
+
+
+def downgrade() -> None:
+    op.create_index("ix_tasks_task_date", "tasks", ["task_date"])
+    op.create_index("ix_tasks_company_user_date", "tasks", ["company_id", "assigned_user_id", "task_date"])
+
+    op.drop_index("ix_tasks_date_num", table_name="tasks")
+    op.drop_index("ix_tasks_company_status_date_num", table_name="tasks")
+    op.drop_index("ix_tasks_company_user_date_num", table_name="tasks")
+    op.drop_index("ix_tasks_company_date_num", table_name="tasks")
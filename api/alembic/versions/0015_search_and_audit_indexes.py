@@ -0,0 +1,44 @@
+"""pg_trgm indexes for admin user search; (filter, timestamp, id) indexes for the audit listing
+
+Revision ID: 0015_search_and_audit_indexes
+Revises: 0014_admin_task_grid_indexes
+Create Date: 2026-10-17
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0015_search_and_audit_indexes"
+down_revision = "0014_admin_task_grid_indexes"
+branch_labels = None
+depends_on = None
+
+AUDIT_FILTERS = ["actor_user_id", "action", "company_id", "task_id"]
+
+
+def upgrade() -> None:
+    # Substring/prefix ILIKE on username / display_name.
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index("ix_users_username_trgm", "users", ["username"], postgresql_using="gin",
+                    postgresql_ops={"username": "gin_trgm_ops"})
+    op.create_index("ix_users_display_name_trgm", "users", ["display_name"], postgresql_using="gin",
+                    postgresql_ops={"display_name": "gin_trgm_ops"})
+
+    # Audit pages are keyset scans newest-first on (timestamp, id), optionally under one equality filter.
+    op.create_index("ix_audit_logs_timestamp_id", "audit_logs", ["timestamp", "id"])
+    op.drop_index("ix_audit_logs_timestamp", table_name="audit_logs")
+    for col in AUDIT_FILTERS:
+        op.create_index(f"ix_audit_logs_{col}_timestamp_id", "audit_logs", [col, "timestamp", "id"])
+        op.drop_index(f"ix_audit_logs_{col}", table_name="audit_logs")
+
+
+def downgrade() -> None:
+    for col in AUDIT_FILTERS:
+        op.create_index(f"ix_audit_logs_{col}", "audit_logs", [col])
+        op.drop_index(f"ix_audit_logs_{col}_timestamp_id", table_name="audit_logs")
+    op.create_index("ix_audit_logs_timestamp", "audit_logs", ["timestamp"])
+    op.drop_index("ix_audit_logs_timestamp_id", table_name="audit_logs")
+
+    op.drop_index("ix_users_display_name_trgm", table_name="users")
+    op.drop_index("ix_users_username_trgm", table_name="users")
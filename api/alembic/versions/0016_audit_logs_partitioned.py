@@ -0,0 +1,121 @@
+"""Partition audit_logs by month on timestamp
+
+Revision ID: 0016_audit_logs_partitioned
+Revises: 0015_search_and_audit_indexes
+Create Date: 2026-10-17
+
+"""
+
+from datetime import date, datetime
+
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0016_audit_logs_partitioned"
+down_revision = "0015_search_and_audit_indexes"
+branch_labels = None
+depends_on = None
+
+AUDIT_FILTERS = ["actor_user_id", "action", "company_id", "task_id"]
+MONTHS_AHEAD = 2  # app.settings.audit_partitions_ahead default; `audit maintain` keeps it topped up
+
+COLUMNS_SQL = """
+    id integer NOT NULL DEFAULT nextval('audit_logs_id_seq'),
+    timestamp timestamp without time zone NOT NULL DEFAULT now(),
+    actor_user_id integer REFERENCES users(id) ON DELETE SET NULL,
+    action auditaction NOT NULL,
+    target_user_id integer REFERENCES users(id) ON DELETE SET NULL,
+    company_id integer REFERENCES companies(id) ON DELETE SET NULL,
+    task_id integer REFERENCES tasks(id) ON DELETE SET NULL,
+    ip varchar(80) NOT NULL DEFAULT '',
+    user_agent varchar(300) NOT NULL DEFAULT '',
+    meta text NOT NULL DEFAULT '{}'
+"""
+
+
+COLUMN_NAMES = "id, timestamp, actor_user_id, action, target_user_id, company_id, task_id, ip, user_agent, meta"
+
+
+def _add_months(d: date, n: int) -> date:
+    y, m = divmod(d.year * 12 + d.month - 1 + n, 12)
+    return date(y, m + 1, 1)
+
+
+def _create_indexes() -> None:
+    op.create_index("ix_audit_logs_timestamp_id", "audit_logs", ["timestamp", "id"])
+    op.create_index("ix_audit_logs_target_user_id", "audit_logs", ["target_user_id"])
+    for col in AUDIT_FILTERS:
+        op.create_index(f"ix_audit_logs_{col}_timestamp_id", "audit_logs", [col, "timestamp", "id"])
+
+
+def _rename_constraints(built_as: str) -> None:
+    """Give audit_logs' constraints (and their indexes, e.g. the pkey) the names of a table built as audit_logs.
+
+    The table is built under a temporary name and renamed, which leaves `{built_as}_pkey` and friends behind,
+    on every partition too.
+    """
+    op.execute(f"""
+        DO $$
+        DECLARE c record;
+        BEGIN
+            FOR c IN
+                SELECT con.conrelid::regclass AS rel, con.conname
+                FROM pg_constraint con
+                -- pg_partition_tree() is empty for the plain table the downgrade builds.
+                JOIN (SELECT relid, level FROM pg_partition_tree('audit_logs')
+                      UNION SELECT 'audit_logs'::regclass, 0) t ON t.relid = con.conrelid
+                WHERE con.conname LIKE '{built_as}\\_%'
+                ORDER BY t.level
+            LOOP
+                -- Renaming on the parent may already have renamed a partition's copy.
+                CONTINUE WHEN NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conrelid = c.rel AND conname = c.conname);
+                EXECUTE format('ALTER TABLE %s RENAME CONSTRAINT %I TO %I',
+                               c.rel, c.conname, 'audit_logs' || substr(c.conname, length('{built_as}') + 1));
+            END LOOP;
+        END $$
+    """)
+
+
+def upgrade() -> None:
+    this_month = date.today().replace(day=1)
+    first = this_month
+    if not context.is_offline_mode():
+        oldest = op.get_bind().execute(sa.text("SELECT min(timestamp) FROM audit_logs")).scalar()
+        if oldest is not None:
+            first = min(first, date(oldest.year, oldest.month, 1))
+
+    # A partitioned table's primary key must contain the partition key, hence (id, timestamp).
+    # The id sequence is kept and handed over to the new table.
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY NONE")
+    op.execute(f"""
+        CREATE TABLE audit_logs_new ({COLUMNS_SQL}, PRIMARY KEY (id, timestamp))
+        PARTITION BY RANGE (timestamp)
+    """)
+    op.execute("CREATE TABLE audit_logs_default PARTITION OF audit_logs_new DEFAULT")
+    month = first
+    while month <= _add_months(this_month, MONTHS_AHEAD):
+        nxt = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE audit_logs_{month.year:04d}_{month.month:02d} PARTITION OF audit_logs_new "
+            f"FOR VALUES FROM ('{month}') TO ('{nxt}')"
+        )
+        month = nxt
+
+    op.execute(f"INSERT INTO audit_logs_new ({COLUMN_NAMES}) SELECT {COLUMN_NAMES} FROM audit_logs")
+    op.drop_table("audit_logs")
+    op.rename_table("audit_logs_new", "audit_logs")
+    _rename_constraints("audit_logs_new")
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+    _create_indexes()
+
+
+def downgrade() -> None:
+    # Only rows still in Postgres come back; archived months stay in their files.
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY NONE")
+    op.execute(f"CREATE TABLE audit_logs_old ({COLUMNS_SQL}, PRIMARY KEY (id))")
+    op.execute(f"INSERT INTO audit_logs_old ({COLUMN_NAMES}) SELECT {COLUMN_NAMES} FROM audit_logs")
+    op.drop_table("audit_logs")  # drops every partition with it
+    op.rename_table("audit_logs_old", "audit_logs")
+    _rename_constraints("audit_logs_old")
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+    _create_indexes()
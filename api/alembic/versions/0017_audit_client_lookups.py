@@ -0,0 +1,61 @@
+"""Intern audit ip / user agent strings into client_ips / user_agents
+
+Revision ID: 0017_audit_client_lookups
+Revises: 0016_audit_logs_partitioned
+Create Date: 2026-10-17
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0017_audit_client_lookups"
+down_revision = "0016_audit_logs_partitioned"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "client_ips",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("value", sa.String(length=80), nullable=False, unique=True),
+    )
+    op.create_table(
+        "user_agents",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("value", sa.String(length=300), nullable=False, unique=True),
+    )
+    op.execute("INSERT INTO client_ips (value) SELECT DISTINCT ip FROM audit_logs WHERE ip <> ''")
+    op.execute("INSERT INTO user_agents (value) SELECT DISTINCT user_agent FROM audit_logs WHERE user_agent <> ''")
+
+    # Empty strings become NULL ids.
+    op.add_column("audit_logs", sa.Column("ip_id", sa.Integer(), nullable=True))
+    op.add_column("audit_logs", sa.Column("user_agent_id", sa.Integer(), nullable=True))
+    op.execute("""
+        UPDATE audit_logs a
+        SET ip_id = (SELECT id FROM client_ips WHERE value = a.ip),
+            user_agent_id = (SELECT id FROM user_agents WHERE value = a.user_agent)
+        WHERE a.ip <> '' OR a.user_agent <> ''
+    """)
+    op.drop_column("audit_logs", "ip")
+    op.drop_column("audit_logs", "user_agent")
+    op.create_foreign_key("audit_logs_ip_id_fkey", "audit_logs", "client_ips", ["ip_id"], ["id"])
+    op.create_foreign_key("audit_logs_user_agent_id_fkey", "audit_logs", "user_agents", ["user_agent_id"], ["id"])
+
+
+def downgrade() -> None:
+    op.add_column("audit_logs", sa.Column("ip", sa.String(length=80), nullable=False, server_default=""))
+    op.add_column("audit_logs", sa.Column("user_agent", sa.String(length=300), nullable=False, server_default=""))
+    op.execute("""
+        UPDATE audit_logs a
+        SET ip = COALESCE((SELECT value FROM client_ips WHERE id = a.ip_id), ''),
+            user_agent = COALESCE((SELECT value FROM user_agents WHERE id = a.user_agent_id), '')
+        WHERE a.ip_id IS NOT NULL OR a.user_agent_id IS NOT NULL
+    """)
+    op.drop_constraint("audit_logs_user_agent_id_fkey", "audit_logs", type_="foreignkey")
+    op.drop_constraint("audit_logs_ip_id_fkey", "audit_logs", type_="foreignkey")
+    op.drop_column("audit_logs", "user_agent_id")
+    op.drop_column("audit_logs", "ip_id")
+    op.drop_table("user_agents")
+    op.drop_table("client_ips")
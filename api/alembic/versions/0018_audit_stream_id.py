@@ -0,0 +1,30 @@
+"""Redis stream entry id on audit_logs so a re-delivered drain batch is not inserted twice
+
+Revision ID: 0018_audit_stream_id
+Revises: 0017_audit_client_lookups
+Create Date: 2026-10-17
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0018_audit_stream_id"
+down_revision = "0017_audit_client_lookups"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # NULL for rows written in the request transaction. A unique index on a partitioned table has to
+    # include the partition key; a re-delivered entry carries the same timestamp, so it still collides.
+    op.add_column("audit_logs", sa.Column("stream_id", sa.String(length=40), nullable=True))
+    op.create_index(
+        "uq_audit_logs_stream_id", "audit_logs", ["stream_id", "timestamp"],
+        unique=True, postgresql_where=sa.text("stream_id IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_audit_logs_stream_id", table_name="audit_logs")
+    op.drop_column("audit_logs", "stream_id")
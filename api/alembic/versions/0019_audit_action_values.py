@@ -0,0 +1,29 @@
+"""auditaction values for task deletion and forced completion
+
+AuditAction gained DELETE_TASK, FORCE_DONE_TASK and UNFORCE_DONE_TASK with the admin task controls
+(0003), but the database enum never did, so writing those audit rows failed.
+
+Revision ID: 0019_audit_action_values
+Revises: 0018_audit_stream_id
+Create Date: 2026-10-17
+
+"""
+
+from alembic import op
+
+revision = "0019_audit_action_values"
+down_revision = "0018_audit_stream_id"
+branch_labels = None
+depends_on = None
+
+NEW_VALUES = ("DELETE_TASK", "FORCE_DONE_TASK", "UNFORCE_DONE_TASK")
+
+
+def upgrade() -> None:
+    for value in NEW_VALUES:
+        op.execute(f"ALTER TYPE auditaction ADD VALUE IF NOT EXISTS '{value}'")
+
+
+def downgrade() -> None:
+    # Postgres can't drop enum values; they are harmless to keep.
+    pass
@@ -0,0 +1,255 @@
+"""Audit sink: where crud.log()/log_many() entries go.
+
+AUDIT_SINK=db (default): rows are inserted in the request transaction, as before.
+
+AUDIT_SINK=redis: rows are queued on the session and, once the transaction commits, appended to the
+Redis stream AUDIT_STREAM_KEY (nothing on rollback). `python -m app.manage audit drain` moves them
+into audit_logs with COPY. If the XADD fails, the rows are inserted directly instead, so entries are
+never dropped. Delivery is at-least-once, inserts are not: each row keeps its stream entry id
+(audit_logs.stream_id, unique), so a batch re-delivered after a crash between commit and XACK is
+skipped. Entries a dead drainer left unacked are claimed after AUDIT_DRAIN_CLAIM_IDLE_SECONDS; one
+that still fails after AUDIT_DRAIN_MAX_DELIVERIES goes to the AUDIT_DEAD_LETTER_KEY stream.
+
+Credential/privilege changes (TRANSACTIONAL_ACTIONS) always take the db path. With the db sink the
+raw-SQL status writers (crud._SET_STATUS_SQL / _STATUS_BATCH_SQL) insert their audit rows in the same
+statement; with the redis sink they queue them like everyone else.
+
+ip and user agent are stored as ids into the client_ips / user_agents lookup tables (client_ids()).
+A per-process LRU maps string -> id, so only a never-seen value costs a round trip; ids found or
+created inside a transaction are cached once it commits.
+"""
+from __future__ import annotations
+
+import json
+import socket
+from datetime import datetime
+
+import redis as redis_lib
+from sqlalchemy import event, insert, select, text
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.metacache import TTLCache
+from app.models import AuditAction, AuditLog, ClientIp, UserAgent
+from app.redis_client import get_redis
+from app.settings import settings
+
+_PENDING_KEY = "pending_audit_rows"
+_PENDING_IDS_KEY = "pending_audit_client_ids"
+DRAIN_GROUP = "audit-drain"
+
+TRANSACTIONAL_ACTIONS = frozenset({
+    AuditAction.RESET_PASSWORD,
+    AuditAction.CHANGE_PASSWORD,
+    AuditAction.SET_ROLE,
+    AuditAction.DISABLE_USER,
+})
+
+COLUMNS = ("timestamp", "actor_user_id", "action", "target_user_id", "company_id", "task_id", "ip_id", "user_agent_id", "meta")
+
+# string field in crud._audit_row() dicts -> (id column, lookup model)
+_CLIENT_FIELDS = {"ip": ("ip_id", ClientIp), "user_agent": ("user_agent_id", UserAgent)}
+# Ids never change, so entries only leave by LRU eviction.
+_client_ids = {field: TTLCache(settings.audit_client_cache_size, float("inf")) for field in _CLIENT_FIELDS}
+
+
+def deferred(action: AuditAction) -> bool:
+    """True when entries for `action` go through the stream rather than the request transaction."""
+    return settings.audit_sink == "redis" and action not in TRANSACTIONAL_ACTIONS
+
+
+def _encode_clients(conn, rows: list[dict]) -> tuple[list[dict], list[tuple]]:
+    """(rows with ip/user_agent replaced by ids, [(field, value, id)] looked up in the database).
+
+    Missing values are inserted in sorted order, so concurrent writers can't deadlock on them.
+    """
+    ids: dict[str, dict[str, int]] = {}
+    fetched = []
+    for field, (_, model) in _CLIENT_FIELDS.items():
+        known, missing = ids.setdefault(field, {}), set()
+        for value in {r[field] for r in rows if r[field]}:
+            i = _client_ids[field].get(value)
+            if i is TTLCache._MISSING:
+                missing.add(value)
+            else:
+                known[value] = i
+        if missing:
+            conn.execute(pg_insert(model).values([{"value": v} for v in sorted(missing)])
+                         .on_conflict_do_nothing(index_elements=["value"]))
+            for value, i in conn.execute(select(model.value, model.id).where(model.value.in_(missing))).all():
+                known[value] = i
+                fetched.append((field, value, i))
+    out = []
+    for r in rows:
+        r = dict(r)
+        for field, (column, _) in _CLIENT_FIELDS.items():
+            value = r.pop(field)
+            r[column] = ids[field][value] if value else None
+        out.append(r)
+    return out, fetched
+
+
+def _remember(fetched: list[tuple]) -> None:
+    for field, value, i in fetched:
+        _client_ids[field].put(value, i)
+
+
+def client_ids(db: Session, rows: list[dict]) -> list[dict]:
+    """Copies of _audit_row() dicts with ip / user_agent swapped for ip_id / user_agent_id, ready to insert."""
+    out, fetched = _encode_clients(db, rows)
+    if fetched:
+        # Not cached before commit: on rollback, newly inserted lookup rows vanish with it.
+        db.info.setdefault(_PENDING_IDS_KEY, []).extend(fetched)
+    return out
+
+
+def queue(db: Session, rows: list[dict]) -> None:
+    """Queue _audit_row() dicts for the stream; appended after `db` commits."""
+    db.info.setdefault(_PENDING_KEY, []).extend(rows)
+
+
+def _encode(row: dict) -> str:
+    return json.dumps({**row, "timestamp": row["timestamp"].isoformat(), "action": row["action"].value})
+
+
+def _decode(raw: str) -> dict:
+    row = json.loads(raw)
+    row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+    return row
+
+
+@event.listens_for(Session, "after_commit")
+def _cache_client_ids_after_commit(db: Session):
+    _remember(db.info.pop(_PENDING_IDS_KEY, None) or ())
+
+
+@event.listens_for(Session, "after_commit")
+def _append_after_commit(db: Session):
+    rows = db.info.pop(_PENDING_KEY, None)
+    if not rows:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for row in rows:
+            pipe.xadd(settings.audit_stream_key, {"row": _encode(row)})
+        pipe.execute()
+    except Exception:
+        # Redis down or out of memory: write them now. The session's transaction is over, so use
+        # a connection of our own.
+        with db.get_bind().begin() as conn:
+            encoded, fetched = _encode_clients(conn, rows)
+            conn.execute(insert(AuditLog), encoded)
+        _remember(fetched)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_after_rollback(db: Session):
+    db.info.pop(_PENDING_KEY, None)
+    db.info.pop(_PENDING_IDS_KEY, None)
+
+
+def _ensure_group(r) -> None:
+    try:
+        r.xgroup_create(settings.audit_stream_key, DRAIN_GROUP, id="0", mkstream=True)
+    except redis_lib.ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+def _claim(r, consumer: str, count: int) -> list[tuple[str, dict]]:
+    """Entries delivered to some drainer (this one included) and left unacked for the claim idle time."""
+    resp = r.xautoclaim(settings.audit_stream_key, DRAIN_GROUP, consumer,
+                        min_idle_time=settings.audit_drain_claim_idle_seconds * 1000, count=count)
+    return [(entry_id, fields) for entry_id, fields in resp[1] if entry_id is not None]
+
+
+def _dead_letter(r, entries: list[tuple[str, dict]]) -> list[tuple[str, dict]]:
+    """Move entries delivered more than AUDIT_DRAIN_MAX_DELIVERIES times to the dead-letter stream; the rest."""
+    key = settings.audit_stream_key
+    ids = [entry_id for entry_id, _ in entries]
+    pending = r.xpending_range(key, DRAIN_GROUP, min=min(ids), max=max(ids), count=len(ids))
+    deliveries = {p["message_id"]: p["times_delivered"] for p in pending}
+    dead = [(entry_id, fields) for entry_id, fields in entries
+            if deliveries.get(entry_id, 0) > settings.audit_drain_max_deliveries]
+    if dead:
+        pipe = r.pipeline(transaction=True)
+        for entry_id, fields in dead:
+            pipe.xadd(settings.audit_dead_letter_key, {**fields, "stream_id": entry_id, "deliveries": deliveries[entry_id]})
+        pipe.xack(key, DRAIN_GROUP, *(entry_id for entry_id, _ in dead))
+        pipe.xdel(key, *(entry_id for entry_id, _ in dead))
+        pipe.execute()
+    return [e for e in entries if e not in dead]
+
+
+def _insert(db: Session, entries: list[tuple[str, dict]]) -> None:
+    """COPY the entries into a staging table, then into audit_logs, skipping stream ids already there."""
+    columns = (*COLUMNS, "stream_id")
+    rows = client_ids(db, [{**_decode(fields["row"]), "stream_id": entry_id} for entry_id, fields in entries])
+    db.execute(text(f"CREATE TEMP TABLE audit_drain_stage ON COMMIT DROP AS "
+                    f"SELECT {', '.join(columns)} FROM audit_logs WITH NO DATA"))
+    raw = db.connection().connection.driver_connection  # psycopg connection, inside the session's transaction
+    with raw.cursor() as cur:
+        with cur.copy(f"COPY audit_drain_stage ({', '.join(columns)}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(tuple(row.get(c) for c in columns))
+    db.execute(text(f"""
+        INSERT INTO audit_logs ({', '.join(columns)}) SELECT * FROM audit_drain_stage
+        ON CONFLICT (stream_id, timestamp) WHERE stream_id IS NOT NULL DO NOTHING
+    """))
+
+
+def drain(db: Session, *, batch: int | None = None, consumer: str | None = None) -> int:
+    """Move up to `batch` stream entries into audit_logs. Returns how many left the stream (0: nothing to do).
+
+    Stale unacked entries are claimed before new ones are read. If the batch is rejected (say a row
+    that violates a foreign key), its entries are retried one by one so the rest still go in; the failing
+    ones stay pending until they are claimed again or dead-lettered.
+    """
+    r = get_redis()
+    _ensure_group(r)
+    consumer = consumer or socket.gethostname()
+    count = batch or settings.audit_drain_batch
+    key = settings.audit_stream_key
+    entries = _claim(r, consumer, count)
+    if not entries:
+        resp = r.xreadgroup(DRAIN_GROUP, consumer, {key: ">"}, count=count)
+        entries = resp[0][1] if resp else []
+    if not entries:
+        return 0
+    live = _dead_letter(r, entries)
+
+    done = []
+    try:
+        if live:
+            _insert(db, live)
+            db.commit()
+        done = live
+    except (IntegrityError, DataError):
+        db.rollback()
+        for entry in live:
+            try:
+                _insert(db, [entry])
+                db.commit()
+                done.append(entry)
+            except (IntegrityError, DataError):
+                db.rollback()
+
+    if done:
+        ids = [entry_id for entry_id, _ in done]
+        r.xack(key, DRAIN_GROUP, *ids)
+        r.xdel(key, *ids)
+    return len(done) + len(entries) - len(live)
+
+
+def stats() -> dict:
+    out: dict = {"sink": settings.audit_sink, "client_id_cache": {f: c.stats() for f, c in _client_ids.items()}}
+    try:
+        r = get_redis()
+        out["stream_length"] = r.xlen(settings.audit_stream_key)
+        groups = {g["name"]: g for g in r.xinfo_groups(settings.audit_stream_key)} if out["stream_length"] else {}
+        out["pending"] = groups.get(DRAIN_GROUP, {}).get("pending", 0)
+        out["dead_letter_length"] = r.xlen(settings.audit_dead_letter_key)
+    except Exception as e:
+        out["error"] = f"Redis unavailable: {e}"
+    return out
@@ -0,0 +1,192 @@
+"""Monthly audit_logs partitions: creation ahead of time, retention to gzip NDJSON, and reading archives back.
+
+audit_logs is range-partitioned on timestamp (migration 0016): one partition per calendar month,
+named audit_logs_YYYY_MM, plus audit_logs_default for anything outside them.
+
+`python -m app.manage audit maintain` does two things:
+- ensure_partitions() creates the current and next AUDIT_PARTITIONS_AHEAD months.
+- archive_partitions() writes each month older than AUDIT_RETENTION_MONTHS to
+  AUDIT_ARCHIVE_DIR/audit_logs_YYYY_MM.ndjson.gz, then detaches and drops it.
+
+Archived months are always older than every live row, so a newest-first reader pages through
+Postgres first and then through the files (read_archive()).
+"""
+from __future__ import annotations
+
+import gzip
+import heapq
+import json
+import os
+import re
+from datetime import date, datetime
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.models import AuditAction, AuditLog, ClientIp, UserAgent
+from app.settings import settings
+
+DEFAULT_PARTITION = "audit_logs_default"
+# A queued DETACH blocks every audit write behind it; give up quickly instead.
+DETACH_LOCK_TIMEOUT = "5s"
+_PARTITION_RE = re.compile(r"^audit_logs_(\d{4})_(\d{2})$")
+_ARCHIVE_RE = re.compile(r"^audit_logs_(\d{4})_(\d{2})\.ndjson\.gz$")
+
+
+def month_start(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def add_months(d: date, n: int) -> date:
+    y, m = divmod(d.year * 12 + d.month - 1 + n, 12)
+    return date(y, m + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"audit_logs_{month.year:04d}_{month.month:02d}"
+
+
+def archive_path(month: date) -> str:
+    return os.path.join(settings.audit_archive_dir, f"{partition_name(month)}.ndjson.gz")
+
+
+def partitions(db: Session) -> list[date]:
+    """Months that currently have a partition, oldest first."""
+    names = db.execute(text("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'audit_logs'::regclass
+    """)).scalars().all()
+    return sorted(date(int(m[1]), int(m[2]), 1) for m in map(_PARTITION_RE.match, names) if m)
+
+
+def ensure_partitions(db: Session, today: date, ahead: int | None = None) -> list[str]:
+    """Create missing partitions from this month through `ahead` months out. Returns the names created.
+
+    Rows that already landed in the default partition for such a month are moved into the new partition.
+    """
+    existing = set(partitions(db))
+    created = []
+    for n in range(0, (settings.audit_partitions_ahead if ahead is None else ahead) + 1):
+        month = add_months(month_start(today), n)
+        if month in existing:
+            continue
+        name, bounds = partition_name(month), {"lo": month, "hi": add_months(month, 1)}
+        # ATTACH instead of CREATE ... PARTITION OF: the latter fails if the default partition has rows in range.
+        db.execute(text(f"CREATE TABLE {name} (LIKE audit_logs INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+        db.execute(text(f"""
+            WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE timestamp >= :lo AND timestamp < :hi RETURNING *)
+            INSERT INTO {name} SELECT * FROM moved
+        """), bounds)
+        db.execute(text(f"ALTER TABLE audit_logs ATTACH PARTITION {name} FOR VALUES FROM ('{bounds['lo']}') TO ('{bounds['hi']}')"))
+        created.append(name)
+    return created
+
+
+def archive_partitions(db: Session, today: date, retention_months: int | None = None) -> list[str]:
+    """Export and drop every partition entirely before the retention cutoff. Returns the files written.
+
+    The month is exported while still attached (readers only), then detached and dropped in a short
+    transaction of its own: DETACH locks all of audit_logs, so nothing slow may happen while it is held.
+    Expired months get no new rows (audit timestamps are the time of writing), so nothing can land in
+    between. If the DETACH can't get its lock within DETACH_LOCK_TIMEOUT, the month is left for the next
+    run, which rewrites the same file.
+    """
+    months = retention_months if retention_months is not None else settings.audit_retention_months
+    cutoff = add_months(month_start(today), -months)
+    os.makedirs(settings.audit_archive_dir, exist_ok=True)
+    written = []
+    for month in partitions(db):
+        if month >= cutoff:
+            break
+        name, path = partition_name(month), archive_path(month)
+        # Archives are self-contained: ip / user agent are written out as strings, not lookup ids.
+        rows = db.execute(text(f"""
+            SELECT row_to_json(t)::text FROM (
+                SELECT a.id, a.timestamp, a.actor_user_id, a.action, a.target_user_id, a.company_id, a.task_id,
+                       COALESCE(ci.value, '') AS ip, COALESCE(ua.value, '') AS user_agent, a.meta
+                FROM {name} a
+                LEFT JOIN client_ips ci ON ci.id = a.ip_id
+                LEFT JOIN user_agents ua ON ua.id = a.user_agent_id
+                ORDER BY a.timestamp, a.id
+            ) t
+        """), execution_options={"yield_per": 5000})  # server-side cursor
+        tmp = path + ".tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            for (line,) in rows:
+                f.write(line + "\n")
+        db.commit()
+        with open(tmp, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+        try:
+            db.execute(text(f"SET LOCAL lock_timeout = '{DETACH_LOCK_TIMEOUT}'"))
+            db.execute(text(f"ALTER TABLE audit_logs DETACH PARTITION {name}"))
+            db.execute(text(f"DROP TABLE {name}"))
+            db.commit()
+        except OperationalError:
+            db.rollback()  # lock_timeout: busy right now, retried next run
+            continue
+        written.append(path)
+    return written
+
+
+def archived_months() -> list[date]:
+    """Months with an archive file, newest first."""
+    try:
+        names = os.listdir(settings.audit_archive_dir)
+    except FileNotFoundError:
+        return []
+    return sorted((date(int(m[1]), int(m[2]), 1) for m in map(_ARCHIVE_RE.match, names) if m), reverse=True)
+
+
+def _matches(row: dict, filters: dict) -> bool:
+    return all(v is None or row.get(k) == v for k, v in filters.items())
+
+
+def read_archive(
+    *,
+    actor_user_id: int | None = None,
+    action: AuditAction | None = None,
+    company_id: int | None = None,
+    task_id: int | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    before: tuple[datetime, int] | None = None,
+    limit: int,
+) -> list[AuditLog]:
+    """Up to `limit` archived entries, newest first, with the same filters/keyset as crud.list_audit_logs.
+
+    Returns transient AuditLog objects (never added to a session). Each month file is streamed once;
+    only the best `limit` rows of it are kept in memory.
+    """
+    filters = {"actor_user_id": actor_user_id, "action": action.value if action else None,
+               "company_id": company_id, "task_id": task_id}
+    out: list[AuditLog] = []
+    for month in archived_months():
+        nxt = add_months(month, 1)
+        if (since and datetime.combine(nxt, datetime.min.time()) <= since) or len(out) >= limit:
+            break
+        if (until and datetime.combine(month, datetime.min.time()) >= until) or \
+                (before and datetime.combine(month, datetime.min.time()) > before[0]):
+            continue
+        want, heap = limit - len(out), []  # min-heap of the newest `want` (key, row) pairs seen so far
+        with gzip.open(archive_path(month), "rt", encoding="utf-8") as f:
+            for line in f:
+                row = json.loads(line)
+                ts = datetime.fromisoformat(row["timestamp"])
+                key = (ts, row["id"])
+                if (since and ts < since) or (until and ts >= until) or (before and key >= before) or not _matches(row, filters):
+                    continue
+                if len(heap) < want:
+                    heapq.heappush(heap, (key, row))
+                elif key > heap[0][0]:
+                    heapq.heapreplace(heap, (key, row))
+        for (ts, _), row in sorted(heap, key=lambda p: p[0], reverse=True):
+            ip, user_agent = row.pop("ip", ""), row.pop("user_agent", "")
+            out.append(AuditLog(**{**row, "timestamp": ts, "action": AuditAction(row["action"])},
+                                client_ip=ClientIp(value=ip) if ip else None,
+                                client_user_agent=UserAgent(value=user_agent) if user_agent else None))
+    return out
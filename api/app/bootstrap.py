@@ -8,7 +8,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import select
 
 from app.models import User, Role
-from app.security import hash_password
+from app.security import pwd_context
 
 def bootstrap_superadmin(db: Session, *, username: str, write_path: str) -> None:
     # If a super_admin exists, do nothing.
@@ -21,7 +21,8 @@ def bootstrap_superadmin(db: Session, *, username: str, write_path: str) -> None
         username=username,
         display_name="Super Admin",
         role=Role.super_admin,
-        password_hash=hash_password(password),
+        # Startup, before any request: hash inline rather than on the request-path pool.
+        password_hash=pwd_context.hash(password),
         must_change_password=False,
         disabled=False,
     )
@@ -0,0 +1,93 @@
+"""Shared Redis cache for serialized list responses.
+
+Keys embed the company's data version (crud.company_data_version), so a write never has to delete
+anything: the next read misses on the new version and the old entries age out by TTL (or by
+allkeys-lru eviction under the maxmemory limit of the dedicated cache Redis, CACHE_REDIS_URL).
+
+Every call is best effort. If Redis is down or slow, reads fall through to the database.
+"""
+from __future__ import annotations
+
+from app.redis_client import get_async_cache_redis, get_cache_redis
+from app.settings import settings
+
+
+def _key(*parts) -> str:
+    return ":".join([settings.cache_prefix, *(str(p) for p in parts)])
+
+
+def task_window_key(company_id: int, data_version: str, user_id: int | None, today) -> str:
+    """Key for one task-list window: (company, version, employee id or 'admin', day the window is anchored on)."""
+    return _key("tasks", company_id, data_version, user_id if user_id is not None else "admin", today)
+
+
+def get(key: str) -> str | None:
+    if not settings.cache_enabled:
+        return None
+    try:
+        pipe = get_cache_redis().pipeline(transaction=False)
+        pipe.get(key)
+        pipe.incr(_key("stats", "lookups"))
+        value, _ = pipe.execute()
+        return value
+    except Exception:
+        return None
+
+
+def put(key: str, value: str, ttl: int | None = None) -> None:
+    """Store a value after a miss (also counts the miss)."""
+    if not settings.cache_enabled:
+        return
+    try:
+        pipe = get_cache_redis().pipeline(transaction=False)
+        pipe.set(key, value, ex=ttl or settings.cache_ttl_seconds)
+        pipe.incr(_key("stats", "misses"))
+        pipe.execute()
+    except Exception:
+        pass
+
+
+async def get_async(key: str) -> str | None:
+    if not settings.cache_enabled:
+        return None
+    try:
+        async with get_async_cache_redis().pipeline(transaction=False) as pipe:
+            pipe.get(key)
+            pipe.incr(_key("stats", "lookups"))
+            value, _ = await pipe.execute()
+        return value
+    except Exception:
+        return None
+
+
+async def put_async(key: str, value: str, ttl: int | None = None) -> None:
+    if not settings.cache_enabled:
+        return
+    try:
+        async with get_async_cache_redis().pipeline(transaction=False) as pipe:
+            pipe.set(key, value, ex=ttl or settings.cache_ttl_seconds)
+            pipe.incr(_key("stats", "misses"))
+            await pipe.execute()
+    except Exception:
+        pass
+
+
+def stats() -> dict:
+    """Cluster-wide hit/miss counters plus the Redis memory figures needed to size the cache."""
+    r = get_cache_redis()
+    lookups, misses = (int(v or 0) for v in r.mget(_key("stats", "lookups"), _key("stats", "misses")))
+    mem = r.info("memory")
+    evicted = r.info("stats").get("evicted_keys", 0)
+    hits = max(lookups - misses, 0)
+    return {
+        "enabled": settings.cache_enabled,
+        "lookups": lookups,
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / lookups, 4) if lookups else None,
+        "ttl_seconds": settings.cache_ttl_seconds,
+        "used_memory": mem.get("used_memory", 0),
+        "maxmemory": mem.get("maxmemory", 0),
+        "maxmemory_policy": mem.get("maxmemory_policy", ""),
+        "evicted_keys": evicted,
+    }
@@ -1,18 +1,26 @@
 from __future__ import annotations
 
+import hashlib
 import json
-from datetime import datetime
+from datetime import date, datetime, timedelta, timezone
 from urllib.parse import quote_plus
-from sqlalchemy.orm import Session
-from sqlalchemy import select, func, text
+from sqlalchemy.orm import Session, selectinload, joinedload
+from sqlalchemy import select, func, text, true, literal, literal_column, delete, insert, update, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from app.models import (
     User, Company, UserCompany, Task, TaskStatus,
-    TaskCategory, Patient,
+    TaskCategory, Patient, TaskDueCounter, TaskGroup,
+    TaskRecurrence, TaskRecurrenceAssignee,
     AuditLog, AuditAction, Role,
     PushSubscription,
 )
-from app.security import hash_password, random_temp_password
+from app.utils import format_task_code, parse_task_code
+from app.recurrence import parse_rule, occurrences
+from app.events import queue_task_events
+from app import audit, audit_archive
+from app import metacache
+from app.principals import revoke as revoke_principal
 
 
 def maps_url_from_address(address: str) -> str:
@@ -21,19 +29,135 @@ def maps_url_from_address(address: str) -> str:
         return ""
     return f"https://www.google.com/maps/search/?api=1&query={quote_plus(addr)}"
 
+# Upper bound on rows created by one bulk/matrix request.
+MAX_TASKS_PER_REQUEST = 5000
+
+# Rows per multi-row INSERT; keeps bind parameters well under Postgres' 65535 limit.
+INSERT_BATCH_SIZE = 1000
+
+
+def _chunks(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def _audit_row(*, actor_user_id: int | None, action: AuditAction, ip: str = "", user_agent: str = "",
+               target_user_id: int | None = None, company_id: int | None = None, task_id: int | None = None, meta: dict | None = None) -> dict:
+    return dict(
+        timestamp=datetime.utcnow(),
+        actor_user_id=actor_user_id,
+        action=action,
+        target_user_id=target_user_id,
+        company_id=company_id,
+        task_id=task_id,
+        ip=ip[:80],
+        user_agent=user_agent[:300],
+        meta=json.dumps(meta or {}),
+    )
+
 def log(db: Session, *, actor_user_id: int | None, action: AuditAction, ip: str = "", user_agent: str = "",
         target_user_id: int | None = None, company_id: int | None = None, task_id: int | None = None, meta: dict | None = None):
-    entry = AuditLog(
+    row = _audit_row(
         actor_user_id=actor_user_id,
         action=action,
         target_user_id=target_user_id,
         company_id=company_id,
         task_id=task_id,
         ip=ip,
-        user_agent=user_agent[:300],
-        meta=json.dumps(meta or {}),
+        user_agent=user_agent,
+        meta=meta,
     )
-    db.add(entry)
+    if audit.deferred(action):
+        audit.queue(db, [row])
+    else:
+        db.add(AuditLog(**audit.client_ids(db, [row])[0]))
+
+def log_many(db: Session, entries: list[dict]):
+    """Write several audit entries with one multi-row INSERT (or queue them; see app.audit). Each entry takes log()'s keyword arguments."""
+    rows = [_audit_row(**e) for e in entries]
+    queued = [r for r in rows if audit.deferred(r["action"])]
+    if queued:
+        audit.queue(db, queued)
+    direct = audit.client_ids(db, [r for r in rows if not audit.deferred(r["action"])])
+    for chunk in _chunks(direct, INSERT_BATCH_SIZE):
+        db.execute(insert(AuditLog).values(chunk))
+
+def _client_id_params(db: Session, ip: str, user_agent: str) -> dict:
+    """ip_id / user_agent_id bind parameters for the raw-SQL audit inserts."""
+    row = audit.client_ids(db, [{"ip": ip[:80], "user_agent": user_agent[:300]}])[0]
+    return {"ip_id": row["ip_id"], "user_agent_id": row["user_agent_id"]}
+
+# ---- Audit listing: newest first, keyset on (timestamp, id) ----
+
+AUDIT_PAGE_LIMIT = 200
+AUDIT_PAGE_MAX_LIMIT = 1000
+
+
+def encode_audit_cursor(row: AuditLog) -> str:
+    return f"{row.timestamp.isoformat()}|{row.id}"
+
+
+def decode_audit_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        ts, rid = cursor.split("|", 1)
+        return datetime.fromisoformat(ts), int(rid)
+    except ValueError:
+        raise ValueError("Invalid cursor")
+
+
+def _naive_utc(dt: datetime) -> datetime:
+    # audit_logs.timestamp is naive UTC (datetime.utcnow).
+    return dt.astimezone(timezone.utc).replace(tzinfo=None) if dt.tzinfo else dt
+
+
+def list_audit_logs(
+    db: Session,
+    *,
+    actor_user_id: int | None = None,
+    action: AuditAction | None = None,
+    company_id: int | None = None,
+    task_id: int | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    before: tuple[datetime, int] | None = None,
+    limit: int = AUDIT_PAGE_LIMIT,
+    include_archive: bool = False,
+) -> tuple[list[AuditLog], str | None]:
+    """(page, next_cursor), newest first. Each single filter has a (filter, timestamp, id) index (migration 0015).
+
+    With include_archive, a page that runs out of rows in Postgres continues into the archived months
+    (app.audit_archive); the cursor works across the boundary.
+    """
+    limit = max(1, min(limit, AUDIT_PAGE_MAX_LIMIT))
+    since, until = (_naive_utc(since) if since else None), (_naive_utc(until) if until else None)
+    clauses = []
+    if actor_user_id is not None:
+        clauses.append(AuditLog.actor_user_id == actor_user_id)
+    if action is not None:
+        clauses.append(AuditLog.action == action)
+    if company_id is not None:
+        clauses.append(AuditLog.company_id == company_id)
+    if task_id is not None:
+        clauses.append(AuditLog.task_id == task_id)
+    if since is not None:
+        clauses.append(AuditLog.timestamp >= since)
+    if until is not None:
+        clauses.append(AuditLog.timestamp < until)
+    if before is not None:
+        clauses.append(tuple_(AuditLog.timestamp, AuditLog.id) < tuple_(*before))
+    q = select(AuditLog).where(*clauses).order_by(AuditLog.timestamp.desc(), AuditLog.id.desc()).limit(limit + 1)
+    rows = list(db.execute(q).scalars().all())
+    if include_archive and len(rows) <= limit:
+        # Archived months are all older than the live rows, so they simply follow.
+        rows += audit_archive.read_archive(
+            actor_user_id=actor_user_id, action=action, company_id=company_id, task_id=task_id,
+            since=since, until=until, before=(rows[-1].timestamp, rows[-1].id) if rows else before,
+            limit=limit + 1 - len(rows),
+        )
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_audit_cursor(rows[-1])
+    return rows, None
+
 
 def ensure_company_slugs(db: Session, slugs: list[str]) -> list[Company]:
     if not slugs:
@@ -51,10 +175,12 @@ def set_user_companies(db: Session, user: User, companies: list[Company]):
     db.query(UserCompany).filter(UserCompany.user_id == user.id).delete(synchronize_session=False)
     db.add_all([UserCompany(user_id=user.id, company_id=cid) for cid in ids])
     db.flush()
+    metacache.invalidate(db, "memberships", user.id)
 
-def create_user(db: Session, *, username: str, display_name: str, mattermost_id: str, role: Role, password: str, company_slugs: list[str],
+def create_user(db: Session, *, username: str, display_name: str, mattermost_id: str, role: Role, password_hash: str, company_slugs: list[str],
                 actor_user_id: int | None, ip: str, user_agent: str) -> User:
-    u = User(username=username, display_name=display_name, mattermost_id=(mattermost_id or "").strip(), role=role, password_hash=hash_password(password))
+    # password_hash comes from the caller (security.hash_password is awaited on the hashing pool).
+    u = User(username=username, display_name=display_name, mattermost_id=(mattermost_id or "").strip(), role=role, password_hash=password_hash)
     db.add(u)
     db.flush()  # get u.id
     companies = ensure_company_slugs(db, company_slugs)
@@ -66,19 +192,123 @@ def create_user(db: Session, *, username: str, display_name: str, mattermost_id:
 
 
 
+# Upper bound on rows in one /api/admin/users:bulk call.
+MAX_USERS_PER_BULK = 1000
+
+
+def check_bulk_users(rows: list[dict], *, actor_role: Role) -> tuple[list[dict], list[int]]:
+    """Result dicts for create_users_bulk() and the indexes of rows that pass the checks needing no database.
+
+    Only those rows are worth hashing a password for.
+    """
+    results = [{"row": i + 1, "username": r.get("username", ""), "ok": False, "id": None, "error": r.get("error")}
+               for i, r in enumerate(rows)]
+    seen: set[str] = set()
+    pending: list[int] = []
+    for i, r in enumerate(rows):
+        if r.get("error") is not None:
+            continue
+        username = r["username"].strip()
+        error = None
+        if not username:
+            error = "username is required"
+        elif username in seen:
+            error = "duplicate username in this batch"
+        elif r["role"] not in {x.value for x in Role}:
+            error = f"Invalid role '{r['role']}'"
+        elif r["role"] == Role.super_admin.value and actor_role != Role.super_admin:
+            error = "Only super_admin can create super_admin"
+        seen.add(username)
+        results[i]["username"] = username
+        if error:
+            results[i]["error"] = error
+        else:
+            pending.append(i)
+    return results, pending
+
+
+def create_users_bulk(db: Session, rows: list[dict], results: list[dict], hashes: dict[int, str], *,
+                      actor_user_id: int, ip: str, user_agent: str) -> list[dict]:
+    """Create many users at once; one result dict per input row ({row, username, ok, id, error}).
+
+    Rows are already-validated AdminCreateUserIn dicts, or {"username", "error"} for rows that failed
+    validation; results and the rows still pending come from check_bulk_users(), and hashes maps each
+    pending row to its password hash (hashed by the caller before any query, so no connection sits
+    idle-in-transaction while argon2 runs). Bad rows (existing username, unknown company) are reported
+    and skipped; the rest are inserted with one multi-row statement per table.
+    """
+    pending = list(hashes)
+    if not pending:
+        return results
+
+    names = [results[i]["username"] for i in pending]
+    existing = set(db.execute(select(User.username).where(User.username.in_(names))).scalars().all())
+    slugs = {s for i in pending for s in rows[i]["company_slugs"]}
+    companies = dict(db.execute(select(Company.slug, Company.id).where(Company.slug.in_(slugs))).all()) if slugs else {}
+
+    valid: list[int] = []
+    for i in pending:
+        error = None
+        if results[i]["username"] in existing:
+            error = "username already exists"
+        else:
+            missing = sorted(set(rows[i]["company_slugs"]) - set(companies))
+            if missing:
+                error = f"Unknown company slugs: {missing}"
+        if error:
+            results[i]["error"] = error
+        else:
+            valid.append(i)
+    if not valid:
+        return results
+
+    params = [
+        {
+            "username": results[i]["username"],
+            "display_name": rows[i]["display_name"],
+            "mattermost_id": (rows[i]["mattermost_id"] or "").strip(),
+            "role": Role(rows[i]["role"]),
+            "password_hash": hashes[i],
+        }
+        for i in valid
+    ]
+    # A concurrent create of the same username loses quietly here and is reported per row below.
+    stmt = pg_insert(User).on_conflict_do_nothing(index_elements=[User.username]).returning(User.id, User.username)
+    ids: dict[str, int] = {}
+    for chunk in _chunks(params, INSERT_BATCH_SIZE):
+        ids.update({name: uid for uid, name in db.execute(stmt.values(chunk)).all()})
+
+    links, entries = [], []
+    for i in valid:
+        uid = ids.get(results[i]["username"])
+        if uid is None:
+            results[i]["error"] = "username already exists"
+            continue
+        results[i].update(ok=True, id=uid)
+        entries.append(dict(actor_user_id=actor_user_id, action=AuditAction.CREATE_USER, target_user_id=uid, ip=ip, user_agent=user_agent))
+        for slug in dict.fromkeys(rows[i]["company_slugs"]):
+            links.append({"user_id": uid, "company_id": companies[slug]})
+            entries.append(dict(actor_user_id=actor_user_id, action=AuditAction.ASSIGN_COMPANY, target_user_id=uid,
+                                company_id=companies[slug], ip=ip, user_agent=user_agent))
+    for chunk in _chunks(links, INSERT_BATCH_SIZE):
+        db.execute(insert(UserCompany), chunk)
+    log_many(db, entries)
+    return results
+
+
 def update_user_mattermost_id(db: Session, *, target_user: User, mattermost_id: str):
     """Set/clear the user's Mattermost user identifier for future integrations."""
     target_user.mattermost_id = (mattermost_id or "").strip()
 
-def reset_password(db: Session, *, target_user: User, actor_user: User, ip: str, user_agent: str) -> str:
+def reset_password(db: Session, *, target_user: User, password_hash: str, actor_user: User, ip: str, user_agent: str):
+    """Set a temporary password (hashed by the caller) that must be changed at next login."""
     # Cannot reset super_admin password via API.
     if target_user.role == Role.super_admin:
         raise PermissionError("Cannot reset super_admin password via UI/API.")
-    temp = random_temp_password()
-    target_user.password_hash = hash_password(temp)
+    target_user.password_hash = password_hash
     target_user.must_change_password = True
+    revoke_principal(db, target_user.id)
     log(db, actor_user_id=actor_user.id, action=AuditAction.RESET_PASSWORD, target_user_id=target_user.id, ip=ip, user_agent=user_agent)
-    return temp
 
 def set_role(db: Session, *, target_user: User, new_role: Role, actor_user: User, ip: str, user_agent: str):
     if target_user.role == Role.super_admin:
@@ -90,6 +320,7 @@ def set_role(db: Session, *, target_user: User, new_role: Role, actor_user: User
     if new_role == Role.admin and actor_user.role not in (Role.admin, Role.super_admin):
         raise PermissionError("Only admin can assign admin.")
     target_user.role = new_role
+    revoke_principal(db, target_user.id)
     log(db, actor_user_id=actor_user.id, action=AuditAction.SET_ROLE, target_user_id=target_user.id, ip=ip, user_agent=user_agent,
         meta={"new_role": new_role.value})
 
@@ -97,11 +328,33 @@ def disable_user(db: Session, *, target_user: User, disabled: bool, actor_user:
     if target_user.role == Role.super_admin:
         raise PermissionError("Cannot disable super_admin via UI/API.")
     target_user.disabled = disabled
+    revoke_principal(db, target_user.id)
     log(db, actor_user_id=actor_user.id, action=AuditAction.DISABLE_USER, target_user_id=target_user.id, ip=ip, user_agent=user_agent,
         meta={"disabled": disabled})
 
+USERS_PAGE_LIMIT = 200
+USERS_PAGE_MAX_LIMIT = 1000
+
+
+def list_users(db: Session, *, q: str = "", after_id: int = 0, limit: int = USERS_PAGE_LIMIT) -> tuple[list[User], int | None]:
+    """(page, next_cursor) in id order. `q` matches anywhere in username or display_name, case-insensitively
+    (ILIKE, served by the pg_trgm indexes from migration 0015)."""
+    limit = max(1, min(limit, USERS_PAGE_MAX_LIMIT))
+    stmt = select(User).where(User.id > after_id)
+    q = q.strip()
+    if q:
+        pattern = "%" + q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        stmt = stmt.where(User.username.ilike(pattern, escape="\\") | User.display_name.ilike(pattern, escape="\\"))
+    users = list(db.execute(stmt.order_by(User.id.asc()).limit(limit + 1)).scalars().all())
+    if len(users) > limit:
+        users = users[:limit]
+        return users, users[-1].id
+    return users, None
+
+
 def upsert_company(db: Session, *, slug: str, name: str, actor_user: User, ip: str, user_agent: str) -> Company:
     c = db.execute(select(Company).where(Company.slug == slug)).scalar_one_or_none()
+    metacache.invalidate(db, "company", slug)
     if c:
         c.name = name
     else:
@@ -117,6 +370,7 @@ def upsert_company(db: Session, *, slug: str, name: str, actor_user: User, ip: s
         ]
         for n, order in defaults:
             db.add(TaskCategory(company_id=c.id, name=n, sort_order=order, active=True))
+        metacache.invalidate(db, "categories", c.id)
     return c
 
 def create_tasks_bulk(
@@ -138,6 +392,96 @@ def create_tasks_bulk(
     ip: str,
     user_agent: str,
 ) -> list[Task]:
+    return create_tasks_matrix(
+        db,
+        company=company,
+        assignee_ids=assignee_ids,
+        slots=[(task_date, task_time)],
+        category=category,
+        title=title,
+        maps_url=maps_url,
+        patient_id=patient_id,
+        patient_name=patient_name,
+        patient_address=patient_address,
+        patient_phone=patient_phone,
+        bonus_details=bonus_details,
+        actor_user=actor_user,
+        ip=ip,
+        user_agent=user_agent,
+    )
+
+def create_tasks_matrix(
+    db: Session,
+    *,
+    company: Company,
+    assignee_ids: list[int],
+    slots: list[tuple],
+    category: str,
+    title: str,
+    maps_url: str,
+    patient_id: int | None,
+    patient_name: str,
+    patient_address: str,
+    patient_phone: str,
+    bonus_details: str,
+    actor_user: User,
+    ip: str,
+    user_agent: str,
+) -> list[Task]:
+    """Create one task per (slot, assignee) pair; `slots` is a list of (task_date, task_time).
+
+    Company, category, patient and assignees are validated once for the whole matrix.
+    """
+    slots = list(dict.fromkeys(slots))  # drop duplicate slots, keep order
+    total = len(slots) * len(assignee_ids)
+    if total > MAX_TASKS_PER_REQUEST:
+        raise ValueError(f"Too many tasks in one request ({total}); the limit is {MAX_TASKS_PER_REQUEST}.")
+
+    template = resolve_task_template(
+        db,
+        company=company,
+        assignee_ids=assignee_ids,
+        category=category,
+        title=title,
+        maps_url=maps_url,
+        patient_id=patient_id,
+        patient_name=patient_name,
+        patient_address=patient_address,
+        patient_phone=patient_phone,
+        bonus_details=bonus_details,
+    )
+    if total == 0:
+        return []
+    # One shared payload row for the whole matrix.
+    group = create_task_group(db, company_id=company.id, template=template)
+    rows = [(d, tm, uid, group.id) for d, tm in slots for uid in assignee_ids]
+    return _insert_tasks(db, company_id=company.id, category=template["category"], rows=rows,
+                         actor_user_id=actor_user.id, ip=ip, user_agent=user_agent)
+
+# Task columns copied from a template (bulk/matrix payload or a TaskRecurrence).
+TASK_TEMPLATE_FIELDS = (
+    "category", "title", "maps_url",
+    "patient_id", "patient_name", "patient_address", "patient_phone",
+    "bonus_details",
+)
+# The part of the template stored once per TaskGroup (everything but category).
+TASK_GROUP_FIELDS = tuple(f for f in TASK_TEMPLATE_FIELDS if f != "category")
+
+def resolve_task_template(
+    db: Session,
+    *,
+    company: Company,
+    assignee_ids: list[int],
+    category: str,
+    title: str,
+    maps_url: str,
+    patient_id: int | None,
+    patient_name: str,
+    patient_address: str,
+    patient_phone: str,
+    bonus_details: str,
+) -> dict:
+    """Validate assignees/category/patient for `company` and return the task template (TASK_TEMPLATE_FIELDS)."""
     # validate assignees exist
     users = db.execute(select(User).where(User.id.in_(assignee_ids))).scalars().all()
     found = {u.id for u in users}
@@ -146,10 +490,7 @@ def create_tasks_bulk(
         raise ValueError(f"Unknown user ids: {missing}")
 
     # Validate category exists for the company (active or inactive allowed; admin may create tasks under inactive in edge cases)
-    cat = db.execute(
-        select(TaskCategory).where(TaskCategory.company_id == company.id, TaskCategory.name == category)
-    ).scalar_one_or_none()
-    if not cat:
+    if category not in metacache.category_names(db, company.id):
         raise ValueError(f"Unknown category '{category}' for company '{company.slug}'. Create it first.")
 
     # Patient lookup (optional) + snapshot
@@ -167,45 +508,243 @@ def create_tasks_bulk(
     if not maps_url and patient_address:
         maps_url = maps_url_from_address(patient_address)
 
-    created: list[Task] = []
-    for uid in assignee_ids:
-        t = Task(
-            company_id=company.id,
-            assigned_user_id=uid,
-            category=category,
-            task_date=task_date,
-            task_time=task_time,
-            title=title,
-            maps_url=maps_url,
-            patient_id=p.id if p else patient_id,
-            patient_name=patient_name,
-            patient_address=patient_address,
-            patient_phone=patient_phone,
-            bonus_details=bonus_details,
-        )
-        num = db.execute(text("select nextval('task_num_seq')")).scalar_one()
-        t.task_num = int(num)
-        t.task_code = f"T{t.task_num:06d}"
-        db.add(t)
-        db.flush()
-        created.append(t)
-        log(db, actor_user_id=actor_user.id, action=AuditAction.CREATE_TASK, target_user_id=uid, company_id=company.id, task_id=t.id,
-            ip=ip, user_agent=user_agent, meta={"task_code": t.task_code, "category": category})
+    return {
+        "category": category,
+        "title": title,
+        "maps_url": maps_url,
+        "patient_id": p.id if p else patient_id,
+        "patient_name": patient_name,
+        "patient_address": patient_address,
+        "patient_phone": patient_phone,
+        "bonus_details": bonus_details,
+    }
+
+def create_task_group(db: Session, *, company_id: int, template: dict) -> TaskGroup:
+    group = TaskGroup(company_id=company_id, **{f: template[f] for f in TASK_GROUP_FIELDS})
+    db.add(group)
+    db.flush()
+    return group
+
+def _insert_tasks(
+    db: Session,
+    *,
+    company_id: int,
+    category: str,
+    rows: list[tuple],
+    actor_user_id: int | None,
+    ip: str,
+    user_agent: str,
+    recurrence_id: int | None = None,
+) -> list[Task]:
+    """Insert one task per (task_date, task_time, user_id, group_id) in `rows`, plus audit rows and due counters."""
+    if not rows:
+        return []
+
+    # Reserve every task number in one round trip.
+    nums = db.execute(
+        text("select nextval('task_num_seq') from generate_series(1, :n)"), {"n": len(rows)}
+    ).scalars().all()
+
+    params = [
+        {
+            "task_num": int(num),
+            "task_code": format_task_code(int(num)),
+            "company_id": company_id,
+            "assigned_user_id": uid,
+            "category": category,
+            "task_date": d,
+            "task_time": tm,
+            "group_id": group_id,
+            "recurrence_id": recurrence_id,
+        }
+        for (d, tm, uid, group_id), num in zip(rows, nums)
+    ]
+    # Multi-row INSERT ... RETURNING (batched by SQLAlchemy's insertmanyvalues).
+    created = sorted(db.scalars(insert(Task).returning(Task), params), key=lambda t: t.task_num)
+
+    meta_extra = {"recurrence_id": recurrence_id} if recurrence_id else {}
+    log_many(db, [
+        dict(actor_user_id=actor_user_id, action=AuditAction.CREATE_TASK, target_user_id=t.assigned_user_id, company_id=company_id,
+             task_id=t.id, ip=ip, user_agent=user_agent, meta={"task_code": t.task_code, "category": t.category, **meta_extra})
+        for t in created
+    ])
+
+    deltas: dict[tuple[int, int, object], int] = {}
+    for t in created:
+        key = (t.assigned_user_id, company_id, t.task_date)
+        deltas[key] = deltas.get(key, 0) + 1
+    bump_due_counters(db, deltas)
+    queue_task_events(db, kind="created", company_id=company_id, tasks=created)
     return created
 
+def bump_due_counters(db: Session, deltas: dict[tuple[int, int, object], int]):
+    """Apply {(user_id, company_id, task_date): delta} to task_due_counters with multi-row upserts."""
+    rows = [
+        {"user_id": uid, "company_id": cid, "task_date": d, "open_count": n}
+        for (uid, cid, d), n in deltas.items() if n
+    ]
+    for chunk in _chunks(rows, INSERT_BATCH_SIZE):
+        stmt = pg_insert(TaskDueCounter).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[TaskDueCounter.user_id, TaskDueCounter.company_id, TaskDueCounter.task_date],
+            set_={"open_count": TaskDueCounter.open_count + stmt.excluded.open_count},
+        )
+        db.execute(stmt)
+
+def _bump_task_due_counter(db: Session, task: Task, delta: int):
+    bump_due_counters(db, {(task.assigned_user_id, task.company_id, task.task_date): delta})
+
+def _live_due_counts():
+    # Source-of-truth aggregate the counters are derived from.
+    return (
+        select(
+            Task.assigned_user_id.label("user_id"),
+            Task.company_id.label("company_id"),
+            Task.task_date.label("task_date"),
+            func.count().label("open_count"),  # count(*) so ix_tasks_open_due can answer it index-only
+        )
+        .where(Task.status == TaskStatus.todo, Task.deleted_at.is_(None))
+        .group_by(Task.assigned_user_id, Task.company_id, Task.task_date)
+    )
+
+def rebuild_due_counters(db: Session) -> int:
+    """Recompute task_due_counters from `tasks`. Returns the number of counter rows written."""
+    db.execute(delete(TaskDueCounter))
+    live = _live_due_counts().subquery()
+    res = db.execute(
+        pg_insert(TaskDueCounter).from_select(
+            ["user_id", "company_id", "task_date", "open_count"],
+            select(live.c.user_id, live.c.company_id, live.c.task_date, live.c.open_count),
+        )
+    )
+    return int(res.rowcount or 0)
+
+def verify_due_counters(db: Session) -> list[dict]:
+    """Compare task_due_counters with `tasks`; returns one dict per mismatching key."""
+    live = _live_due_counts().subquery()
+    c = TaskDueCounter.__table__
+    on = (c.c.user_id == live.c.user_id) & (c.c.company_id == live.c.company_id) & (c.c.task_date == live.c.task_date)
+    stored = func.coalesce(c.c.open_count, 0)
+    actual = func.coalesce(live.c.open_count, 0)
+    q = (
+        select(
+            func.coalesce(c.c.user_id, live.c.user_id).label("user_id"),
+            func.coalesce(c.c.company_id, live.c.company_id).label("company_id"),
+            func.coalesce(c.c.task_date, live.c.task_date).label("task_date"),
+            stored.label("stored"),
+            actual.label("actual"),
+        )
+        .select_from(c.outerjoin(live, on, full=True))
+        .where(stored != actual)
+    )
+    return [dict(r._mapping) for r in db.execute(q).all()]
+
 def tasks_due_count_for_user_company(db: Session, user_id: int, company_id: int, today) -> int:
-    q = select(func.count(Task.id)).where(
-        Task.assigned_user_id == user_id,
-        Task.company_id == company_id,
-        Task.status == TaskStatus.todo,
-        Task.task_date <= today,
-        Task.deleted_at.is_(None),
+    q = select(func.coalesce(func.sum(TaskDueCounter.open_count), 0)).where(
+        TaskDueCounter.user_id == user_id,
+        TaskDueCounter.company_id == company_id,
+        TaskDueCounter.task_date <= today,
     )
     return int(db.execute(q).scalar_one())
 
+def list_companies_with_due_counts(db: Session, user: User, today) -> list[tuple[Company, int]]:
+    """Active companies visible to `user` with the user's due-task count, in a single query.
+
+    Counts come from the task_due_counters read model rather than scanning `tasks`.
+
+    Employees see the companies they are linked to; admins see every active company.
+    super_admin never has a due count (matches the old per-company loop).
+    """
+    return [(c, int(cnt)) for c, cnt in db.execute(companies_with_due_counts_query(user, today)).all()]
+
+
+# The *_query statement builders are shared by the sync functions here and app.crud_async.
+
+def companies_with_due_counts_query(user: User, today):
+    if user.role == Role.super_admin:
+        return select(Company, literal(0)).where(Company.active == True).order_by(Company.name.asc())
+
+    due = (
+        select(TaskDueCounter.company_id, func.sum(TaskDueCounter.open_count).label("due_count"))
+        .where(TaskDueCounter.user_id == user.id, TaskDueCounter.task_date <= today)
+        .group_by(TaskDueCounter.company_id)
+        .subquery()
+    )
+    q = (
+        select(Company, func.coalesce(due.c.due_count, 0))
+        .outerjoin(due, due.c.company_id == Company.id)
+        .where(Company.active == True)
+    )
+    if user.role == Role.admin:
+        return q.order_by(Company.name.asc())
+    return q.join(UserCompany, (UserCompany.company_id == Company.id) & (UserCompany.user_id == user.id)).order_by(UserCompany.id.asc())
+
+# A company's data version, for list ETags and cache keys, is derived rather than kept in a counter
+# row every writer would have to lock: the company row's own version (xmin: renames, active flag)
+# plus the newest (updated_xid, updated_seq) among its tasks, one backward step on
+# ix_tasks_company_xid_seq. Tasks are never hard-deleted or moved between companies, and every task
+# write (task_group edits included, by trigger) takes a new position, so any change moves that top.
+# A transaction still in flight below the top would commit without moving it, so the snapshot's
+# in-flight xids below the top are part of the version as well.
+_IN_FLIGHT_XIDS = literal_column("ARRAY(SELECT x::text::bigint FROM pg_snapshot_xip(pg_current_snapshot()) x)")
+
+
+def _data_versions_query():
+    top = (
+        select(Task.updated_xid, Task.updated_seq)
+        .where(Task.company_id == Company.id)
+        .order_by(Task.updated_xid.desc(), Task.updated_seq.desc())
+        .limit(1)
+        .lateral("top")
+    )
+    return (
+        select(Company.id, literal_column("companies.xmin::text"), top.c.updated_xid, top.c.updated_seq, _IN_FLIGHT_XIDS)
+        .outerjoin(top, true())
+        .order_by(Company.id.asc())
+    )
+
+
+def data_version(row) -> str:
+    """Version string from a row of company_data_version(s)_query()."""
+    _, row_xmin, xid, seq, in_flight = row
+    version = f"{row_xmin}.{xid or 0}.{seq or 0}"
+    behind = sorted(x for x in in_flight if xid is not None and x < xid)
+    if behind:
+        version += "." + hashlib.sha1(repr(behind).encode()).hexdigest()[:12]
+    return version
+
+
+def company_data_version_query(company_id: int):
+    return _data_versions_query().where(Company.id == company_id)
+
+
+def company_data_version(db: Session, company_id: int) -> str:
+    return data_version(db.execute(company_data_version_query(company_id)).one())
+
+
+def company_data_versions_query(user: User | None):
+    """Versions of the companies list_companies_with_due_counts would return; every company for None."""
+    if user is None:
+        return _data_versions_query()
+    q = _data_versions_query().where(Company.active == True)
+    if user.role not in (Role.admin, Role.super_admin):
+        q = q.join(UserCompany, (UserCompany.company_id == Company.id) & (UserCompany.user_id == user.id))
+    return q
+
+
+def company_data_versions(db: Session, user: User | None) -> list[tuple[int, str]]:
+    """(company_id, data_version) pairs, see company_data_versions_query().
+
+    One index probe per company; my_companies hashes it into its ETag before running the real query.
+    """
+    return [(row[0], data_version(row)) for row in db.execute(company_data_versions_query(user)).all()]
+
 def list_tasks_for_user_company(db: Session, user_id: int, company_id: int, today, days_ahead: int = 7) -> list[Task]:
+    return db.execute(user_company_tasks_query(user_id, company_id, today, days_ahead)).scalars().all()
+
+
+def user_company_tasks_query(user_id: int, company_id: int, today, days_ahead: int = 7):
     # show tasks from today-2 through today+days_ahead
-    from datetime import timedelta
     start = today - timedelta(days=2)
     end = today + timedelta(days=days_ahead)
     q = select(Task).where(
@@ -214,13 +753,16 @@ def list_tasks_for_user_company(db: Session, user_id: int, company_id: int, toda
         Task.task_date.between(start, end),
         Task.deleted_at.is_(None),
     ).order_by(Task.task_date.asc(), Task.task_time.asc().nulls_last(), Task.category.asc(), Task.task_num.asc())
-    return db.execute(q).scalars().all()
+    return q.options(joinedload(Task.group).load_only(TaskGroup.title))
 
 
 
 def list_tasks_for_company(db: Session, company_id: int, today, days_ahead: int = 14, include_deleted: bool = False) -> list[Task]:
+    return db.execute(company_tasks_query(company_id, today, days_ahead, include_deleted)).scalars().all()
+
+
+def company_tasks_query(company_id: int, today, days_ahead: int = 14, include_deleted: bool = False):
     # show tasks from today-7 through today+days_ahead
-    from datetime import timedelta
     start = today - timedelta(days=7)
     end = today + timedelta(days=days_ahead)
     clauses = [
@@ -230,9 +772,163 @@ def list_tasks_for_company(db: Session, company_id: int, today, days_ahead: int
     if not include_deleted:
         clauses.append(Task.deleted_at.is_(None))
     q = select(Task).where(*clauses).order_by(Task.task_date.asc(), Task.task_time.asc().nulls_last(), Task.category.asc(), Task.task_num.asc())
-    return db.execute(q).scalars().all()
+    return q.options(joinedload(Task.group).load_only(TaskGroup.title))
+
+
+
+# ---- Admin task grid: filters + keyset pagination on (task_date, task_num) ----
+
+ADMIN_TASKS_LIMIT = 200
+ADMIN_TASKS_MAX_LIMIT = 1000
+
+
+def encode_task_cursor(task: Task) -> str:
+    return f"{task.task_date.isoformat()}:{task.task_num}"
+
+
+def decode_task_cursor(cursor: str) -> tuple[date, int]:
+    try:
+        d, n = cursor.split(":", 1)
+        return date.fromisoformat(d), int(n)
+    except ValueError:
+        raise ValueError("Invalid cursor")
+
+
+def admin_tasks_query(
+    *,
+    date_from: date,
+    date_to: date,
+    company_id: int | None = None,
+    assigned_user_id: int | None = None,
+    status: TaskStatus | None = None,
+    category: str | None = None,
+    deleted: bool | None = False,
+    forced: bool | None = None,
+    after: tuple[date, int] | None = None,
+    limit: int = ADMIN_TASKS_LIMIT,
+):
+    """One page of the admin grid; fetches limit + 1 rows to detect more.
+
+    One company: (task_date, task_num) ascending, on ix_tasks_company_user_date_num with an assignee,
+    ix_tasks_company_status_date_num with a status (live rows), else ix_tasks_company_date_num with the
+    other filters checked on the rows of that range. All companies: newest first, (task_date, task_num)
+    descending, a backward scan of ix_tasks_live_date_num (live view) or ix_tasks_date_num (migration 0014).
+    deleted/forced: True = only such tasks, False = exclude them, None = both.
+    """
+    clauses = [Task.task_date.between(date_from, date_to)]
+    if company_id is not None:
+        clauses.append(Task.company_id == company_id)
+    if assigned_user_id is not None:
+        clauses.append(Task.assigned_user_id == assigned_user_id)
+    if status is not None:
+        clauses.append(Task.status == status)
+    if category:
+        clauses.append(Task.category == category)
+    if deleted is not None:
+        clauses.append(Task.deleted_at.isnot(None) if deleted else Task.deleted_at.is_(None))
+    if forced is not None:
+        clauses.append(Task.forced_done_at.isnot(None) if forced else Task.forced_done_at.is_(None))
+    newest_first = company_id is None
+    if after is not None:
+        key = tuple_(Task.task_date, Task.task_num)
+        clauses.append(key < tuple_(*after) if newest_first else key > tuple_(*after))
+    order = (Task.task_date.desc(), Task.task_num.desc()) if newest_first else (Task.task_date.asc(), Task.task_num.asc())
+    return (
+        select(Task)
+        .where(*clauses)
+        .order_by(*order)
+        .limit(limit + 1)
+        .options(joinedload(Task.group).load_only(TaskGroup.title))
+    )
+
+
+def list_admin_tasks(db: Session, *, limit: int = ADMIN_TASKS_LIMIT, **filters) -> tuple[list[Task], str | None]:
+    """(page, next_cursor); next_cursor is None on the last page."""
+    limit = max(1, min(limit, ADMIN_TASKS_MAX_LIMIT))
+    tasks = list(db.execute(admin_tasks_query(limit=limit, **filters)).scalars().all())
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        return tasks, encode_task_cursor(tasks[-1])
+    return tasks, None
+
+
+# Page size for /tasks/changes; clients keep calling with the returned cursor while has_more.
+TASK_CHANGES_LIMIT = 500
+
+
+def _task_sync_scope(company_id: int, user_id: int | None, today) -> list:
+    # Same rows list_tasks_for_user_company / list_tasks_for_company return, minus the
+    # deleted_at filter (soft-deleted rows come back as tombstones).
+    if user_id is None:
+        return [Task.company_id == company_id, Task.task_date.between(today - timedelta(days=7), today + timedelta(days=14))]
+    return [
+        Task.company_id == company_id,
+        Task.assigned_user_id == user_id,
+        Task.task_date.between(today - timedelta(days=2), today + timedelta(days=7)),
+    ]
+
+
+# Delta-sync cursor "YYYY-MM-DD:xid:seq": the day the list window was computed for, then a position in
+# (updated_xid, updated_seq) order. Only changes from transactions below the snapshot xmin (all finished)
+# are handed out, so a long writer can never commit behind a cursor a client already holds.
+def snapshot_xmin_query():
+    """Oldest transaction still running as of the statement; every writer below it has finished."""
+    return select(literal_column("pg_snapshot_xmin(pg_current_snapshot())::text::bigint"))
+
+
+def encode_sync_cursor(today, xid: int, seq: int = 0) -> str:
+    return f"{today.isoformat()}:{xid}:{seq}"
+
+
+def decode_sync_cursor(cursor: str) -> tuple[date | None, int, int]:
+    """(window day, xid, seq). A bare integer is a cursor from before the window day was recorded: day None."""
+    if cursor.isdigit():
+        return None, 0, 0
+    try:
+        day, xid, seq = cursor.split(":")
+        return date.fromisoformat(day), int(xid), int(seq)
+    except ValueError:
+        raise ValueError("Invalid cursor")
 
 
+def task_sync_cursor(db: Session, today) -> str:
+    """Starting cursor for delta sync; read it before the rows it goes out with."""
+    return encode_sync_cursor(today, int(db.execute(snapshot_xmin_query()).scalar_one()))
+
+
+def list_task_changes(db: Session, company_id: int, *, since: tuple[int, int], today, user_id: int | None = None,
+                      limit: int = TASK_CHANGES_LIMIT) -> tuple[list[Task], str, bool]:
+    """Tasks in the list window changed after the (xid, seq) position `since`, oldest change first.
+
+    Returns (tasks, next_cursor, has_more). Deleted tasks are included; the caller renders them as tombstones.
+    """
+    horizon = int(db.execute(snapshot_xmin_query()).scalar_one())
+    tasks = list(db.execute(task_changes_query(company_id, since, horizon, today, user_id, limit)).scalars().all())
+    return page_task_changes(tasks, since, horizon, today, limit)
+
+
+def task_changes_query(company_id: int, since: tuple[int, int], horizon: int, today, user_id: int | None, limit: int):
+    return (
+        select(Task)
+        .where(
+            *_task_sync_scope(company_id, user_id, today),
+            tuple_(Task.updated_xid, Task.updated_seq) > tuple_(*since),
+            Task.updated_xid < horizon,
+        )
+        .order_by(Task.updated_xid.asc(), Task.updated_seq.asc())
+        .limit(limit + 1)
+        .options(joinedload(Task.group).load_only(TaskGroup.title))
+    )
+
+
+def page_task_changes(tasks: list[Task], since: tuple[int, int], horizon: int, today, limit: int) -> tuple[list[Task], str, bool]:
+    """(page, next_cursor, has_more) from up to limit + 1 rows."""
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        return tasks, encode_sync_cursor(today, tasks[-1].updated_xid, tasks[-1].updated_seq), True
+    # Everything below the horizon has been seen; continue from there (never backwards, e.g. on a lagging replica).
+    return tasks, encode_sync_cursor(today, *max((horizon, 0), tuple(since))), False
+
 
 def get_task_by_code(db: Session, task_code: str) -> Task | None:
     from app.utils import parse_task_code
@@ -244,25 +940,526 @@ def get_task_by_code(db: Session, task_code: str) -> Task | None:
 
 def soft_delete_task(db: Session, task: Task, *, actor_user: User):
     from datetime import datetime as _dt
+    if task.deleted_at is None and task.status == TaskStatus.todo:
+        _bump_task_due_counter(db, task, -1)
     task.deleted_at = _dt.utcnow()
     task.deleted_by_user_id = actor_user.id
+    queue_task_events(db, kind="deleted", company_id=task.company_id, tasks=[task])
+
+
 
+def set_task_status(db: Session, task: Task, *, done: bool):
+    """Set todo/done on `task` and keep the due counters in step."""
+    new_status = TaskStatus.done if done else TaskStatus.todo
+    if task.status != new_status and task.deleted_at is None:
+        _bump_task_due_counter(db, task, -1 if done else 1)
+    task.status = new_status
+    task.completed_at = datetime.utcnow() if done else None
+    task.status_changed_at = datetime.utcnow()
+    queue_task_events(db, kind="updated", company_id=task.company_id, tasks=[task])
 
 
 def force_done_task(db: Session, task: Task, *, actor_user: User, done: bool):
     from datetime import datetime as _dt
+    set_task_status(db, task, done=done)
     if done:
-        task.status = TaskStatus.done
-        task.completed_at = _dt.utcnow()
         task.forced_done_at = _dt.utcnow()
         task.forced_done_by_user_id = actor_user.id
     else:
-        task.status = TaskStatus.todo
-        task.completed_at = None
         task.forced_done_at = None
         task.forced_done_by_user_id = None
 
 
+# Fast path for status writes: lock + update + due counter + audit row in one statement / round trip.
+# The audit CTE is only included for AUDIT_SINK=db; otherwise the rows go through log() / log_many().
+_SET_STATUS_SQL = """
+WITH target AS (
+    SELECT t.id, t.status AS old_status, t.deleted_at
+    FROM tasks t
+    {join}
+    WHERE {where}
+    FOR UPDATE OF t
+),
+upd AS (
+    UPDATE tasks t
+    SET status = CAST(:status AS taskstatus), completed_at = :completed_at, status_changed_at = :now{forced_set}
+    FROM target
+    WHERE t.id = target.id
+    RETURNING t.id, t.task_code, t.company_id, t.assigned_user_id, t.task_date, target.old_status, target.deleted_at
+),
+counter AS (
+    INSERT INTO task_due_counters (user_id, company_id, task_date, open_count)
+    SELECT assigned_user_id, company_id, task_date, :delta
+    FROM upd
+    WHERE upd.old_status <> CAST(:status AS taskstatus) AND upd.deleted_at IS NULL
+    ON CONFLICT (user_id, company_id, task_date)
+    DO UPDATE SET open_count = task_due_counters.open_count + EXCLUDED.open_count
+){audit}
+SELECT id, task_code, company_id, assigned_user_id FROM upd
+"""
+
+_SET_STATUS_AUDIT_CTE = """,
+audit AS (
+    INSERT INTO audit_logs (timestamp, actor_user_id, action, company_id, task_id, ip_id, user_agent_id, meta)
+    SELECT :now, :actor_user_id, CAST(:action AS auditaction), company_id, id, :ip_id, :user_agent_id,
+           jsonb_build_object('task_code', task_code)::text
+    FROM upd
+)"""
+
+
+def set_task_status_fast(
+    db: Session,
+    *,
+    task_num: int,
+    done: bool,
+    actor_user_id: int,
+    ip: str,
+    user_agent: str,
+    company_slug: str | None = None,
+    assignee_id: int | None = None,
+    forced: bool = False,
+):
+    """Set a task done/todo with a single conditional UPDATE ... RETURNING.
+
+    Only matches the task when it belongs to `company_slug` and is assigned to `assignee_id`
+    (when given). Returns the (id, task_code, company_id, assigned_user_id) row, or None when
+    nothing matched; callers use task_exists() to tell 404 from 403 on that slow path.
+    `forced` is the admin override: it also stamps/clears forced_done_* and audits FORCE_DONE_TASK.
+    """
+    join = ""
+    where = ["t.task_num = :task_num"]
+    params: dict = {"task_num": task_num}
+    if company_slug is not None:
+        join = "JOIN companies c ON c.id = t.company_id"
+        where.append("c.slug = :company_slug")
+        params["company_slug"] = company_slug
+    if assignee_id is not None:
+        where.append("t.assigned_user_id = :assignee_id")
+        params["assignee_id"] = assignee_id
+
+    now = datetime.utcnow()
+    forced_set = ""
+    if forced:
+        forced_set = ", forced_done_at = :forced_done_at, forced_done_by_user_id = :forced_done_by_user_id"
+        params["forced_done_at"] = now if done else None
+        params["forced_done_by_user_id"] = actor_user_id if done else None
+        action = AuditAction.FORCE_DONE_TASK if done else AuditAction.UNFORCE_DONE_TASK
+    else:
+        action = AuditAction.COMPLETE_TASK if done else AuditAction.UNCOMPLETE_TASK
+
+    params.update(
+        status=(TaskStatus.done if done else TaskStatus.todo).value,
+        completed_at=now if done else None,
+        delta=-1 if done else 1,
+        now=now,
+    )
+    audit_cte = ""
+    if not audit.deferred(action):
+        audit_cte = _SET_STATUS_AUDIT_CTE
+        params.update(actor_user_id=actor_user_id, action=action.value, **_client_id_params(db, ip, user_agent))
+    sql = _SET_STATUS_SQL.format(join=join, where=" AND ".join(where), forced_set=forced_set, audit=audit_cte)
+    row = db.execute(text(sql), params).first()
+    if row is not None:
+        if audit_cte == "":
+            log(db, actor_user_id=actor_user_id, action=action, ip=ip, user_agent=user_agent,
+                company_id=row.company_id, task_id=row.id, meta={"task_code": row.task_code})
+        queue_task_events(db, kind="updated", company_id=row.company_id, tasks=[row])
+    return row
+
+
+# Offline flush: every item in one statement. Items are matched to the caller's own tasks and only
+# applied when their client_ts is newer than the task's last status change (last writer wins).
+_STATUS_BATCH_SQL = """
+WITH items AS (
+    SELECT * FROM unnest(
+        CAST(:idx AS integer[]), CAST(:task_nums AS integer[]), CAST(:dones AS boolean[]), CAST(:client_ts AS timestamp[])
+    ) AS i(idx, task_num, done, ts)
+),
+target AS (
+    SELECT i.idx, i.done, i.ts, t.id, t.status AS old_status, t.deleted_at
+    FROM items i
+    JOIN tasks t ON t.task_num = i.task_num
+    WHERE t.assigned_user_id = :user_id
+      AND (t.status_changed_at IS NULL OR t.status_changed_at < i.ts)
+    FOR UPDATE OF t
+),
+upd AS (
+    UPDATE tasks t
+    SET status = CASE WHEN target.done THEN CAST('done' AS taskstatus) ELSE CAST('todo' AS taskstatus) END,
+        completed_at = CASE WHEN target.done THEN target.ts END,
+        status_changed_at = target.ts
+    FROM target
+    WHERE t.id = target.id
+    RETURNING target.idx, t.id, t.task_code, t.company_id, t.assigned_user_id, t.task_date,
+              target.old_status, t.status AS new_status, target.deleted_at
+),
+counter AS (
+    INSERT INTO task_due_counters (user_id, company_id, task_date, open_count)
+    SELECT assigned_user_id, company_id, task_date, SUM(CASE WHEN new_status = 'done' THEN -1 ELSE 1 END)
+    FROM upd
+    WHERE old_status <> new_status AND deleted_at IS NULL
+    GROUP BY assigned_user_id, company_id, task_date
+    ON CONFLICT (user_id, company_id, task_date)
+    DO UPDATE SET open_count = task_due_counters.open_count + EXCLUDED.open_count
+){audit}
+SELECT idx, id, new_status, task_code, company_id, assigned_user_id FROM upd
+"""
+
+_STATUS_BATCH_AUDIT_CTE = """,
+audit AS (
+    INSERT INTO audit_logs (timestamp, actor_user_id, action, company_id, task_id, ip_id, user_agent_id, meta)
+    SELECT :now, :user_id,
+           CASE WHEN new_status = 'done' THEN CAST('COMPLETE_TASK' AS auditaction) ELSE CAST('UNCOMPLETE_TASK' AS auditaction) END,
+           company_id, id, :ip_id, :user_agent_id,
+           jsonb_build_object('task_code', task_code, 'batch', true)::text
+    FROM upd
+)"""
+
+def apply_status_batch(db: Session, *, user_id: int, items: list[tuple], ip: str, user_agent: str) -> list[dict]:
+    """Apply offline (task_code, done, client_ts) toggles for `user_id` set-based.
+
+    client_ts must be naive UTC. Returns one {"task_code", "result", "status"} per input item, where result is
+    applied | conflict (a newer change already exists) | superseded (a later item in this batch wins)
+    | not_found | forbidden.
+    """
+    now = datetime.utcnow()
+    results: list[dict] = [{"task_code": code, "result": "not_found", "status": None} for code, _, _ in items]
+
+    # Same task more than once in a batch: only its latest toggle is sent to the database.
+    latest: dict[int, int] = {}
+    nums: dict[int, int] = {}
+    for i, (code, _, ts) in enumerate(items):
+        num = parse_task_code(code)
+        if num is None:
+            continue
+        nums[i] = num
+        prev = latest.get(num)
+        if prev is None or min(ts, now) >= min(items[prev][2], now):
+            if prev is not None:
+                results[prev]["result"] = "superseded"
+            latest[num] = i
+        else:
+            results[i]["result"] = "superseded"
+
+    idx = sorted(latest.values())
+    if not idx:
+        return results
+
+    params = {
+        "idx": idx,
+        "task_nums": [nums[i] for i in idx],
+        "dones": [bool(items[i][1]) for i in idx],
+        "client_ts": [min(items[i][2], now) for i in idx],  # a fast client clock must not win forever
+        "user_id": user_id,
+    }
+    # COMPLETE_TASK and UNCOMPLETE_TASK always share a sink.
+    in_statement = not audit.deferred(AuditAction.COMPLETE_TASK)
+    if in_statement:
+        params.update(now=now, **_client_id_params(db, ip, user_agent))
+    rows = db.execute(text(_STATUS_BATCH_SQL.format(audit=_STATUS_BATCH_AUDIT_CTE if in_statement else "")), params).all()
+    if not in_statement:
+        log_many(db, [
+            dict(actor_user_id=user_id, action=AuditAction.COMPLETE_TASK if r.new_status == "done" else AuditAction.UNCOMPLETE_TASK,
+                 company_id=r.company_id, task_id=r.id, ip=ip, user_agent=user_agent, meta={"task_code": r.task_code, "batch": True})
+            for r in rows
+        ])
+    applied = {r.idx for r in rows}
+    for r in rows:
+        results[r.idx].update(result="applied", status=TaskStatus(r.new_status).value)
+    for company_id in {r.company_id for r in rows}:
+        queue_task_events(db, kind="updated", company_id=company_id, tasks=[r for r in rows if r.company_id == company_id])
+
+    # Slow path only for the items that did not apply: tell conflicts from missing/foreign tasks.
+    missed = {nums[i]: i for i in idx if i not in applied}
+    if missed:
+        q = select(Task.task_num, Task.assigned_user_id, Task.status).where(Task.task_num.in_(list(missed)))
+        for num, assignee, status in db.execute(q).all():
+            i = missed[num]
+            if assignee != user_id:
+                results[i]["result"] = "forbidden"
+            else:
+                results[i].update(result="conflict", status=status.value)
+    return results
+
+
+def task_exists(db: Session, *, task_num: int, company_slug: str) -> bool:
+    """Whether the task exists in that company (assigned or not)."""
+    q = (
+        select(Task.id)
+        .join(Company, Company.id == Task.company_id)
+        .where(Task.task_num == task_num, Company.slug == company_slug)
+    )
+    return db.execute(q).first() is not None
+
+
+# ---------------- Recurring tasks ----------------
+
+# Occurrences are materialized only into the window the list endpoints read (list_tasks_for_company).
+RECURRENCE_DAYS_BACK = 7
+RECURRENCE_DAYS_AHEAD = 14
+
+
+def recurrence_window(today) -> tuple:
+    return today - timedelta(days=RECURRENCE_DAYS_BACK), today + timedelta(days=RECURRENCE_DAYS_AHEAD)
+
+
+def _recurrence_targets(rec: TaskRecurrence, start, end) -> set[tuple]:
+    """(task_date, user_id) pairs the series should have between start and end."""
+    if not rec.active:
+        return set()
+    dates = occurrences(parse_rule(rec.rule), rec.dtstart, start, end)
+    return {(d, a.user_id) for d in dates for a in rec.assignees}
+
+
+def create_recurrence(
+    db: Session,
+    *,
+    company: Company,
+    rule: str,
+    dtstart,
+    task_time,
+    assignee_ids: list[int],
+    category: str,
+    title: str,
+    maps_url: str,
+    patient_id: int | None,
+    patient_name: str,
+    patient_address: str,
+    patient_phone: str,
+    bonus_details: str,
+    actor_user: User,
+    ip: str,
+    user_agent: str,
+    today,
+) -> TaskRecurrence:
+    parse_rule(rule)  # raises ValueError on an unsupported rule
+    template = resolve_task_template(
+        db,
+        company=company,
+        assignee_ids=assignee_ids,
+        category=category,
+        title=title,
+        maps_url=maps_url,
+        patient_id=patient_id,
+        patient_name=patient_name,
+        patient_address=patient_address,
+        patient_phone=patient_phone,
+        bonus_details=bonus_details,
+    )
+    rec = TaskRecurrence(company_id=company.id, rule=rule.strip(), dtstart=dtstart, task_time=task_time,
+                         created_by_user_id=actor_user.id, active=True, **template)
+    rec.assignees = [TaskRecurrenceAssignee(user_id=uid) for uid in dict.fromkeys(assignee_ids)]
+    db.add(rec)
+    db.flush()
+    lock_recurrences(db)
+    materialize_recurrence(db, rec, today=today, actor_user_id=actor_user.id, ip=ip, user_agent=user_agent)
+    return rec
+
+
+# Serializes materialization: the scheduler try-locks it per run, series edits wait for it.
+_RECURRENCE_LOCK_KEY = "hashtext('taskflow:recurrences')"
+
+
+def lock_recurrences(db: Session) -> None:
+    """Wait for any running materialization, then hold it off until this transaction ends."""
+    db.execute(text(f"select pg_advisory_xact_lock({_RECURRENCE_LOCK_KEY})"))
+
+
+def materialize_recurrence(db: Session, rec: TaskRecurrence, *, today, start=None, revive: set | frozenset = frozenset(),
+                           actor_user_id: int | None = None, ip: str = "", user_agent: str = "") -> list[Task]:
+    """Create the series' missing occurrences inside the window. Idempotent. Callers hold lock_recurrences().
+
+    Occurrences that already exist in the window are left alone, soft-deleted ones included (that single
+    occurrence was deleted), except the (task_date, user_id) pairs in `revive`: those tombstones come back
+    as open tasks with the series' current template. Returns the created and revived tasks.
+    """
+    win_start, end = recurrence_window(today)
+    start = start or win_start
+    targets = _recurrence_targets(rec, start, end)
+    rows = db.execute(
+        select(Task.id, Task.task_date, Task.assigned_user_id, Task.deleted_at)
+        .where(Task.recurrence_id == rec.id, Task.task_date.between(start, end))
+    ).all()
+    revived = _revive_occurrences(
+        db, rec, [r.id for r in rows if r.deleted_at is not None and (r.task_date, r.assigned_user_id) in targets & set(revive)],
+        actor_user_id=actor_user_id, ip=ip, user_agent=user_agent,
+    )
+    missing = sorted(targets - {(r.task_date, r.assigned_user_id) for r in rows})
+    if not missing:
+        rec.materialized_through = end
+        return revived
+
+    # One TaskGroup per occurrence date, shared by that date's assignees.
+    groups = dict(db.execute(
+        select(Task.task_date, func.min(Task.group_id))
+        .where(Task.recurrence_id == rec.id, Task.task_date.in_({d for d, _ in missing}))
+        .group_by(Task.task_date)
+    ).all())
+    new_dates = sorted({d for d, _ in missing} - set(groups))
+    if new_dates:
+        group_row = {f: getattr(rec, f) for f in TASK_GROUP_FIELDS}
+        ids = db.scalars(
+            insert(TaskGroup).returning(TaskGroup.id, sort_by_parameter_order=True),
+            [{"company_id": rec.company_id, **group_row} for _ in new_dates],
+        ).all()
+        groups.update(zip(new_dates, ids))
+
+    created = _insert_tasks(db, company_id=rec.company_id, category=rec.category,
+                            rows=[(d, rec.task_time, uid, groups[d]) for d, uid in missing],
+                            actor_user_id=actor_user_id, ip=ip, user_agent=user_agent, recurrence_id=rec.id)
+    rec.materialized_through = end
+    return created + revived
+
+
+def _revive_occurrences(db: Session, rec: TaskRecurrence, task_ids: list[int], *,
+                        actor_user_id: int | None, ip: str, user_agent: str) -> list[Task]:
+    """Undelete the series' tombstoned occurrences `task_ids` as open tasks carrying the current template."""
+    if not task_ids:
+        return []
+    revived = db.scalars(
+        update(Task).where(Task.id.in_(task_ids))
+        .values(deleted_at=None, deleted_by_user_id=None, status=TaskStatus.todo, completed_at=None,
+                status_changed_at=datetime.utcnow(), task_time=rec.task_time, category=rec.category)
+        .returning(Task)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    ).all()
+    db.execute(
+        update(TaskGroup).where(TaskGroup.id.in_({t.group_id for t in revived}))
+        .values(**{f: getattr(rec, f) for f in TASK_GROUP_FIELDS})
+        .execution_options(synchronize_session=False)
+    )
+    log_many(db, [
+        dict(actor_user_id=actor_user_id, action=AuditAction.CREATE_TASK, target_user_id=t.assigned_user_id,
+             company_id=rec.company_id, task_id=t.id, ip=ip, user_agent=user_agent,
+             meta={"task_code": t.task_code, "recurrence_id": rec.id, "revived": True})
+        for t in revived
+    ])
+    deltas: dict[tuple[int, int, object], int] = {}
+    for t in revived:
+        key = (t.assigned_user_id, rec.company_id, t.task_date)
+        deltas[key] = deltas.get(key, 0) + 1
+    bump_due_counters(db, deltas)
+    queue_task_events(db, kind="created", company_id=rec.company_id, tasks=revived)
+    return revived
+
+
+def update_recurrence(db: Session, rec: TaskRecurrence, *, changes: dict, assignee_ids: list[int] | None,
+                      actor_user: User, ip: str, user_agent: str, today) -> None:
+    """Edit a series and rewrite only its materialized, still-open occurrences from today on.
+
+    `changes` may hold rule, dtstart, task_time, active and any TASK_TEMPLATE_FIELDS.
+    Past occurrences keep their snapshot; the shared payload is rewritten per occurrence date
+    (one TaskGroup each), so it also applies to same-day occurrences already marked done.
+    """
+    if "rule" in changes:
+        parse_rule(changes["rule"])
+        changes["rule"] = changes["rule"].strip()
+
+    lock_recurrences(db)
+    _, end = recurrence_window(today)
+    # Pairs this edit adds (new assignee, new dates, reactivation): their earlier tombstones are revived.
+    old_targets = _recurrence_targets(rec, today, end)
+
+    template_keys = set(TASK_TEMPLATE_FIELDS) & set(changes)
+    if template_keys or assignee_ids is not None:
+        merged = {f: changes.get(f, getattr(rec, f)) for f in TASK_TEMPLATE_FIELDS}
+        if "patient_id" in changes and changes["patient_id"] is not None:
+            # Re-snapshot the new patient rather than keeping the old patient's details.
+            for f in ("patient_name", "patient_address", "patient_phone", "maps_url"):
+                merged[f] = changes.get(f, "")
+        merged = resolve_task_template(
+            db,
+            company=rec.company,
+            assignee_ids=assignee_ids if assignee_ids is not None else [a.user_id for a in rec.assignees],
+            **merged,
+        )
+        changes = {**changes, **merged}
+
+    for k, v in changes.items():
+        setattr(rec, k, v)
+    if assignee_ids is not None:
+        rec.assignees = [TaskRecurrenceAssignee(recurrence_id=rec.id, user_id=uid) for uid in dict.fromkeys(assignee_ids)]
+    db.flush()
+
+    open_rows = (
+        Task.recurrence_id == rec.id,
+        Task.task_date >= today,
+        Task.task_date <= end,
+        Task.deleted_at.is_(None),
+        Task.status == TaskStatus.todo,
+    )
+
+    # 1) Rewrite the template: per-task columns on the open occurrences, the shared payload on their groups.
+    db.execute(
+        update(Task).where(*open_rows).values(task_time=rec.task_time, category=rec.category)
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        update(TaskGroup).where(TaskGroup.id.in_(select(Task.group_id).where(*open_rows)))
+        .values(**{f: getattr(rec, f) for f in TASK_GROUP_FIELDS})
+        .execution_options(synchronize_session=False)
+    )
+
+    # 2) Retire occurrences the new rule/assignees no longer produce.
+    targets = _recurrence_targets(rec, today, end)
+    rows = db.execute(select(Task.id, Task.task_code, Task.task_date, Task.assigned_user_id).where(*open_rows)).all()
+    stale = [r for r in rows if (r.task_date, r.assigned_user_id) not in targets]
+    if template_keys or {"task_time", "category"} & set(changes):
+        queue_task_events(db, kind="updated", company_id=rec.company_id,
+                          tasks=[r for r in rows if (r.task_date, r.assigned_user_id) in targets])
+    if stale:
+        db.execute(
+            update(Task).where(Task.id.in_([r.id for r in stale]))
+            .values(deleted_at=datetime.utcnow(), deleted_by_user_id=actor_user.id)
+            .execution_options(synchronize_session=False)
+        )
+        deltas: dict[tuple[int, int, object], int] = {}
+        for r in stale:
+            key = (r.assigned_user_id, rec.company_id, r.task_date)
+            deltas[key] = deltas.get(key, 0) - 1
+        bump_due_counters(db, deltas)
+        log_many(db, [
+            dict(actor_user_id=actor_user.id, action=AuditAction.DELETE_TASK, company_id=rec.company_id, task_id=r.id,
+                 ip=ip, user_agent=user_agent, meta={"task_code": r.task_code, "recurrence_id": rec.id})
+            for r in stale
+        ])
+        queue_task_events(db, kind="deleted", company_id=rec.company_id, tasks=stale)
+
+    # 3) Add occurrences the new rule/assignees produce.
+    materialize_recurrence(db, rec, today=today, start=today, revive=targets - old_targets,
+                           actor_user_id=actor_user.id, ip=ip, user_agent=user_agent)
+
+
+def list_recurrences(db: Session, company_id: int) -> list[TaskRecurrence]:
+    q = (
+        select(TaskRecurrence)
+        .where(TaskRecurrence.company_id == company_id)
+        .options(selectinload(TaskRecurrence.assignees))
+        .order_by(TaskRecurrence.id.asc())
+    )
+    return db.execute(q).scalars().all()
+
+
+def materialize_due_recurrences(db: Session, today) -> int:
+    """Roll every active series' window forward. Safe to run repeatedly and from several workers."""
+    # Only one runner at a time; the others return immediately.
+    if not db.execute(text(f"select pg_try_advisory_xact_lock({_RECURRENCE_LOCK_KEY})")).scalar_one():
+        return 0
+    _, end = recurrence_window(today)
+    q = (
+        select(TaskRecurrence)
+        .where(
+            TaskRecurrence.active == True,
+            (TaskRecurrence.materialized_through.is_(None)) | (TaskRecurrence.materialized_through < end),
+        )
+        .options(selectinload(TaskRecurrence.assignees))
+    )
+    created = 0
+    for rec in db.execute(q).scalars().all():
+        created += len(materialize_recurrence(db, rec, today=today))
+    return created
+
+
 # ---------------- Admin: categories ----------------
 
 def list_categories(db: Session, company_id: int) -> list[TaskCategory]:
@@ -273,11 +1470,13 @@ def list_categories(db: Session, company_id: int) -> list[TaskCategory]:
 def create_category(db: Session, *, company: Company, name: str, sort_order: int = 0) -> TaskCategory:
     c = TaskCategory(company_id=company.id, name=name.strip(), sort_order=sort_order)
     db.add(c)
+    metacache.invalidate(db, "categories", company.id)
     return c
 
 
 def set_category_active(db: Session, *, category: TaskCategory, active: bool):
     category.active = active
+    metacache.invalidate(db, "categories", category.company_id)
 
 
 # ---------------- Admin: patients ----------------
@@ -0,0 +1,49 @@
+"""AsyncSession versions of the hot read paths in app.crud.
+
+Same statements (the crud.*_query builders), awaited on the async engine. Writes stay in app.crud:
+their after-commit hooks (events, cache invalidation, principal revocation) are sync.
+"""
+from __future__ import annotations
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.models import Company, Task, User
+
+
+async def list_companies_with_due_counts(db: AsyncSession, user: User, today) -> list[tuple[Company, int]]:
+    rows = (await db.execute(crud.companies_with_due_counts_query(user, today))).all()
+    return [(c, int(cnt)) for c, cnt in rows]
+
+
+async def company_data_version(db: AsyncSession, company_id: int) -> str:
+    return crud.data_version((await db.execute(crud.company_data_version_query(company_id))).one())
+
+
+async def company_data_versions(db: AsyncSession, user: User) -> list[tuple[int, str]]:
+    return [(row[0], crud.data_version(row)) for row in (await db.execute(crud.company_data_versions_query(user))).all()]
+
+
+async def list_tasks_for_user_company(db: AsyncSession, user_id: int, company_id: int, today, days_ahead: int = 7) -> list[Task]:
+    return (await db.execute(crud.user_company_tasks_query(user_id, company_id, today, days_ahead))).scalars().all()
+
+
+async def list_tasks_for_company(db: AsyncSession, company_id: int, today, days_ahead: int = 14, include_deleted: bool = False) -> list[Task]:
+    return (await db.execute(crud.company_tasks_query(company_id, today, days_ahead, include_deleted))).scalars().all()
+
+
+async def task_sync_cursor(db: AsyncSession, today) -> str:
+    return crud.encode_sync_cursor(today, int((await db.execute(crud.snapshot_xmin_query())).scalar_one()))
+
+
+async def list_task_changes(db: AsyncSession, company_id: int, *, since: tuple[int, int], today, user_id: int | None = None,
+                            limit: int = crud.TASK_CHANGES_LIMIT) -> tuple[list[Task], str, bool]:
+    horizon = int((await db.execute(crud.snapshot_xmin_query())).scalar_one())
+    tasks = list((await db.execute(crud.task_changes_query(company_id, since, horizon, today, user_id, limit))).scalars().all())
+    return crud.page_task_changes(tasks, since, horizon, today, limit)
+
+
+async def get_task_by_num(db: AsyncSession, task_num: int) -> Task | None:
+    # Task.group is lazy="joined", so the shared payload comes back in the same query.
+    return (await db.execute(select(Task).where(Task.task_num == task_num))).scalar_one_or_none()
@@ -0,0 +1,88 @@
+"""Connection pool settings and checkout instrumentation for the engines in app.db.session."""
+from __future__ import annotations
+
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.settings import settings
+
+# Checkouts that waited longer than this count as "slow" in pool_stats().
+SLOW_CHECKOUT_SECONDS = 0.05
+
+_lock = threading.Lock()
+
+
+class _TimedCheckout:
+    """Pool mixin that records how long each checkout waited (including opening a new connection)."""
+
+    checkouts = timeouts = slow_checkouts = 0
+    wait_total = wait_max = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with _lock:
+                self.checkouts += 1
+                self.timeouts += timed_out
+                self.slow_checkouts += waited > SLOW_CHECKOUT_SECONDS
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(*, is_async: bool = False) -> dict:
+    """create_engine()/create_async_engine() keyword arguments from the DB_POOL_* / DB_PGBOUNCER settings."""
+    opts = {
+        "poolclass": TimedAsyncQueuePool if is_async else TimedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+    if settings.db_pgbouncer:
+        # Transaction pooling hands each transaction to an arbitrary server connection, so statements
+        # psycopg prepared on one server connection don't exist on the next. Never prepare.
+        opts["connect_args"] = {"prepare_threshold": None}
+    return opts
+
+
+def pool_stats(pool) -> dict:
+    """Occupancy and checkout-wait figures for one engine's pool (this worker only).
+
+    Every engine is built from engine_options(), so the overflow limit is the configured one.
+    """
+    max_overflow = settings.db_max_overflow
+    capacity = pool.size() + max_overflow if max_overflow >= 0 else None
+    checked_out = pool.checkedout()
+    n = getattr(pool, "checkouts", 0)
+    return {
+        "size": pool.size(),
+        "max_overflow": max_overflow,
+        "checked_out": checked_out,
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "saturation": round(checked_out / capacity, 4) if capacity else None,
+        "checkouts": n,
+        "wait_avg_ms": round(1000 * pool.wait_total / n, 3) if n else None,
+        "wait_max_ms": round(1000 * pool.wait_max, 3) if n else None,
+        "slow_checkouts": getattr(pool, "slow_checkouts", 0),
+        "timeouts": getattr(pool, "timeouts", 0),
+    }
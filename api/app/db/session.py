@@ -1,16 +1,41 @@
 from __future__ import annotations
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
+from app.db.pool import engine_options, pool_stats
 from app.settings import settings
 
-engine = create_engine(settings.database_url, pool_pre_ping=True)
+engine = create_engine(settings.database_url, **engine_options())
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+# Async engine for the `async def` endpoints (same URL; SQLAlchemy picks psycopg's async driver).
+# Its pool is separate from the sync engine's.
+async_engine = create_async_engine(settings.database_url, **engine_options(is_async=True))
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# Optional read replica; app.replica decides per request whether a read may use it.
+replica_engine = create_engine(settings.database_replica_url, **engine_options()) if settings.database_replica_url else None
+ReplicaSessionLocal = sessionmaker(bind=replica_engine, autoflush=False, autocommit=False)
+async_replica_engine = create_async_engine(settings.database_replica_url, **engine_options(is_async=True)) if settings.database_replica_url else None
+AsyncReplicaSessionLocal = async_sessionmaker(bind=async_replica_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    db = AsyncSessionLocal()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+def pool_report() -> dict:
+    """pool_stats() for every configured engine, for /api/stats/db."""
+    engines = {"primary": engine, "primary_async": async_engine, "replica": replica_engine, "replica_async": async_replica_engine}
+    return {name: pool_stats(e.pool) for name, e in engines.items() if e is not None}
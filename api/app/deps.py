@@ -3,12 +3,29 @@ from __future__ import annotations
 from fastapi import Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app import replica
+from app.db.session import AsyncReplicaSessionLocal, AsyncSessionLocal, ReplicaSessionLocal, SessionLocal, get_db
 from app.security import decode_token
 from app.models import User, Role
+from app.principals import Principal, principal_for_token
 
 COOKIE_NAME = "taskflow_session"
 
+def get_read_db(request: Request):
+    """Session for read-only endpoints: the replica when app.replica allows it, else the primary."""
+    db = (ReplicaSessionLocal if replica.use_replica(request) else SessionLocal)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db(request: Request):
+    db = (AsyncReplicaSessionLocal if replica.use_replica(request) else AsyncSessionLocal)()
+    try:
+        yield db
+    finally:
+        await db.close()
+
 def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
     token = request.cookies.get(COOKIE_NAME)
     if not token:
@@ -22,6 +39,24 @@ def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
         raise HTTPException(status_code=401, detail="Not authenticated")
     return user
 
+def get_principal(request: Request, db: Session = Depends(get_db)) -> Principal:
+    """Like get_current_user, but served from the principal cache (no users-table read on a hit).
+
+    For endpoints that only need the caller's id/role; anything that modifies the user uses get_current_user.
+    """
+    token = request.cookies.get(COOKIE_NAME)
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    principal = principal_for_token(db, token)
+    if not principal:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return principal
+
+def require_admin_principal(principal: Principal = Depends(get_principal)) -> Principal:
+    if principal.role not in (Role.admin, Role.super_admin):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    return principal
+
 def require_admin(user: User = Depends(get_current_user)) -> User:
     if user.role not in (Role.admin, Role.super_admin):
         raise HTTPException(status_code=403, detail="Forbidden")
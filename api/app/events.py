@@ -0,0 +1,113 @@
+"""Live task events: queued on the DB session, published to Redis after commit, streamed over SSE.
+
+Writers call queue_task_events(db, ...) next to their INSERT/UPDATE. Nothing is published until the
+transaction commits (and nothing at all on rollback); then each company's events go out as one
+message on `{events_channel}:{company_id}`.
+
+Each API worker holds a single Redis pub/sub connection (EventBroker) and fans messages out to
+in-process queues, so an idle /api/events stream costs one asyncio.Queue, not a Redis connection.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+from collections import defaultdict
+
+import redis.asyncio as aioredis
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.redis_client import get_redis
+from app.settings import settings
+
+_PENDING_KEY = "pending_task_events"
+
+
+def queue_task_events(db: Session, *, kind: str, company_id: int, tasks) -> None:
+    """Queue one event per task for publishing after commit.
+
+    kind: created | updated | deleted. `tasks` yields objects (Task rows or result rows) with
+    task_code and assigned_user_id.
+    """
+    pending = db.info.setdefault(_PENDING_KEY, defaultdict(list))
+    pending[company_id].extend({"type": kind, "task_code": t.task_code, "user_id": t.assigned_user_id} for t in tasks)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(db: Session):
+    pending = db.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for company_id, events in pending.items():
+            pipe.publish(f"{settings.events_channel}:{company_id}", json.dumps({"company_id": company_id, "events": events}))
+        pipe.execute()
+    except Exception:
+        # Live updates are best effort; clients resync through /tasks/changes.
+        pass
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_after_rollback(db: Session):
+    db.info.pop(_PENDING_KEY, None)
+
+
+class EventBroker:
+    """Per-process fan-out of the Redis events channel to SSE subscribers."""
+
+    def __init__(self):
+        self._subscribers: dict[asyncio.Queue, set[int] | None] = {}
+        self._task: asyncio.Task | None = None
+
+    def subscribe(self, company_ids: set[int] | None) -> asyncio.Queue:
+        """Register a subscriber for `company_ids` (None = every company)."""
+        q: asyncio.Queue = asyncio.Queue(maxsize=settings.events_queue_size)
+        self._subscribers[q] = company_ids
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return q
+
+    def unsubscribe(self, q: asyncio.Queue) -> None:
+        self._subscribers.pop(q, None)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    async def _run(self):
+        while True:
+            client = aioredis.Redis.from_url(settings.redis_url, decode_responses=True)
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.psubscribe(f"{settings.events_channel}:*")
+                async for msg in pubsub.listen():
+                    if msg.get("type") == "pmessage":
+                        self._dispatch(msg["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                await asyncio.sleep(1)  # Redis restart/network blip: reconnect
+            finally:
+                await pubsub.aclose()
+                await client.aclose()
+
+    def _dispatch(self, raw: str):
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            return
+        cid = data.get("company_id")
+        for q, companies in list(self._subscribers.items()):
+            if companies is not None and cid not in companies:
+                continue
+            try:
+                q.put_nowait(data)
+            except asyncio.QueueFull:
+                # Slow client: drop its backlog and tell it to resync through /tasks/changes.
+                while not q.empty():
+                    q.get_nowait()
+                q.put_nowait({"company_id": cid, "resync": True, "events": []})
+
+
+broker = EventBroker()
@@ -0,0 +1,47 @@
+"""Bounded executor for argon2 password hashing.
+
+argon2 is deliberately slow (tens of ms and a chunk of memory per call). Running it directly in
+request handlers lets a login burst occupy the AnyIO threadpool that every other sync endpoint
+shares. Instead it runs on its own small thread pool (argon2-cffi releases the GIL, so threads use
+real cores) and callers await it from async endpoints, so a waiting hash holds no thread at all.
+At most HASH_WORKERS + HASH_QUEUE_LIMIT calls are admitted at once; anything beyond that fails
+fast with HashingBusy, which the API turns into a 503 with Retry-After.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.settings import settings
+
+
+class HashingBusy(RuntimeError):
+    """The hashing pool and its queue are full."""
+
+
+_workers = settings.hash_workers or (os.cpu_count() or 2)
+_executor = ThreadPoolExecutor(max_workers=_workers, thread_name_prefix="argon2")
+_slots = threading.BoundedSemaphore(_workers + settings.hash_queue_limit)
+
+
+async def run(fn, *args):
+    """Run fn(*args) on the hashing pool and await it; HashingBusy when saturated."""
+    if not _slots.acquire(blocking=False):
+        raise HashingBusy("Password hashing is saturated; retry shortly")
+    try:
+        return await asyncio.wrap_future(_executor.submit(fn, *args))
+    finally:
+        _slots.release()
+
+
+async def map_parallel(fn, items: list) -> list:
+    """fn over items for bulk admin jobs, on a temporary pool of the same size.
+
+    Kept off the shared pool so a few hundred queued hashes can't push logins into HashingBusy.
+    """
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=min(_workers, len(items)), thread_name_prefix="argon2-bulk") as ex:
+        return list(await asyncio.gather(*(asyncio.wrap_future(ex.submit(fn, x)) for x in items)))
@@ -1,25 +1,44 @@
 from __future__ import annotations
 
-from datetime import date, datetime
+from datetime import date, datetime, timezone
 import os
 
+import csv
+import io
 import json
+import hashlib
+import re
 import redis as redis_lib
 
+import asyncio
 from fastapi import FastAPI, Depends, HTTPException, Response, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from pydantic import TypeAdapter, ValidationError
 
 from app.settings import settings
-from app.db.session import get_db
-from app.deps import get_current_user, require_admin, require_super_admin, COOKIE_NAME
-from app.security import verify_password, create_token, client_ip, hash_password
+from app.db.session import AsyncSessionLocal, get_db, pool_report
+from app.deps import get_async_read_db, get_read_db, get_current_user, get_principal, require_admin, require_admin_principal, require_super_admin, COOKIE_NAME
+from app.security import verify_password, create_token, client_ip, peer_ip, hash_password, hash_passwords, random_temp_password
 from app import schemas
 from app import crud
-from app.models import User, Company, UserCompany, Task, TaskStatus, Role, AuditLog, AuditAction, TaskCategory, Patient
+from app import crud_async
+from app import cache
+from app import metacache
+from app.models import User, Company, UserCompany, Task, TaskStatus, Role, AuditLog, AuditAction, TaskCategory, Patient, TaskRecurrence, TaskGroup
 from app.utils import parse_task_code
 from app.bootstrap import bootstrap_superadmin
+from app.events import broker
+from app import principals
+from app import throttle
+from app import audit
+from app import replica
+from app.hashing import HashingBusy
+from app.principals import Principal, revoke as revoke_principal
 
 app = FastAPI(title="TaskFlow API", version="0.1.0")
 
@@ -67,8 +86,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Tasks-Cursor", "X-Next-Cursor"],
 )
 
+@app.middleware("http")
+async def _sticky_primary(request: Request, call_next):
+    response = await call_next(request)
+    # Read-your-writes: after a successful write, this client's reads skip the replica for a while.
+    if replica.configured() and request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        replica.mark_write(response)
+    return response
+
+@app.exception_handler(HashingBusy)
+def _hashing_busy(request: Request, exc: HashingBusy):
+    # Password hashing pool saturated (login burst): shed load instead of queueing in the shared threadpool.
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "2"})
+
 @app.on_event("startup")
 def _startup():
     # Create bootstrap superadmin if none exists
@@ -78,6 +111,15 @@ def _startup():
         bootstrap_superadmin(db, username=settings.bootstrap_root_username, write_path=settings.bootstrap_write_path)
     finally:
         db.close()
+    metacache.start_listener()
+    replica.start_monitor()
+
+@app.on_event("shutdown")
+async def _shutdown():
+    from app.db.session import async_engine, async_replica_engine
+    await async_engine.dispose()
+    if async_replica_engine is not None:
+        await async_replica_engine.dispose()
 
 @app.get("/api/health")
 def health():
@@ -95,19 +137,48 @@ def set_cookie(response: Response, token: str):
         path="/",
     )
 
+def _etag(*parts) -> str:
+    return 'W/"' + hashlib.sha1(repr(parts).encode()).hexdigest()[:20] + '"'
+
+def _not_modified(request: Request, response: Response, etag: str) -> bool:
+    """Set the ETag on `response`; True when the client's If-None-Match already has it (send a 304)."""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    inm = request.headers.get("if-none-match", "")
+    return etag in [t.strip() for t in inm.split(",")] or inm.strip() == "*"
+
+def _304(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
 def clear_cookie(response: Response):
     response.delete_cookie(COOKIE_NAME, path="/", domain=settings.cookie_domain or None)
 
 @app.post("/api/auth/login", response_model=schemas.LoginOut)
-def login(payload: schemas.LoginIn, request: Request, response: Response, db: Session = Depends(get_db)):
-    user = db.execute(select(User).where(User.username == payload.username)).scalar_one_or_none()
-    if not user or user.disabled or not verify_password(payload.password, user.password_hash):
+async def login(payload: schemas.LoginIn, request: Request, response: Response, db: Session = Depends(get_db)):
+    ip = client_ip(request)
+    # Throttle on the proxy-observed address: the first X-Forwarded-For entry is client-supplied.
+    peer = peer_ip(request)
+
+    def lookup() -> User | None:
+        retry_after = throttle.login_retry_after(peer, payload.username)
+        if retry_after is not None:
+            raise HTTPException(status_code=429, detail="Too many failed logins; try again later", headers={"Retry-After": str(retry_after)})
+        return db.execute(select(User).where(User.username == payload.username)).scalar_one_or_none()
+
+    def finish() -> None:
+        throttle.clear_login_failures(payload.username)
+        user.last_login_at = datetime.utcnow()
+        crud.log(db, actor_user_id=user.id, action=AuditAction.LOGIN, ip=ip, user_agent=request.headers.get("user-agent",""))
+        db.commit()
+
+    # Redis and the sync session go through the threadpool; the argon2 verify is awaited on the
+    # hashing pool, so a burst of logins holds no AnyIO threads while it hashes.
+    user = await run_in_threadpool(lookup)
+    if not user or user.disabled or not await verify_password(payload.password, user.password_hash):
+        await run_in_threadpool(throttle.record_login_failure, peer, payload.username)
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    token = create_token(user.id, user.role.value)
-    set_cookie(response, token)
-    user.last_login_at = datetime.utcnow()
-    crud.log(db, actor_user_id=user.id, action=AuditAction.LOGIN, ip=client_ip(request), user_agent=request.headers.get("user-agent",""))
-    db.commit()
+    await run_in_threadpool(finish)
+    set_cookie(response, create_token(user.id, user.role.value))
     return {"ok": True}
 
 @app.post("/api/auth/logout", response_model=schemas.LoginOut)
@@ -118,7 +189,7 @@ def logout(request: Request, response: Response, user: User = Depends(get_curren
     return {"ok": True}
 
 @app.get("/api/me", response_model=schemas.MeOut)
-def me(user: User = Depends(get_current_user)):
+def me(user: Principal = Depends(get_principal)):
     return schemas.MeOut(
         id=user.id,
         username=user.username,
@@ -129,10 +200,82 @@ def me(user: User = Depends(get_current_user)):
     )
 
 
+# ---------------- Live task events (SSE) ----------------
+
+@app.get("/api/events")
+async def task_events(request: Request, user: Principal = Depends(get_principal)):
+    """Server-Sent Events stream of task changes in the caller's companies.
+
+    Each `tasks` event carries {company, events: [{type, task_code}]} (type: created | updated | deleted);
+    employees only see their own tasks. `resync: true` means events were dropped and the client should
+    re-read /tasks/changes. No PHI: clients fetch details through the normal endpoints.
+
+    An employee's memberships are re-checked on every message and keep-alive (from metacache, which
+    every worker drops on a membership change); when they differ from the subscription, the stream
+    ends and EventSource reconnects with the new set.
+    """
+    admin = user.role in (Role.admin, Role.super_admin)
+
+    # Short-lived sessions: nothing holds a pooled connection for the life of the stream, and a
+    # membership check served from the cache never connects at all.
+    async def company_slugs() -> dict[int, str]:
+        async with AsyncSessionLocal() as adb:
+            if admin:
+                return dict((await adb.execute(select(Company.id, Company.slug))).all())
+            return dict((await adb.execute(
+                select(Company.id, Company.slug).join(UserCompany, UserCompany.company_id == Company.id).where(UserCompany.user_id == user.id)
+            )).all())
+
+    async def memberships() -> frozenset[int]:
+        async with AsyncSessionLocal() as adb:
+            return await metacache.user_company_ids_async(adb, user.id)
+
+    slugs = await company_slugs()
+    company_ids, user_id = (None, None) if admin else (frozenset(slugs), user.id)
+
+    async def stream():
+        nonlocal slugs
+        q = broker.subscribe(company_ids)
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    data = await asyncio.wait_for(q.get(), timeout=settings.events_keepalive_seconds)
+                except asyncio.TimeoutError:
+                    data = None
+                if company_ids is not None and await memberships() != company_ids:
+                    return
+                if data is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                if data["company_id"] not in slugs:  # a company created since the stream opened (admins)
+                    slugs = await company_slugs()
+                events = data["events"]
+                if user_id is not None:
+                    events = [e for e in events if e["user_id"] == user_id]
+                if not events and not data.get("resync"):
+                    continue
+                out = {
+                    "company": slugs.get(data["company_id"]),
+                    "resync": bool(data.get("resync")),
+                    "events": [{"type": e["type"], "task_code": e["task_code"]} for e in events],
+                }
+                yield f"event: tasks\ndata: {json.dumps(out)}\n\n"
+        finally:
+            broker.unsubscribe(q)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        # X-Accel-Buffering: stop nginx from buffering this response (other /api/ routes keep buffering).
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # ---------------- Web Push (browser push notifications) ----------------
 
 @app.get("/api/push/public_key", response_model=schemas.PushPublicKeyOut)
-def push_public_key(user: User = Depends(get_current_user)):
+def push_public_key(user: Principal = Depends(get_principal)):
     # Safe to expose public key to authenticated clients.
     return {"public_key": settings.vapid_public_key or ""}
 
@@ -188,63 +331,105 @@ def push_test(request: Request, user: User = Depends(get_current_user), db: Sess
 
 
 @app.post("/api/auth/change_password")
-def change_password(payload: schemas.ChangePasswordIn, request: Request, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def change_password(payload: schemas.ChangePasswordIn, request: Request, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     # super_admin password changes are DB-only in this MVP.
     if user.role == Role.super_admin:
         raise HTTPException(status_code=403, detail="Forbidden")
-    user.password_hash = hash_password(payload.new_password)
-    user.must_change_password = False
-    crud.log(db, actor_user_id=user.id, action=AuditAction.CHANGE_PASSWORD, ip=client_ip(request), user_agent=request.headers.get("user-agent",""))
-    db.commit()
+    password_hash = await hash_password(payload.new_password)
+
+    def save() -> None:
+        user.password_hash = password_hash
+        user.must_change_password = False
+        revoke_principal(db, user.id)
+        crud.log(db, actor_user_id=user.id, action=AuditAction.CHANGE_PASSWORD, ip=client_ip(request), user_agent=request.headers.get("user-agent",""))
+        db.commit()
+
+    await run_in_threadpool(save)
     return {"ok": True}
 
 # Employee: companies list with attention
 @app.get("/api/companies", response_model=list[schemas.CompanyOut])
-def my_companies(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    if user.role in (Role.admin, Role.super_admin):
-        comps = db.execute(select(Company).where(Company.active == True).order_by(Company.name.asc())).scalars().all()
-        out = []
-        today = date.today()
-        for c in comps:
-            cnt = crud.tasks_due_count_for_user_company(db, user.id, c.id, today) if user.role == Role.admin else 0
-            out.append(schemas.CompanyOut(slug=c.slug, name=c.name, has_attention=cnt > 0, due_count=cnt))
-        return out
-
+async def my_companies(request: Request, response: Response, user: Principal = Depends(get_principal), adb: AsyncSession = Depends(get_async_read_db)):
     today = date.today()
-    links = db.execute(select(UserCompany).where(UserCompany.user_id == user.id)).scalars().all()
-    out = []
-    for uc in links:
-        c = db.get(Company, uc.company_id)
-        if not c or not c.active:
-            continue
-        cnt = crud.tasks_due_count_for_user_company(db, user.id, c.id, today)
-        out.append(schemas.CompanyOut(slug=c.slug, name=c.name, has_attention=cnt > 0, due_count=cnt))
-    return out
+    etag = _etag("companies", user.id, user.role.value, today, await crud_async.company_data_versions(adb, user))
+    if _not_modified(request, response, etag):
+        return _304(etag)
+    # One grouped query for every role (no per-company COUNT round trips).
+    rows = await crud_async.list_companies_with_due_counts(adb, user, today)
+    return [schemas.CompanyOut(slug=c.slug, name=c.name, has_attention=cnt > 0, due_count=cnt) for c, cnt in rows]
 
 # Employee: list tasks for a company (grouped in UI, returned flat)
-@app.get("/api/company/{company_slug}/tasks", response_model=list[schemas.TaskListItem])
-def list_tasks(company_slug: str, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    company = db.execute(select(Company).where(Company.slug == company_slug)).scalar_one_or_none()
+_task_list_adapter = TypeAdapter(list[schemas.TaskListItem])
+
+async def _task_list_scope(adb: AsyncSession, company_slug: str, user: Principal) -> tuple[metacache.CompanyRef, int | None]:
+    """Company plus the assignee filter for the task list (None = whole company, for admins)."""
+    company = await metacache.company_by_slug_async(adb, company_slug)
     if not company:
         raise HTTPException(status_code=404, detail="Not found")
+    if user.role in (Role.admin, Role.super_admin):
+        return company, None
+    # Ensure user is assigned to company
+    if not await metacache.is_member_async(adb, user.id, company.id):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    return company, user.id
 
+@app.get("/api/company/{company_slug}/tasks", response_model=list[schemas.TaskListItem])
+async def list_tasks(company_slug: str, request: Request, response: Response, user: Principal = Depends(get_principal), adb: AsyncSession = Depends(get_async_read_db)):
+    company, user_id = await _task_list_scope(adb, company_slug, user)
     today = date.today()
 
-    if user.role in (Role.admin, Role.super_admin):
-        # Admin view: show all tasks for the company
-        tasks = crud.list_tasks_for_company(db, company.id, today)
+    # The data version is read in this transaction before any task rows.
+    version = await crud_async.company_data_version(adb, company.id)
+    etag = _etag("tasks", company.id, version, user_id, today)
+    if _not_modified(request, response, etag):
+        return _304(etag)
+
+    # Shared cache of the serialized window; the key carries the data version, so writes invalidate it.
+    key = cache.task_window_key(company.id, version, user_id, today)
+    cached = await cache.get_async(key)
+    if cached is not None:
+        cursor, body = cached.split("\n", 1)
     else:
-        # Ensure user is assigned to company
-        link = db.execute(select(UserCompany).where(UserCompany.user_id == user.id, UserCompany.company_id == company.id)).scalar_one_or_none()
-        if not link:
-            raise HTTPException(status_code=403, detail="Forbidden")
-        tasks = crud.list_tasks_for_user_company(db, user.id, company.id, today)
-
-    return [schemas.TaskListItem(task_code=t.task_code, title=t.title, category=t.category, task_date=t.task_date, task_time=t.task_time, status=t.status.value) for t in tasks]
+        # Read the cursor before the rows so a concurrent write shows up in the next /changes call.
+        cursor = await crud_async.task_sync_cursor(adb, today)
+        if user_id is None:
+            # Admin view: show all tasks for the company
+            tasks = await crud_async.list_tasks_for_company(adb, company.id, today)
+        else:
+            tasks = await crud_async.list_tasks_for_user_company(adb, user_id, company.id, today)
+        body = _task_list_adapter.dump_json([
+            schemas.TaskListItem(task_code=t.task_code, title=t.title, category=t.category, task_date=t.task_date, task_time=t.task_time, status=t.status.value)
+            for t in tasks
+        ]).decode()
+        await cache.put_async(key, f"{cursor}\n{body}")
+
+    return Response(content=body, media_type="application/json",
+                    headers={"ETag": etag, "Cache-Control": "private, no-cache", "X-Tasks-Cursor": cursor})
+
+# Delta sync: only tasks changed after `since` (the X-Tasks-Cursor of the last full list or the
+# previous response's cursor). Soft-deleted tasks come back as tombstones. resync=true means the
+# window has moved to a new day (tasks entered it without changing): reload the full list.
+@app.get("/api/company/{company_slug}/tasks/changes", response_model=schemas.TaskChangesOut)
+async def list_task_changes(company_slug: str, since: str | None = None, user: Principal = Depends(get_principal), adb: AsyncSession = Depends(get_async_read_db)):
+    company, user_id = await _task_list_scope(adb, company_slug, user)
+    today = date.today()
+    try:
+        day, xid, seq = crud.decode_sync_cursor(since) if since else (today, 0, 0)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if day != today:
+        return schemas.TaskChangesOut(cursor=since, has_more=False, resync=True, changes=[])
+    tasks, cursor, has_more = await crud_async.list_task_changes(adb, company.id, since=(xid, seq), today=today, user_id=user_id)
+    changes = [
+        schemas.TaskChangeItem(task_code=t.task_code, deleted=True) if t.deleted_at is not None else
+        schemas.TaskChangeItem(task_code=t.task_code, title=t.title, category=t.category, task_date=t.task_date, task_time=t.task_time, status=t.status.value)
+        for t in tasks
+    ]
+    return schemas.TaskChangesOut(cursor=cursor, has_more=has_more, changes=changes)
 
 @app.get("/api/company/{company_slug}/tasks/{task_code}", response_model=schemas.TaskDetailOut)
-def task_detail(company_slug: str, task_code: str, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    company = db.execute(select(Company).where(Company.slug == company_slug)).scalar_one_or_none()
+async def task_detail(company_slug: str, task_code: str, user: Principal = Depends(get_principal), adb: AsyncSession = Depends(get_async_read_db)):
+    company = await metacache.company_by_slug_async(adb, company_slug)
     if not company:
         raise HTTPException(status_code=404, detail="Not found")
 
@@ -252,7 +437,7 @@ def task_detail(company_slug: str, task_code: str, user: User = Depends(get_curr
     if num is None:
         raise HTTPException(status_code=404, detail="Not found")
 
-    task = db.execute(select(Task).where(Task.task_num == num)).scalar_one_or_none()
+    task = await crud_async.get_task_by_num(adb, num)
     if not task:
         raise HTTPException(status_code=404, detail="Not found")
 
@@ -262,8 +447,7 @@ def task_detail(company_slug: str, task_code: str, user: User = Depends(get_curr
     if user.role not in (Role.admin, Role.super_admin):
         if task.assigned_user_id != user.id:
             raise HTTPException(status_code=403, detail="Forbidden")
-        link_ctx = db.execute(select(UserCompany).where(UserCompany.user_id == user.id, UserCompany.company_id == company.id)).scalar_one_or_none()
-        if not link_ctx:
+        if not await metacache.is_member_async(adb, user.id, company.id):
             raise HTTPException(status_code=403, detail="Forbidden")
 
     return schemas.TaskDetailOut(
@@ -286,40 +470,49 @@ def task_detail(company_slug: str, task_code: str, user: User = Depends(get_curr
 @app.post("/api/company/{company_slug}/tasks/{task_code}/done")
 def mark_done(company_slug: str, task_code: str, payload: schemas.MarkDoneIn, request: Request,
               user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    company = db.execute(select(Company).where(Company.slug == company_slug)).scalar_one_or_none()
-    if not company:
-        raise HTTPException(status_code=404, detail="Not found")
-
     num = parse_task_code(task_code)
     if num is None:
         raise HTTPException(status_code=404, detail="Not found")
 
-    task = db.execute(select(Task).where(Task.task_num == num)).scalar_one_or_none()
-    if not task or task.company_id != company.id:
-        raise HTTPException(status_code=404, detail="Not found")
-
-    # Only assigned user can mark their task
-    if user.role in (Role.admin, Role.super_admin):
-        # allow admins to mark for testing if they are the assignee
-        if task.assigned_user_id != user.id:
-            raise HTTPException(status_code=403, detail="Forbidden")
-    else:
-        if task.assigned_user_id != user.id:
-            raise HTTPException(status_code=403, detail="Forbidden")
-
-    if payload.done:
-        task.status = TaskStatus.done
-        task.completed_at = datetime.utcnow()
-        crud.log(db, actor_user_id=user.id, action=AuditAction.COMPLETE_TASK, company_id=company.id, task_id=task.id,
-                 ip=client_ip(request), user_agent=request.headers.get("user-agent",""), meta={"task_code": task.task_code})
-    else:
-        task.status = TaskStatus.todo
-        task.completed_at = None
-        crud.log(db, actor_user_id=user.id, action=AuditAction.UNCOMPLETE_TASK, company_id=company.id, task_id=task.id,
-                 ip=client_ip(request), user_agent=request.headers.get("user-agent",""), meta={"task_code": task.task_code})
+    # Only the assigned user can mark their task (admins included, for testing).
+    row = crud.set_task_status_fast(
+        db,
+        task_num=num,
+        done=payload.done,
+        company_slug=company_slug,
+        assignee_id=user.id,
+        actor_user_id=user.id,
+        ip=client_ip(request),
+        user_agent=request.headers.get("user-agent",""),
+    )
+    if row is None:
+        db.rollback()
+        if not crud.task_exists(db, task_num=num, company_slug=company_slug):
+            raise HTTPException(status_code=404, detail="Not found")
+        raise HTTPException(status_code=403, detail="Forbidden")
     db.commit()
     return {"ok": True}
 
+@app.post("/api/tasks/status:batch", response_model=schemas.TaskStatusBatchOut)
+def tasks_status_batch(payload: schemas.TaskStatusBatchIn, request: Request,
+                       user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Flush done/undone toggles queued by the PWA while offline, in one request."""
+    items = []
+    for it in payload.items:
+        ts = it.client_ts
+        if ts.tzinfo is not None:
+            ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+        items.append((it.task_code, it.done, ts))
+    results = crud.apply_status_batch(
+        db,
+        user_id=user.id,
+        items=items,
+        ip=client_ip(request),
+        user_agent=request.headers.get("user-agent",""),
+    )
+    db.commit()
+    return {"results": results}
+
 # ---------------- Admin APIs ----------------
 
 @app.post("/api/admin/companies")
@@ -329,19 +522,23 @@ def admin_create_company(payload: schemas.AdminCompanyIn, request: Request, admi
     return {"ok": True, "company": {"slug": c.slug, "name": c.name}}
 
 @app.get("/api/admin/users", response_model=list[schemas.AdminUserOut])
-def admin_list_users(admin: User = Depends(require_admin), db: Session = Depends(get_db)):
-    users = db.execute(select(User).order_by(User.id.asc())).scalars().all()
+def admin_list_users(response: Response, q: str = "", cursor: int = 0, limit: int = crud.USERS_PAGE_LIMIT,
+                     admin: Principal = Depends(require_admin_principal), db: Session = Depends(get_read_db)):
+    # Paged by id; X-Next-Cursor (absent on the last page) goes back as ?cursor=.
+    users, next_cursor = crud.list_users(db, q=q, after_id=cursor, limit=limit)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
     return [schemas.AdminUserOut(id=u.id, username=u.username, display_name=u.display_name, mattermost_id=u.mattermost_id or "", role=u.role.value, disabled=u.disabled) for u in users]
 
 
 @app.get("/api/admin/companies", response_model=list[schemas.AdminCompanyOut])
-def admin_list_companies(admin: User = Depends(require_admin), db: Session = Depends(get_db)):
+def admin_list_companies(admin: Principal = Depends(require_admin_principal), db: Session = Depends(get_read_db)):
     comps = db.execute(select(Company).order_by(Company.name.asc())).scalars().all()
     return [schemas.AdminCompanyOut(id=c.id, slug=c.slug, name=c.name) for c in comps]
 
 
 @app.get("/api/admin/users/{user_id}", response_model=schemas.AdminUserDetailOut)
-def admin_user_detail(user_id: int, admin: User = Depends(require_admin), db: Session = Depends(get_db)):
+def admin_user_detail(user_id: int, admin: Principal = Depends(require_admin_principal), db: Session = Depends(get_read_db)):
     u = db.get(User, user_id)
     if not u:
         raise HTTPException(status_code=404, detail="Not found")
@@ -362,42 +559,111 @@ def admin_user_detail(user_id: int, admin: User = Depends(require_admin), db: Se
         company_slugs=sorted(set(slugs)),
     )
 
+_BULK_USER_COLUMNS = ("username", "display_name", "password", "role", "company_slugs", "mattermost_id")
+
+def _parse_bulk_users(body: bytes, content_type: str) -> list[dict]:
+    """JSON ({"users": [...]} or a bare list) or CSV with a header row. company_slugs in CSV: separated by ; | or spaces."""
+    if "csv" in content_type:
+        reader = csv.DictReader(io.StringIO(body.decode("utf-8-sig")))
+        raw = []
+        for rec in reader:
+            rec = {k.strip().lower(): (v or "").strip() for k, v in rec.items() if k and k.strip().lower() in _BULK_USER_COLUMNS}
+            rec["company_slugs"] = [x for x in re.split(r"[;|\s]+", rec.get("company_slugs", "")) if x]
+            raw.append({k: v for k, v in rec.items() if v != ""})
+    else:
+        data = json.loads(body or b"null")
+        raw = data.get("users") if isinstance(data, dict) else data
+        if not isinstance(raw, list):
+            raise ValueError('Expected {"users": [...]} or a list')
+    if len(raw) > crud.MAX_USERS_PER_BULK:
+        raise ValueError(f"At most {crud.MAX_USERS_PER_BULK} users per request")
+
+    rows = []
+    for rec in raw:
+        try:
+            rows.append(schemas.AdminCreateUserIn.model_validate(rec).model_dump())
+        except ValidationError as e:
+            name = rec.get("username", "") if isinstance(rec, dict) else ""
+            rows.append({"username": str(name), "error": "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())})
+    return rows
+
+@app.post("/api/admin/users:bulk", response_model=schemas.AdminBulkUsersOut)
+async def admin_create_users_bulk(request: Request, admin: User = Depends(require_admin), db: Session = Depends(get_db)):
+    """Create up to MAX_USERS_PER_BULK users from JSON or CSV (Content-Type: text/csv); bad rows are reported, not fatal."""
+    try:
+        rows = _parse_bulk_users(await request.body(), request.headers.get("content-type", ""))
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    actor_id = admin.id
+    results, pending = crud.check_bulk_users(rows, actor_role=admin.role)
+    if pending:
+        # End the auth read first: no connection sits idle-in-transaction for the seconds argon2 takes.
+        await run_in_threadpool(db.rollback)
+        hashes = dict(zip(pending, await hash_passwords([rows[i]["password"] for i in pending])))
+
+        def run():
+            try:
+                crud.create_users_bulk(db, rows, results, hashes, actor_user_id=actor_id, ip=client_ip(request),
+                                       user_agent=request.headers.get("user-agent",""))
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+
+        # Sync DB work off the event loop.
+        await run_in_threadpool(run)
+    created = sum(1 for r in results if r["ok"])
+    return {"created": created, "failed": len(results) - created, "results": results}
+
 @app.post("/api/admin/users", response_model=schemas.AdminUserOut)
-def admin_create_user(payload: schemas.AdminCreateUserIn, request: Request, admin: User = Depends(require_admin), db: Session = Depends(get_db)):
+async def admin_create_user(payload: schemas.AdminCreateUserIn, request: Request, admin: User = Depends(require_admin), db: Session = Depends(get_db)):
     # Only super_admin can create super_admin
     if payload.role == Role.super_admin.value and admin.role != Role.super_admin:
         raise HTTPException(status_code=403, detail="Forbidden")
     role = Role(payload.role)
-    try:
-        u = crud.create_user(
-            db,
-            username=payload.username,
-            display_name=payload.display_name,
-            mattermost_id=payload.mattermost_id,
-            role=role,
-            password=payload.password,
-            company_slugs=payload.company_slugs,
-            actor_user_id=admin.id,
-            ip=client_ip(request),
-            user_agent=request.headers.get("user-agent",""),
-        )
-        db.commit()
-        return schemas.AdminUserOut(id=u.id, username=u.username, display_name=u.display_name, mattermost_id=u.mattermost_id or "", role=u.role.value, disabled=u.disabled)
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=400, detail=str(e))
+    password_hash = await hash_password(payload.password)
+
+    def create() -> schemas.AdminUserOut:
+        try:
+            u = crud.create_user(
+                db,
+                username=payload.username,
+                display_name=payload.display_name,
+                mattermost_id=payload.mattermost_id,
+                role=role,
+                password_hash=password_hash,
+                company_slugs=payload.company_slugs,
+                actor_user_id=admin.id,
+                ip=client_ip(request),
+                user_agent=request.headers.get("user-agent",""),
+            )
+            db.commit()
+            return schemas.AdminUserOut(id=u.id, username=u.username, display_name=u.display_name, mattermost_id=u.mattermost_id or "", role=u.role.value, disabled=u.disabled)
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(status_code=400, detail=str(e))
+
+    return await run_in_threadpool(create)
 
 @app.post("/api/admin/users/{user_id}/reset_password", response_model=schemas.AdminResetPasswordOut)
-def admin_reset_password(user_id: int, request: Request, admin: User = Depends(require_admin), db: Session = Depends(get_db)):
-    target = db.get(User, user_id)
+async def admin_reset_password(user_id: int, request: Request, admin: User = Depends(require_admin), db: Session = Depends(get_db)):
+    target = await run_in_threadpool(db.get, User, user_id)
     if not target:
         raise HTTPException(status_code=404, detail="Not found")
-    try:
-        temp = crud.reset_password(db, target_user=target, actor_user=admin, ip=client_ip(request), user_agent=request.headers.get("user-agent",""))
+    temp = random_temp_password()
+    password_hash = await hash_password(temp)
+
+    def save() -> None:
+        crud.reset_password(db, target_user=target, password_hash=password_hash, actor_user=admin, ip=client_ip(request),
+                            user_agent=request.headers.get("user-agent",""))
         db.commit()
-        return {"temp_password": temp}
+
+    try:
+        await run_in_threadpool(save)
     except PermissionError:
         raise HTTPException(status_code=403, detail="Forbidden")
+    return {"temp_password": temp}
 
 @app.post("/api/admin/users/{user_id}/disable")
 def admin_disable(user_id: int, payload: schemas.AdminDisableUserIn, request: Request, admin: User = Depends(require_admin), db: Session = Depends(get_db)):
@@ -435,6 +701,8 @@ def admin_update_user(user_id: int, payload: schemas.AdminUpdateUserIn, request:
         target.display_name = payload.display_name
     if payload.mattermost_id is not None:
         crud.update_user_mattermost_id(db, target_user=target, mattermost_id=payload.mattermost_id)
+    # Cached principals carry display_name; drop them like every other user mutation does.
+    revoke_principal(db, target.id)
     db.commit()
     db.refresh(target)
     # Must return the updated user object to satisfy response_model
@@ -464,8 +732,8 @@ def admin_set_user_companies(user_id: int, payload: dict, request: Request, admi
 
 
 @app.get("/api/admin/companies/{company_slug}/categories", response_model=list[schemas.CategoryOut])
-def admin_list_categories(company_slug: str, admin: User = Depends(require_admin), db: Session = Depends(get_db)):
-    company = db.execute(select(Company).where(Company.slug == company_slug)).scalar_one_or_none()
+def admin_list_categories(company_slug: str, admin: Principal = Depends(require_admin_principal), db: Session = Depends(get_read_db)):
+    company = metacache.company_by_slug(db, company_slug)
     if not company:
         raise HTTPException(status_code=404, detail="Not found")
     cats = crud.list_categories(db, company.id)
@@ -495,6 +763,7 @@ def admin_update_category(category_id: int, payload: dict, admin: User = Depends
         crud.set_category_active(db, category=c, active=bool(payload["active"]))
     if "name" in payload and str(payload["name"]).strip():
         c.name = str(payload["name"]).strip()
+        metacache.invalidate(db, "categories", c.company_id)
     if "sort_order" in payload:
         c.sort_order = int(payload["sort_order"])
     db.commit()
@@ -502,8 +771,8 @@ def admin_update_category(category_id: int, payload: dict, admin: User = Depends
 
 
 @app.get("/api/admin/companies/{company_slug}/patients", response_model=list[schemas.PatientOut])
-def admin_list_patients(company_slug: str, include_inactive: bool = False, admin: User = Depends(require_admin), db: Session = Depends(get_db)):
-    company = db.execute(select(Company).where(Company.slug == company_slug)).scalar_one_or_none()
+def admin_list_patients(company_slug: str, include_inactive: bool = False, admin: Principal = Depends(require_admin_principal), db: Session = Depends(get_read_db)):
+    company = metacache.company_by_slug(db, company_slug)
     if not company:
         raise HTTPException(status_code=404, detail="Not found")
     pts = crud.list_patients(db, company.id, include_inactive=include_inactive)
@@ -542,6 +811,26 @@ def admin_update_patient(patient_id: int, payload: dict, admin: User = Depends(r
     db.commit()
     return {"ok": True}
 
+def _notify_new_tasks(db: Session, *, company: Company, user_ids: list[int], request: Request):
+    # Push notif: only the assigned user gets it. Payload is generic (no PHI).
+    # Callers enqueue after commit so the tasks exist.
+    try:
+        base_url = os.environ.get("APP_BASE_URL", "")  # optional, used for absolute URL
+        rel_url = f"/company/{company.slug}"
+        url = f"{base_url.rstrip('/')}{rel_url}" if base_url else rel_url
+        for uid in set(user_ids or []):
+            enqueue_push_for_user(
+                db=db,
+                user_id=int(uid),
+                title="Salkhorian Design Task Scheduler",
+                body="You've got tasks.",
+                url=url,
+                request=request,
+            )
+    except Exception:
+        # Never fail task creation due to notifications.
+        pass
+
 @app.post("/api/admin/tasks/bulk", response_model=schemas.AdminTaskBulkCreateOut)
 def admin_create_tasks_bulk(payload: schemas.AdminTaskBulkCreateIn, request: Request, admin: User = Depends(require_admin), db: Session = Depends(get_db)):
     company = db.execute(select(Company).where(Company.slug == payload.company_slug)).scalar_one_or_none()
@@ -570,25 +859,44 @@ def admin_create_tasks_bulk(payload: schemas.AdminTaskBulkCreateIn, request: Req
         if any(t.task_num >= 999999 for t in tasks):
             raise HTTPException(status_code=500, detail="Task ID limit reached; deploy v3.")
         db.commit()
+        _notify_new_tasks(db, company=company, user_ids=payload.assignee_user_ids, request=request)
+        return {"created": [t.task_code for t in tasks]}
+    except HTTPException:
+        db.rollback()
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
 
-        # Push notif: only the assigned user gets it. Payload is generic (no PHI).
-        # We enqueue after commit so the tasks exist.
-        try:
-            base_url = os.environ.get("APP_BASE_URL", "")  # optional, used for absolute URL
-            rel_url = f"/company/{company.slug}"
-            url = f"{base_url.rstrip('/')}{rel_url}" if base_url else rel_url
-            for uid in set(payload.assignee_user_ids or []):
-                enqueue_push_for_user(
-                    db=db,
-                    user_id=int(uid),
-                    title="Salkhorian Design Task Scheduler",
-                    body="You've got tasks.",
-                    url=url,
-                    request=request,
-                )
-        except Exception:
-            # Never fail task creation due to notifications.
-            pass
+
+@app.post("/api/admin/tasks/matrix", response_model=schemas.AdminTaskBulkCreateOut)
+def admin_create_tasks_matrix(payload: schemas.AdminTaskMatrixCreateIn, request: Request, admin: User = Depends(require_admin), db: Session = Depends(get_db)):
+    company = db.execute(select(Company).where(Company.slug == payload.company_slug)).scalar_one_or_none()
+    if not company:
+        raise HTTPException(status_code=404, detail="Not found")
+    try:
+        tasks = crud.create_tasks_matrix(
+            db,
+            company=company,
+            assignee_ids=payload.assignee_user_ids,
+            slots=[(s.task_date, s.task_time) for s in payload.slots],
+            category=payload.category,
+            title=payload.title,
+            maps_url=payload.maps_url,
+            patient_id=payload.patient_id,
+            patient_name=payload.patient_name,
+            patient_address=payload.patient_address,
+            patient_phone=payload.patient_phone,
+            bonus_details=payload.bonus_details,
+            actor_user=admin,
+            ip=client_ip(request),
+            user_agent=request.headers.get("user-agent",""),
+        )
+        # Safety: v3 threshold
+        if any(t.task_num >= 999999 for t in tasks):
+            raise HTTPException(status_code=500, detail="Task ID limit reached; deploy v3.")
+        db.commit()
+        _notify_new_tasks(db, company=company, user_ids=payload.assignee_user_ids, request=request)
         return {"created": [t.task_code for t in tasks]}
     except HTTPException:
         db.rollback()
@@ -598,28 +906,135 @@ def admin_create_tasks_bulk(payload: schemas.AdminTaskBulkCreateIn, request: Req
         raise HTTPException(status_code=400, detail=str(e))
 
 
+# ---------------- Admin: recurring tasks ----------------
+
+def _recurrence_out(r: TaskRecurrence) -> schemas.RecurrenceOut:
+    return schemas.RecurrenceOut(
+        id=r.id,
+        rule=r.rule,
+        dtstart=r.dtstart,
+        task_time=r.task_time,
+        category=r.category,
+        title=r.title,
+        active=r.active,
+        assignee_user_ids=sorted(a.user_id for a in r.assignees),
+        materialized_through=r.materialized_through,
+    )
+
+
+@app.post("/api/admin/recurrences", response_model=schemas.RecurrenceOut)
+def admin_create_recurrence(payload: schemas.AdminRecurrenceIn, request: Request, admin: User = Depends(require_admin), db: Session = Depends(get_db)):
+    company = db.execute(select(Company).where(Company.slug == payload.company_slug)).scalar_one_or_none()
+    if not company:
+        raise HTTPException(status_code=404, detail="Not found")
+    try:
+        rec = crud.create_recurrence(
+            db,
+            company=company,
+            rule=payload.rule,
+            dtstart=payload.dtstart,
+            task_time=payload.task_time,
+            assignee_ids=payload.assignee_user_ids,
+            category=payload.category,
+            title=payload.title,
+            maps_url=payload.maps_url,
+            patient_id=payload.patient_id,
+            patient_name=payload.patient_name,
+            patient_address=payload.patient_address,
+            patient_phone=payload.patient_phone,
+            bonus_details=payload.bonus_details,
+            actor_user=admin,
+            ip=client_ip(request),
+            user_agent=request.headers.get("user-agent",""),
+            today=date.today(),
+        )
+        db.commit()
+        return _recurrence_out(rec)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/api/admin/companies/{company_slug}/recurrences", response_model=list[schemas.RecurrenceOut])
+def admin_list_recurrences(company_slug: str, admin: Principal = Depends(require_admin_principal), db: Session = Depends(get_read_db)):
+    company = metacache.company_by_slug(db, company_slug)
+    if not company:
+        raise HTTPException(status_code=404, detail="Not found")
+    return [_recurrence_out(r) for r in crud.list_recurrences(db, company.id)]
+
+
+@app.patch("/api/admin/recurrences/{recurrence_id}", response_model=schemas.RecurrenceOut)
+def admin_update_recurrence(recurrence_id: int, payload: schemas.AdminRecurrenceUpdateIn, request: Request,
+                            admin: User = Depends(require_admin), db: Session = Depends(get_db)):
+    rec = db.get(TaskRecurrence, recurrence_id)
+    if not rec:
+        raise HTTPException(status_code=404, detail="Not found")
+    changes = payload.model_dump(exclude_unset=True)
+    assignee_ids = changes.pop("assignee_user_ids", None)
+    try:
+        crud.update_recurrence(
+            db,
+            rec,
+            changes=changes,
+            assignee_ids=assignee_ids,
+            actor_user=admin,
+            ip=client_ip(request),
+            user_agent=request.headers.get("user-agent",""),
+            today=date.today(),
+        )
+        db.commit()
+        return _recurrence_out(rec)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 # ---------------- Admin: task management ----------------
 
 @app.get("/api/admin/tasks")
-def admin_list_tasks(company_slug: str | None = None, include_deleted: bool = False, limit: int = 200,
-                     admin: User = Depends(require_admin), db: Session = Depends(get_db)):
+def admin_list_tasks(request: Request, response: Response, company_slug: str | None = None, include_deleted: bool = False,
+                     limit: int = crud.ADMIN_TASKS_LIMIT, cursor: str | None = None,
+                     assigned_user_id: int | None = None, status: TaskStatus | None = None, category: str | None = None,
+                     date_from: date | None = None, date_to: date | None = None,
+                     deleted: bool | None = None, forced: bool | None = None,
+                     admin: Principal = Depends(require_admin_principal), db: Session = Depends(get_read_db)):
+    """Admin task grid, one page at a time in (task_date, task_num) order: ascending for one company,
+    newest first across all companies.
+
+    Default range is today-7 .. today+14. `deleted` (true = only deleted, false = live) overrides the
+    older include_deleted flag. Pass the X-Next-Cursor response header back as `cursor` for the next page;
+    it is absent on the last page.
+    """
+    from datetime import timedelta
     today = date.today()
-    tasks: list[Task] = []
+    date_from = date_from or today - timedelta(days=7)
+    date_to = date_to or today + timedelta(days=14)
+    if deleted is None and not include_deleted:
+        deleted = False
+    try:
+        after = crud.decode_task_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    company_id = None
     if company_slug:
         company = db.execute(select(Company).where(Company.slug == company_slug)).scalar_one_or_none()
         if not company:
             raise HTTPException(status_code=404, detail="Not found")
-        tasks = crud.list_tasks_for_company(db, company.id, today, include_deleted=include_deleted)
+        company_id = company.id
+        versions = [(company.id, crud.company_data_version(db, company.id))]
     else:
-        # default: show recent tasks across all companies
-        from datetime import timedelta
-        start = today - timedelta(days=7)
-        end = today + timedelta(days=14)
-        q = select(Task).where(Task.task_date.between(start, end))
-        if not include_deleted:
-            q = q.where(Task.deleted_at.is_(None))
-        q = q.order_by(Task.task_date.desc(), Task.task_num.desc()).limit(min(limit, 1000))
-        tasks = db.execute(q).scalars().all()
+        # Cross-company view: any company's write changes it.
+        versions = crud.company_data_versions(db, None)
+    filters = dict(company_id=company_id, assigned_user_id=assigned_user_id, status=status, category=category,
+                   date_from=date_from, date_to=date_to, deleted=deleted, forced=forced, after=after)
+    etag = _etag("admin_tasks", versions, today, limit, sorted((k, str(v)) for k, v in filters.items()))
+    if _not_modified(request, response, etag):
+        return _304(etag)
+
+    tasks, next_cursor = crud.list_admin_tasks(db, limit=limit, **filters)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
 
     # hydrate company slug + assignee username
     company_ids = {t.company_id for t in tasks}
@@ -645,14 +1060,20 @@ def admin_list_tasks(company_slug: str | None = None, include_deleted: bool = Fa
 
 @app.post("/api/admin/tasks/{task_code}/force_done")
 def admin_force_done_task(task_code: str, payload: dict, request: Request, admin: User = Depends(require_admin), db: Session = Depends(get_db)):
-    task = crud.get_task_by_code(db, task_code)
-    if not task:
+    num = parse_task_code(task_code)
+    if num is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    row = crud.set_task_status_fast(
+        db,
+        task_num=num,
+        done=bool(payload.get("done", True)),
+        forced=True,
+        actor_user_id=admin.id,
+        ip=client_ip(request),
+        user_agent=request.headers.get("user-agent",""),
+    )
+    if row is None:
         raise HTTPException(status_code=404, detail="Not found")
-    done = bool(payload.get("done", True))
-    crud.force_done_task(db, task, actor_user=admin, done=done)
-    crud.log(db, actor_user_id=admin.id, action=AuditAction.FORCE_DONE_TASK if done else AuditAction.UNFORCE_DONE_TASK,
-             company_id=task.company_id, task_id=task.id, ip=client_ip(request), user_agent=request.headers.get("user-agent",""),
-             meta={"task_code": task.task_code})
     db.commit()
     return {"ok": True}
 
@@ -671,9 +1092,52 @@ def admin_delete_task(task_code: str, request: Request, admin: User = Depends(re
 
 
 # ---------------- Stats ----------------
+@app.get("/api/stats/cache")
+def stats_cache(admin: Principal = Depends(require_admin_principal)):
+    out = {"metadata": metacache.stats(), "auth": principals.stats()}  # this worker only
+    try:
+        out.update(cache.stats())
+    except Exception as e:
+        out["error"] = f"Redis unavailable: {e}"
+    return out
+
+@app.get("/api/stats/db")
+def stats_db(admin: Principal = Depends(require_admin_principal)):
+    # Pool saturation / checkout wait for this worker, plus the pool settings they were measured under.
+    return {
+        "pools": pool_report(),
+        "audit": audit.stats(),
+        "settings": {
+            "pool_size": settings.db_pool_size,
+            "max_overflow": settings.db_max_overflow,
+            "pool_timeout": settings.db_pool_timeout,
+            "pool_recycle": settings.db_pool_recycle,
+            "pre_ping": settings.db_pool_pre_ping,
+            "pgbouncer": settings.db_pgbouncer,
+        },
+    }
+
+@app.get("/api/stats/replica")
+def stats_replica(admin: Principal = Depends(require_admin_principal)):
+    return replica.stats()
+
 @app.get("/api/stats/audit", response_model=list[schemas.AuditLogOut])
-def stats_audit(limit: int = 200, admin: User = Depends(require_admin), db: Session = Depends(get_db)):
-    rows = db.execute(select(AuditLog).order_by(AuditLog.timestamp.desc()).limit(min(limit, 1000))).scalars().all()
+def stats_audit(response: Response, limit: int = crud.AUDIT_PAGE_LIMIT, cursor: str | None = None,
+                actor_user_id: int | None = None, action: AuditAction | None = None, company_id: int | None = None,
+                task_id: int | None = None, since: datetime | None = None, until: datetime | None = None,
+                include_archive: bool = False,
+                admin: Principal = Depends(require_admin_principal), db: Session = Depends(get_read_db)):
+    # Newest first; X-Next-Cursor (absent on the last page) goes back as ?cursor=.
+    # include_archive=true keeps paging into the months moved out by `audit maintain`.
+    try:
+        before = crud.decode_audit_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    rows, next_cursor = crud.list_audit_logs(db, actor_user_id=actor_user_id, action=action, company_id=company_id,
+                                             task_id=task_id, since=since, until=until, before=before, limit=limit,
+                                             include_archive=include_archive)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return [schemas.AuditLogOut(
         timestamp=r.timestamp,
         actor_user_id=r.actor_user_id,
@@ -0,0 +1,119 @@
+"""Operational commands for the API container.
+
+Usage (inside the api container):
+    python -m app.manage due-counters verify
+    python -m app.manage due-counters rebuild
+    python -m app.manage recurrences materialize [--every SECONDS]
+    python -m app.manage audit drain [--every SECONDS]
+    python -m app.manage audit maintain [--every SECONDS]
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from datetime import date
+
+from app.db.session import SessionLocal
+from app import audit, audit_archive, crud
+
+
+def _due_counters(args: argparse.Namespace) -> int:
+    db = SessionLocal()
+    try:
+        if args.action == "rebuild":
+            n = crud.rebuild_due_counters(db)
+            db.commit()
+            print(f"rebuilt task_due_counters: {n} rows")
+            return 0
+
+        mismatches = crud.verify_due_counters(db)
+        for m in mismatches:
+            print(
+                f"user={m['user_id']} company={m['company_id']} date={m['task_date']} "
+                f"stored={m['stored']} actual={m['actual']}"
+            )
+        print(f"{len(mismatches)} mismatching counter(s)")
+        return 1 if mismatches else 0
+    finally:
+        db.close()
+
+
+def _recurrences(args: argparse.Namespace) -> int:
+    while True:
+        db = SessionLocal()
+        try:
+            n = crud.materialize_due_recurrences(db, date.today())
+            db.commit()
+            print(f"materialized {n} recurring task occurrence(s)", flush=True)
+        except Exception as e:
+            db.rollback()
+            print(f"recurrence materialization failed: {e}", file=sys.stderr, flush=True)
+            if not args.every:
+                return 1
+        finally:
+            db.close()
+        if not args.every:
+            return 0
+        time.sleep(args.every)
+
+
+def _audit_step(db, action: str) -> None:
+    if action == "maintain":
+        for name in audit_archive.ensure_partitions(db, date.today()):
+            print(f"created partition {name}", flush=True)
+        db.commit()
+        for path in audit_archive.archive_partitions(db, date.today()):
+            print(f"archived {path}", flush=True)
+        return
+
+    # Empty the stream in AUDIT_DRAIN_BATCH-sized COPYs, then wait for more.
+    total = 0
+    while (n := audit.drain(db)):
+        total += n
+    if total:
+        print(f"drained {total} audit entr{'y' if total == 1 else 'ies'}", flush=True)
+
+
+def _audit(args: argparse.Namespace) -> int:
+    while True:
+        db = SessionLocal()
+        try:
+            _audit_step(db, args.action)
+        except Exception as e:
+            db.rollback()
+            print(f"audit {args.action} failed: {e}", file=sys.stderr, flush=True)
+            if not args.every:
+                return 1
+        finally:
+            db.close()
+        if not args.every:
+            return 0
+        time.sleep(args.every)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.manage")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("due-counters", help="Check or rebuild the task_due_counters read model")
+    p.add_argument("action", choices=["verify", "rebuild"])
+    p.set_defaults(func=_due_counters)
+
+    p = sub.add_parser("recurrences", help="Roll recurring task series forward into the list window")
+    p.add_argument("action", choices=["materialize"])
+    p.add_argument("--every", type=int, default=0, help="Repeat every N seconds instead of running once")
+    p.set_defaults(func=_recurrences)
+
+    p = sub.add_parser("audit", help="drain: move audit entries from the Redis stream (AUDIT_SINK=redis) into "
+                                     "audit_logs; maintain: create upcoming partitions and archive expired months")
+    p.add_argument("action", choices=["drain", "maintain"])
+    p.add_argument("--every", type=float, default=0, help="Repeat every N seconds instead of running once")
+    p.set_defaults(func=_audit)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+"""Per-process TTL/LRU cache for slow-changing lookups: company by slug, memberships, category names.
+
+Writers call invalidate(db, kind, key) next to their change. After the transaction commits,
+the entry is dropped locally, and the invalidation goes out on the Redis `meta_cache_channel`
+so the other workers drop it too (start_listener()). If Redis is unreachable, staleness is bounded
+by META_CACHE_TTL_SECONDS.
+
+With a read replica, each invalidation is applied twice: immediately, and again once the replica
+lag budget has passed (a replica read in between may have re-cached the old value).
+
+Cached values are plain immutables (never ORM objects), so they are safe to share across sessions/threads.
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models import Company, TaskCategory, UserCompany
+from app.redis_client import get_redis
+from app.settings import settings
+
+_PENDING_KEY = "pending_meta_invalidations"
+
+
+@dataclass(frozen=True)
+class CompanyRef:
+    id: int
+    slug: str
+    name: str
+    active: bool
+
+
+class TTLCache:
+    """Thread-safe LRU with a per-entry TTL and hit/miss counters."""
+
+    _MISSING = object()
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize, self.ttl = maxsize, ttl
+        self.hits = self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                self.misses += 1
+                return self._MISSING
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, key=None):
+        """Drop one key (or everything when key is None)."""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def discard_where(self, pred):
+        """Drop every entry whose value matches `pred`."""
+        with self._lock:
+            for key in [k for k, (_, v) in self._data.items() if pred(v)]:
+                del self._data[key]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+_caches = {
+    "company": TTLCache(settings.meta_cache_size, settings.meta_cache_ttl_seconds),      # slug -> CompanyRef | None
+    "memberships": TTLCache(settings.meta_cache_size, settings.meta_cache_ttl_seconds),  # user_id -> frozenset[company_id]
+    "categories": TTLCache(settings.meta_cache_size, settings.meta_cache_ttl_seconds),   # company_id -> frozenset[name]
+}
+
+
+def _company_query(slug: str):
+    return select(Company.id, Company.slug, Company.name, Company.active).where(Company.slug == slug)
+
+
+def _memberships_query(user_id: int):
+    return select(UserCompany.company_id).where(UserCompany.user_id == user_id)
+
+
+def _categories_query(company_id: int):
+    return select(TaskCategory.name).where(TaskCategory.company_id == company_id)
+
+
+def company_by_slug(db: Session, slug: str) -> CompanyRef | None:
+    cache = _caches["company"]
+    ref = cache.get(slug)
+    if ref is TTLCache._MISSING:
+        row = db.execute(_company_query(slug)).first()
+        ref = CompanyRef(*row) if row else None
+        cache.put(slug, ref)
+    return ref
+
+
+def user_company_ids(db: Session, user_id: int) -> frozenset[int]:
+    cache = _caches["memberships"]
+    ids = cache.get(user_id)
+    if ids is TTLCache._MISSING:
+        ids = frozenset(db.execute(_memberships_query(user_id)).scalars().all())
+        cache.put(user_id, ids)
+    return ids
+
+
+def is_member(db: Session, user_id: int, company_id: int) -> bool:
+    return company_id in user_company_ids(db, user_id)
+
+
+def category_names(db: Session, company_id: int) -> frozenset[str]:
+    """Every category name of the company, active or not."""
+    cache = _caches["categories"]
+    names = cache.get(company_id)
+    if names is TTLCache._MISSING:
+        names = frozenset(db.execute(_categories_query(company_id)).scalars().all())
+        cache.put(company_id, names)
+    return names
+
+
+# AsyncSession variants for the async endpoints; same caches.
+
+async def company_by_slug_async(db: AsyncSession, slug: str) -> CompanyRef | None:
+    cache = _caches["company"]
+    ref = cache.get(slug)
+    if ref is TTLCache._MISSING:
+        row = (await db.execute(_company_query(slug))).first()
+        ref = CompanyRef(*row) if row else None
+        cache.put(slug, ref)
+    return ref
+
+
+async def user_company_ids_async(db: AsyncSession, user_id: int) -> frozenset[int]:
+    cache = _caches["memberships"]
+    ids = cache.get(user_id)
+    if ids is TTLCache._MISSING:
+        ids = frozenset((await db.execute(_memberships_query(user_id))).scalars().all())
+        cache.put(user_id, ids)
+    return ids
+
+
+async def is_member_async(db: AsyncSession, user_id: int, company_id: int) -> bool:
+    return company_id in await user_company_ids_async(db, user_id)
+
+
+def invalidate(db: Session, kind: str, key) -> None:
+    """Drop `kind`[key] in every worker once `db` commits. kind: company (slug) | memberships (user id) | categories (company id)."""
+    db.info.setdefault(_PENDING_KEY, set()).add((kind, key))
+
+
+def stats() -> dict:
+    return {kind: c.stats() for kind, c in _caches.items()}
+
+
+def _apply(kind: str, key) -> None:
+    cache = _caches.get(kind)
+    if cache is not None:
+        cache.discard(key)
+        if settings.database_replica_url:
+            # A replica read inside the lag window can re-cache the old row; drop it again once the
+            # replica is guaranteed to have caught up (reads fall back to the primary beyond that lag).
+            timer = threading.Timer(settings.replica_max_lag_seconds + 1, cache.discard, (key,))
+            timer.daemon = True
+            timer.start()
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(db: Session):
+    pending = db.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    for kind, key in pending:
+        _apply(kind, key)
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for kind, key in pending:
+            pipe.publish(settings.meta_cache_channel, json.dumps({"kind": kind, "key": key}))
+        pipe.execute()
+    except Exception:
+        pass  # other workers catch up within the TTL
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_after_rollback(db: Session):
+    # The entries may have been re-read inside the rolled-back transaction; drop them locally too.
+    for kind, key in db.info.pop(_PENDING_KEY, None) or ():
+        _apply(kind, key)
+
+
+_listener: threading.Thread | None = None
+
+
+def _listen():
+    while True:
+        pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(settings.meta_cache_channel)
+            # The shared client has a short socket timeout; poll instead of blocking in listen().
+            while True:
+                msg = pubsub.get_message(timeout=0.5)
+                if msg and msg.get("type") == "message":
+                    data = json.loads(msg["data"])
+                    _apply(data.get("kind"), data.get("key"))
+        except Exception:
+            # Missed messages while disconnected: start from a clean slate.
+            for c in _caches.values():
+                c.discard()
+            time.sleep(1)
+        finally:
+            pubsub.close()
+
+
+def start_listener() -> None:
+    """Start the cross-worker invalidation listener (once per process)."""
+    global _listener
+    if _listener is None or not _listener.is_alive():
+        _listener = threading.Thread(target=_listen, name="metacache-invalidation", daemon=True)
+        _listener.start()
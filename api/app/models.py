@@ -3,8 +3,8 @@ from __future__ import annotations
 import enum
 from datetime import datetime, date, time
 from sqlalchemy import (
-    Boolean, Date, DateTime, Enum, ForeignKey, Integer, Sequence,
-    String, Text, Time, UniqueConstraint, Index
+    BigInteger, Boolean, Date, DateTime, Enum, FetchedValue, ForeignKey, Integer, Sequence,
+    String, Text, Time, UniqueConstraint, Index, text
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -16,6 +16,8 @@ class Role(str, enum.Enum):
     super_admin = "super_admin"
 
 task_num_seq = Sequence("task_num_seq", start=10, increment=1)
+# Change cursor for delta sync; bumped on every tasks/task_groups UPDATE by triggers (migration 0011).
+task_change_seq = Sequence("task_change_seq")
 
 class User(Base):
     __tablename__ = "users"
@@ -41,6 +43,10 @@ class User(Base):
         cascade="all, delete-orphan",
     )
 
+# Substring search in the admin user list (ILIKE); see migration 0015.
+Index("ix_users_username_trgm", User.username, postgresql_using="gin", postgresql_ops={"username": "gin_trgm_ops"})
+Index("ix_users_display_name_trgm", User.display_name, postgresql_using="gin", postgresql_ops={"display_name": "gin_trgm_ops"})
+
 class Company(Base):
     __tablename__ = "companies"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -101,6 +107,29 @@ class TaskStatus(str, enum.Enum):
     todo = "todo"
     done = "done"
 
+class TaskGroup(Base):
+    """Payload shared by every per-assignee Task of one assignment (or one recurrence date).
+
+    Stored once instead of copied onto each Task row; editing it changes all of the group's tasks.
+    """
+
+    __tablename__ = "task_groups"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    company_id: Mapped[int] = mapped_column(ForeignKey("companies.id", ondelete="RESTRICT"), index=True)
+
+    title: Mapped[str] = mapped_column(String(200))
+    maps_url: Mapped[str] = mapped_column(String(500), default="")
+    patient_id: Mapped[int | None] = mapped_column(ForeignKey("patients.id", ondelete="SET NULL"), nullable=True, index=True)
+    patient_name: Mapped[str] = mapped_column(String(190), default="")
+    patient_address: Mapped[str] = mapped_column(String(500), default="")
+    patient_phone: Mapped[str] = mapped_column(String(80), default="")
+    bonus_details: Mapped[str] = mapped_column(Text, default="")
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    patient = relationship("Patient")
+
 class Task(Base):
     __tablename__ = "tasks"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -111,27 +140,34 @@ class Task(Base):
     # Human-friendly code like T000010; stored for stable URLs
     task_code: Mapped[str] = mapped_column(String(16), unique=True, index=True, nullable=False)
 
-    company_id: Mapped[int] = mapped_column(ForeignKey("companies.id", ondelete="RESTRICT"), index=True)
+    company_id: Mapped[int] = mapped_column(ForeignKey("companies.id", ondelete="RESTRICT"))
     assigned_user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="RESTRICT"), index=True)
 
     # Category is a simple string in v0.6; backed by admin-defined categories per company.
-    category: Mapped[str] = mapped_column(String(60), default="general", index=True)
-    task_date: Mapped[date] = mapped_column(Date, index=True)
-    task_time: Mapped[time | None] = mapped_column(Time, nullable=True, index=True)
+    category: Mapped[str] = mapped_column(String(60), default="general")
+    task_date: Mapped[date] = mapped_column(Date)
+    task_time: Mapped[time | None] = mapped_column(Time, nullable=True)
 
-    title: Mapped[str] = mapped_column(String(200))
-    maps_url: Mapped[str] = mapped_column(String(500), default="")
-    patient_name: Mapped[str] = mapped_column(String(190), default="")
-    patient_address: Mapped[str] = mapped_column(String(500), default="")
-    patient_phone: Mapped[str] = mapped_column(String(80), default="")
-    bonus_details: Mapped[str] = mapped_column(Text, default="")
+    # Shared payload (title, patient snapshot, ...) lives once per assignment in task_groups.
+    group_id: Mapped[int] = mapped_column(ForeignKey("task_groups.id", ondelete="RESTRICT"), index=True)
 
-    patient_id: Mapped[int | None] = mapped_column(ForeignKey("patients.id", ondelete="SET NULL"), nullable=True, index=True)
+    # Set when the row was materialized from a TaskRecurrence.
+    recurrence_id: Mapped[int | None] = mapped_column(ForeignKey("task_recurrences.id", ondelete="SET NULL"), nullable=True)
 
-    status: Mapped[TaskStatus] = mapped_column(Enum(TaskStatus), default=TaskStatus.todo, index=True)
+    status: Mapped[TaskStatus] = mapped_column(Enum(TaskStatus), default=TaskStatus.todo)
     completed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    # When the status last changed (server time, or the client's timestamp for offline batch flushes).
+    # Batched client writes older than this lose (last-writer-wins on client_ts).
+    status_changed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
 
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_seq: Mapped[int] = mapped_column(
+        BigInteger, server_default=task_change_seq.next_value(), server_onupdate=FetchedValue(), nullable=False
+    )
+    # Transaction that wrote updated_seq (pg_current_xact_id()); delta sync orders by (updated_xid, updated_seq).
+    updated_xid: Mapped[int] = mapped_column(
+        BigInteger, server_default=text("pg_current_xact_id()::text::bigint"), server_onupdate=FetchedValue(), nullable=False
+    )
 
     deleted_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True, index=True)
     deleted_by_user_id: Mapped[int | None] = mapped_column(ForeignKey('users.id', ondelete='SET NULL'), nullable=True, index=True)
@@ -142,9 +178,105 @@ class Task(Base):
     assigned_user = relationship("User", foreign_keys=[assigned_user_id])
     deleted_by_user = relationship("User", foreign_keys=[deleted_by_user_id])
     forced_done_by_user = relationship("User", foreign_keys=[forced_done_by_user_id])
-    patient = relationship("Patient")
+    group = relationship("TaskGroup", lazy="joined", innerjoin=True)
+
+    # Read-through accessors for the shared payload.
+    @property
+    def title(self) -> str:
+        return self.group.title
+
+    @property
+    def maps_url(self) -> str:
+        return self.group.maps_url
+
+    @property
+    def patient_id(self) -> int | None:
+        return self.group.patient_id
+
+    @property
+    def patient_name(self) -> str:
+        return self.group.patient_name
+
+    @property
+    def patient_address(self) -> str:
+        return self.group.patient_address
+
+    @property
+    def patient_phone(self) -> str:
+        return self.group.patient_phone
+
+    @property
+    def bonus_details(self) -> str:
+        return self.group.bonus_details
+
+# Admin grid: (task_date, task_num) keyset per filter shape, deleted rows included unless noted; see migration 0014.
+Index("ix_tasks_company_date_num", Task.company_id, Task.task_date, Task.task_num)
+Index("ix_tasks_company_user_date_num", Task.company_id, Task.assigned_user_id, Task.task_date, Task.task_num)
+Index("ix_tasks_company_status_date_num", Task.company_id, Task.status, Task.task_date, Task.task_num,
+      postgresql_where=Task.deleted_at.is_(None))
+Index("ix_tasks_date_num", Task.task_date, Task.task_num)
+Index("ix_tasks_company_user_xid_seq", Task.company_id, Task.assigned_user_id, Task.updated_xid, Task.updated_seq)
+Index("ix_tasks_company_xid_seq", Task.company_id, Task.updated_xid, Task.updated_seq)
+# Live-row indexes in list order (task_date, task_time NULLS LAST, category, task_num); see migration 0013.
+Index("ix_tasks_user_window", Task.company_id, Task.assigned_user_id, Task.task_date, Task.task_time, Task.category, Task.task_num,
+      postgresql_where=Task.deleted_at.is_(None))
+Index("ix_tasks_company_window", Task.company_id, Task.task_date, Task.task_time, Task.category, Task.task_num,
+      postgresql_where=Task.deleted_at.is_(None))
+Index("ix_tasks_live_date_num", Task.task_date, Task.task_num, postgresql_where=Task.deleted_at.is_(None))
+Index("ix_tasks_open_due", Task.assigned_user_id, Task.company_id, Task.task_date,
+      postgresql_where=(Task.deleted_at.is_(None)) & (Task.status == TaskStatus.todo))
+# One materialized occurrence per (series, assignee, date); makes materialization idempotent.
+Index(
+    "uq_tasks_recurrence_user_date",
+    Task.recurrence_id, Task.assigned_user_id, Task.task_date,
+    unique=True,
+    postgresql_where=Task.recurrence_id.isnot(None),
+)
+
+
+class TaskRecurrence(Base):
+    """A recurring task series: an RRULE-style rule (see app.recurrence), a task template and assignees.
+
+    Occurrences are only materialized as Task rows inside the window the list endpoints read
+    (crud.RECURRENCE_DAYS_BACK .. crud.RECURRENCE_DAYS_AHEAD around today); `python -m app.manage
+    recurrences materialize` rolls that window forward.
+    """
+
+    __tablename__ = "task_recurrences"
 
-Index("ix_tasks_company_user_date", Task.company_id, Task.assigned_user_id, Task.task_date)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    company_id: Mapped[int] = mapped_column(ForeignKey("companies.id", ondelete="CASCADE"), index=True)
+
+    rule: Mapped[str] = mapped_column(String(200))
+    dtstart: Mapped[date] = mapped_column(Date)
+    task_time: Mapped[time | None] = mapped_column(Time, nullable=True)
+
+    # Template copied onto each materialized Task.
+    category: Mapped[str] = mapped_column(String(60), default="general")
+    title: Mapped[str] = mapped_column(String(200))
+    maps_url: Mapped[str] = mapped_column(String(500), default="")
+    patient_id: Mapped[int | None] = mapped_column(ForeignKey("patients.id", ondelete="SET NULL"), nullable=True)
+    patient_name: Mapped[str] = mapped_column(String(190), default="")
+    patient_address: Mapped[str] = mapped_column(String(500), default="")
+    patient_phone: Mapped[str] = mapped_column(String(80), default="")
+    bonus_details: Mapped[str] = mapped_column(Text, default="")
+
+    active: Mapped[bool] = mapped_column(Boolean, default=True)
+    # Last date occurrences have been materialized up to (inclusive).
+    materialized_through: Mapped[date | None] = mapped_column(Date, nullable=True)
+
+    created_by_user_id: Mapped[int | None] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    company = relationship("Company")
+    assignees = relationship("TaskRecurrenceAssignee", cascade="all, delete-orphan")
+
+
+class TaskRecurrenceAssignee(Base):
+    __tablename__ = "task_recurrence_assignees"
+
+    recurrence_id: Mapped[int] = mapped_column(ForeignKey("task_recurrences.id", ondelete="CASCADE"), primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
 
 
 class PushSubscription(Base):
@@ -190,19 +322,73 @@ class AuditAction(str, enum.Enum):
     FORCE_DONE_TASK = "FORCE_DONE_TASK"
     UNFORCE_DONE_TASK = "UNFORCE_DONE_TASK"
 
+class UserAgent(Base):
+    """Interned User-Agent strings referenced by audit_logs.user_agent_id (see app.audit)."""
+    __tablename__ = "user_agents"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    value: Mapped[str] = mapped_column(String(300), unique=True)
+
+
+class ClientIp(Base):
+    """Interned client addresses referenced by audit_logs.ip_id (see app.audit)."""
+    __tablename__ = "client_ips"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    value: Mapped[str] = mapped_column(String(80), unique=True)
+
+
 class AuditLog(Base):
     __tablename__ = "audit_logs"
+    # Partitioned by month on timestamp (migration 0016); the table's primary key is (id, timestamp),
+    # ids still come from a single sequence, so the mapper keys on id alone.
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    timestamp: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+    timestamp: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
-    actor_user_id: Mapped[int | None] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
-    action: Mapped[AuditAction] = mapped_column(Enum(AuditAction), index=True)
+    actor_user_id: Mapped[int | None] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    action: Mapped[AuditAction] = mapped_column(Enum(AuditAction))
 
     target_user_id: Mapped[int | None] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
-    company_id: Mapped[int | None] = mapped_column(ForeignKey("companies.id", ondelete="SET NULL"), nullable=True, index=True)
-    task_id: Mapped[int | None] = mapped_column(ForeignKey("tasks.id", ondelete="SET NULL"), nullable=True, index=True)
-
-    ip: Mapped[str] = mapped_column(String(80), default="")
-    user_agent: Mapped[str] = mapped_column(String(300), default="")
+    company_id: Mapped[int | None] = mapped_column(ForeignKey("companies.id", ondelete="SET NULL"), nullable=True)
+    task_id: Mapped[int | None] = mapped_column(ForeignKey("tasks.id", ondelete="SET NULL"), nullable=True)
+
+    # NULL for an empty ip / user agent.
+    ip_id: Mapped[int | None] = mapped_column(ForeignKey("client_ips.id"), nullable=True)
+    user_agent_id: Mapped[int | None] = mapped_column(ForeignKey("user_agents.id"), nullable=True)
+    client_ip = relationship("ClientIp", lazy="joined")
+    client_user_agent = relationship("UserAgent", lazy="joined")
     # Keep metadata minimal; do NOT store PHI / full task details here.
-    meta: Mapped[str] = mapped_column(Text, default="{}")
\ No newline at end of file
+    meta: Mapped[str] = mapped_column(Text, default="{}")
+    # Redis stream entry id for rows moved in by audit.drain(); NULL otherwise (migration 0018).
+    stream_id: Mapped[str | None] = mapped_column(String(40), nullable=True)
+
+    @property
+    def ip(self) -> str:
+        return self.client_ip.value if self.client_ip else ""
+
+    @property
+    def user_agent(self) -> str:
+        return self.client_user_agent.value if self.client_user_agent else ""
+
+    # Keyset (timestamp, id) listing, optionally under one equality filter; see migration 0015.
+    __table_args__ = (
+        Index("ix_audit_logs_timestamp_id", "timestamp", "id"),
+        Index("ix_audit_logs_actor_user_id_timestamp_id", "actor_user_id", "timestamp", "id"),
+        Index("ix_audit_logs_action_timestamp_id", "action", "timestamp", "id"),
+        Index("ix_audit_logs_company_id_timestamp_id", "company_id", "timestamp", "id"),
+        Index("ix_audit_logs_task_id_timestamp_id", "task_id", "timestamp", "id"),
+        Index("uq_audit_logs_stream_id", "stream_id", "timestamp", unique=True, postgresql_where=text("stream_id IS NOT NULL")),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
+
+class TaskDueCounter(Base):
+    """Denormalized count of open (todo, not deleted) tasks per (user, company, task_date).
+
+    Read model for the /api/companies due badges; maintained by the task write paths in crud.py
+    and checked against `tasks` with `python -m app.manage due-counters verify`.
+    """
+
+    __tablename__ = "task_due_counters"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    company_id: Mapped[int] = mapped_column(ForeignKey("companies.id", ondelete="CASCADE"), primary_key=True)
+    task_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    open_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
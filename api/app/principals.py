@@ -0,0 +1,111 @@
+"""Cached session principals for get_principal (the auth fast path).
+
+A verified session token maps to a Principal (a frozen snapshot of the user's auth fields)
+in a per-process TTL cache. Every cache hit is checked against the user's revocation epoch in Redis.
+disable_user, set_role, reset_password and change_password bump the epoch after commit via
+revoke(), and the next request in any worker then reloads the user from the database. If
+Redis is unreachable, a cached principal is trusted until its AUTH_CACHE_TTL_SECONDS runs out.
+Entries are never extended, so that TTL bounds how long a revoked session can live.
+"""
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.metacache import TTLCache
+from app.models import Role, User
+from app.redis_client import get_redis
+from app.security import decode_token
+from app.settings import settings
+
+_PENDING_KEY = "pending_auth_revocations"
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Read-only stand-in for User on endpoints that only need who the caller is."""
+    id: int
+    username: str
+    display_name: str
+    role: Role
+    must_change_password: bool
+    disabled: bool
+
+
+_cache = TTLCache(settings.auth_cache_size, settings.auth_cache_ttl_seconds)  # token digest -> (Principal, epoch)
+
+
+def _epoch_key(user_id: int) -> str:
+    return f"{settings.auth_epoch_prefix}:{user_id}"
+
+
+def _read_epoch(user_id: int) -> int | None:
+    try:
+        return int(get_redis().get(_epoch_key(user_id)) or 0)
+    except Exception:
+        return None
+
+
+def principal_for_token(db: Session, token: str) -> Principal | None:
+    """Principal for a session token, or None when the token is invalid or the user is gone/disabled."""
+    digest = hashlib.sha256(token.encode()).hexdigest()
+    cached = _cache.get(digest)
+    if cached is not TTLCache._MISSING:
+        principal, epoch = cached
+        current = _read_epoch(principal.id)
+        if current is None or current == epoch:
+            return principal
+        _cache.discard(digest)
+
+    payload = decode_token(token)
+    if not payload:
+        return None
+    user_id = int(payload.get("sub", "0") or "0")
+    # Epoch before the row: a revocation racing this load leaves a stale epoch, so the next hit reloads.
+    epoch = _read_epoch(user_id)
+    user = db.get(User, user_id)
+    if not user or user.disabled:
+        return None
+    principal = Principal(
+        id=user.id,
+        username=user.username,
+        display_name=user.display_name,
+        role=user.role,
+        must_change_password=user.must_change_password,
+        disabled=user.disabled,
+    )
+    if epoch is not None:
+        _cache.put(digest, (principal, epoch))
+    return principal
+
+
+def revoke(db: Session, user_id: int) -> None:
+    """Invalidate every cached principal of `user_id` once `db` commits."""
+    db.info.setdefault(_PENDING_KEY, set()).add(user_id)
+
+
+def stats() -> dict:
+    return _cache.stats()
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_after_commit(db: Session):
+    user_ids = db.info.pop(_PENDING_KEY, None)
+    if not user_ids:
+        return
+    _cache.discard_where(lambda v: v[0].id in user_ids)
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for uid in user_ids:
+            pipe.incr(_epoch_key(uid))
+        pipe.execute()
+    except Exception:
+        pass  # other workers drop the principal when its TTL runs out
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_after_rollback(db: Session):
+    db.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,104 @@
+"""Small RRULE subset used by recurring tasks.
+
+Supported parts (RFC 5545 names):
+    FREQ=DAILY|WEEKLY|MONTHLY   (required)
+    INTERVAL=n                  (default 1)
+    BYDAY=MO,TU,...             (WEEKLY only; default: weekday of dtstart)
+    COUNT=n  or  UNTIL=YYYYMMDD
+
+MONTHLY repeats on dtstart's day of month and skips months that don't have it.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+WEEKDAYS = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+FREQS = ("DAILY", "WEEKLY", "MONTHLY")
+
+
+@dataclass(frozen=True)
+class Rule:
+    freq: str
+    interval: int = 1
+    byday: tuple[int, ...] = ()
+    count: int | None = None
+    until: date | None = None
+
+
+def parse_rule(rule: str) -> Rule:
+    parts: dict[str, str] = {}
+    for chunk in (rule or "").strip().removeprefix("RRULE:").split(";"):
+        if not chunk.strip():
+            continue
+        if "=" not in chunk:
+            raise ValueError(f"Invalid rule part '{chunk}'")
+        k, v = chunk.split("=", 1)
+        parts[k.strip().upper()] = v.strip().upper()
+
+    unknown = set(parts) - {"FREQ", "INTERVAL", "BYDAY", "COUNT", "UNTIL"}
+    if unknown:
+        raise ValueError(f"Unsupported rule parts: {sorted(unknown)}")
+
+    freq = parts.get("FREQ", "")
+    if freq not in FREQS:
+        raise ValueError(f"FREQ must be one of {list(FREQS)}")
+
+    try:
+        interval = int(parts.get("INTERVAL", "1"))
+        count = int(parts["COUNT"]) if "COUNT" in parts else None
+        until = datetime.strptime(parts["UNTIL"][:8], "%Y%m%d").date() if "UNTIL" in parts else None
+    except ValueError:
+        raise ValueError("Invalid INTERVAL/COUNT/UNTIL value")
+    if interval < 1 or (count is not None and count < 1):
+        raise ValueError("INTERVAL and COUNT must be positive")
+    if count is not None and until is not None:
+        raise ValueError("COUNT and UNTIL are mutually exclusive")
+
+    byday: tuple[int, ...] = ()
+    if "BYDAY" in parts:
+        if freq != "WEEKLY":
+            raise ValueError("BYDAY is only supported with FREQ=WEEKLY")
+        try:
+            byday = tuple(sorted({WEEKDAYS.index(d.strip()) for d in parts["BYDAY"].split(",") if d.strip()}))
+        except ValueError:
+            raise ValueError(f"BYDAY must use {WEEKDAYS}")
+
+    return Rule(freq=freq, interval=interval, byday=byday, count=count, until=until)
+
+
+def _iter_dates(rule: Rule, dtstart: date):
+    if rule.freq == "DAILY":
+        d = dtstart
+        while True:
+            yield d
+            d += timedelta(days=rule.interval)
+    elif rule.freq == "WEEKLY":
+        days = rule.byday or (dtstart.weekday(),)
+        week = dtstart - timedelta(days=dtstart.weekday())
+        while True:
+            for wd in days:
+                d = week + timedelta(days=wd)
+                if d >= dtstart:
+                    yield d
+            week += timedelta(weeks=rule.interval)
+    else:
+        y, m = dtstart.year, dtstart.month
+        while True:
+            try:
+                yield date(y, m, dtstart.day)
+            except ValueError:
+                pass  # e.g. the 31st in a 30-day month
+            m += rule.interval
+            y, m = y + (m - 1) // 12, (m - 1) % 12 + 1
+
+
+def occurrences(rule: Rule, dtstart: date, start: date, end: date) -> list[date]:
+    """Occurrence dates of `rule` (anchored at dtstart) that fall within [start, end]."""
+    out: list[date] = []
+    for n, d in enumerate(_iter_dates(rule, dtstart), start=1):
+        if d > end or (rule.until and d > rule.until) or (rule.count and n > rule.count):
+            break
+        if d >= start:
+            out.append(d)
+    return out
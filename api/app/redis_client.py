@@ -0,0 +1,65 @@
+"""Process-wide Redis clients (connection pools): a sync one for threadpool code and an asyncio one for async endpoints.
+
+The response cache gets its own pair (CACHE_REDIS_URL): that instance evicts freely, the main one must not.
+"""
+from __future__ import annotations
+
+import redis as redis_lib
+import redis.asyncio as aioredis
+
+from app.settings import settings
+
+_client: redis_lib.Redis | None = None
+_async_client: aioredis.Redis | None = None
+_cache_client: redis_lib.Redis | None = None
+_async_cache_client: aioredis.Redis | None = None
+
+
+def get_redis() -> redis_lib.Redis:
+    global _client
+    if _client is None:
+        _client = redis_lib.Redis.from_url(
+            settings.redis_url,
+            decode_responses=True,
+            # Redis is an optimization on the request path: fail fast rather than hang a worker.
+            socket_connect_timeout=1,
+            socket_timeout=1,
+        )
+    return _client
+
+
+def get_async_redis() -> aioredis.Redis:
+    # One event loop per API worker, so one client per process is enough.
+    global _async_client
+    if _async_client is None:
+        _async_client = aioredis.Redis.from_url(
+            settings.redis_url,
+            decode_responses=True,
+            socket_connect_timeout=1,
+            socket_timeout=1,
+        )
+    return _async_client
+
+
+def get_cache_redis() -> redis_lib.Redis:
+    global _cache_client
+    if _cache_client is None:
+        _cache_client = redis_lib.Redis.from_url(
+            settings.cache_redis_url or settings.redis_url,
+            decode_responses=True,
+            socket_connect_timeout=1,
+            socket_timeout=1,
+        )
+    return _cache_client
+
+
+def get_async_cache_redis() -> aioredis.Redis:
+    global _async_cache_client
+    if _async_cache_client is None:
+        _async_cache_client = aioredis.Redis.from_url(
+            settings.cache_redis_url or settings.redis_url,
+            decode_responses=True,
+            socket_connect_timeout=1,
+            socket_timeout=1,
+        )
+    return _async_cache_client
@@ -0,0 +1,97 @@
+"""Read-replica routing: lag monitor plus the per-request "may this read use the replica?" decision.
+
+A background thread (start_monitor()) measures replication lag every REPLICA_LAG_CHECK_SECONDS.
+Reads go to the replica only while the last measurement is fresh and under REPLICA_MAX_LAG_SECONDS;
+otherwise they fall back to the primary.
+
+Read-your-writes: every successful write request gets a short-lived STICKY_COOKIE
+(mark_write(), from the middleware in app.main). While that cookie is present, the client's reads
+stay on the primary, so it never sees its own change disappear.
+"""
+from __future__ import annotations
+
+import threading
+import time
+
+from sqlalchemy import text
+
+from app.db.session import replica_engine
+from app.settings import settings
+
+STICKY_COOKIE = "taskflow_primary"
+
+# 0 on the primary itself or on a standby that has replayed everything it received; otherwise the
+# age of the last replayed transaction.
+_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+_state = {"lag_seconds": None, "checked_at": None, "error": None, "replica_reads": 0, "primary_reads": 0}
+_monitor: threading.Thread | None = None
+
+
+def configured() -> bool:
+    return replica_engine is not None
+
+
+def healthy() -> bool:
+    """Replica reachable, recently measured, and within the lag budget."""
+    lag, checked = _state["lag_seconds"], _state["checked_at"]
+    if not configured() or lag is None or checked is None:
+        return False
+    if time.monotonic() - checked > 3 * settings.replica_lag_check_seconds:
+        return False  # monitor stalled; don't trust an old measurement
+    return lag <= settings.replica_max_lag_seconds
+
+
+def use_replica(request) -> bool:
+    """Routing decision for one read-only request (counted for stats())."""
+    ok = healthy() and STICKY_COOKIE not in request.cookies
+    _state["replica_reads" if ok else "primary_reads"] += 1
+    return ok
+
+
+def mark_write(response) -> None:
+    """Pin the client's reads to the primary for the sticky window."""
+    response.set_cookie(STICKY_COOKIE, "1", max_age=settings.replica_sticky_seconds, httponly=True,
+                        secure=settings.cookie_secure, samesite="lax", path="/")
+
+
+def stats() -> dict:
+    return {
+        "configured": configured(),
+        "healthy": healthy(),
+        "lag_seconds": _state["lag_seconds"],
+        "max_lag_seconds": settings.replica_max_lag_seconds,
+        "error": _state["error"],
+        "replica_reads": _state["replica_reads"],  # this worker only
+        "primary_reads": _state["primary_reads"],
+    }
+
+
+def measure_lag() -> float:
+    with replica_engine.connect() as conn:
+        return float(conn.execute(_LAG_SQL).scalar_one())
+
+
+def _monitor_loop():
+    while True:
+        try:
+            _state["lag_seconds"] = measure_lag()
+            _state["error"] = None
+        except Exception as e:
+            _state["lag_seconds"] = None
+            _state["error"] = str(e)
+        _state["checked_at"] = time.monotonic()
+        time.sleep(settings.replica_lag_check_seconds)
+
+
+def start_monitor() -> None:
+    """Start the lag monitor (once per process; no-op without DATABASE_REPLICA_URL)."""
+    global _monitor
+    if configured() and (_monitor is None or not _monitor.is_alive()):
+        _monitor = threading.Thread(target=_monitor_loop, name="replica-lag", daemon=True)
+        _monitor.start()
@@ -47,6 +47,23 @@ class TaskListItem(BaseModel):
     task_time: time | None = None
     status: str
 
+class TaskChangeItem(BaseModel):
+    task_code: str
+    deleted: bool = False
+    # Omitted for tombstones.
+    title: str | None = None
+    category: str | None = None
+    task_date: date | None = None
+    task_time: time | None = None
+    status: str | None = None
+
+class TaskChangesOut(BaseModel):
+    cursor: str
+    has_more: bool
+    # The list window moved to a new day: reload the full list and continue from its X-Tasks-Cursor.
+    resync: bool = False
+    changes: list[TaskChangeItem]
+
 class TaskDetailOut(BaseModel):
     task_code: str
     company_slug: str
@@ -66,6 +83,22 @@ class TaskDetailOut(BaseModel):
 class MarkDoneIn(BaseModel):
     done: bool
 
+class TaskStatusBatchItemIn(BaseModel):
+    task_code: str
+    done: bool
+    client_ts: datetime  # when the toggle happened on the device
+
+class TaskStatusBatchIn(BaseModel):
+    items: list[TaskStatusBatchItemIn] = Field(max_length=500)
+
+class TaskStatusBatchResult(BaseModel):
+    task_code: str
+    result: str  # applied | conflict | superseded | not_found | forbidden
+    status: str | None = None  # task status after the batch, when known
+
+class TaskStatusBatchOut(BaseModel):
+    results: list[TaskStatusBatchResult]
+
 # Admin
 class AdminCreateUserIn(BaseModel):
     username: str
@@ -75,6 +108,19 @@ class AdminCreateUserIn(BaseModel):
     password: str = Field(min_length=10, max_length=200)
     company_slugs: list[str] = []
 
+# Bulk provisioning: rows are validated one by one (per-row errors), so the body isn't a model.
+class AdminBulkUserResult(BaseModel):
+    row: int  # 1-based position in the JSON list / CSV data rows
+    username: str
+    ok: bool
+    id: int | None = None
+    error: str | None = None
+
+class AdminBulkUsersOut(BaseModel):
+    created: int
+    failed: int
+    results: list[AdminBulkUserResult]
+
 class AdminUserOut(BaseModel):
     id: int
     username: str
@@ -114,6 +160,65 @@ class AdminTaskBulkCreateIn(BaseModel):
     patient_phone: str = ""
     bonus_details: str = ""
 
+class TaskSlotIn(BaseModel):
+    task_date: date
+    task_time: time | None = None
+
+class AdminTaskMatrixCreateIn(BaseModel):
+    """Every slot x every assignee becomes one task (e.g. a two-week rotation in one call)."""
+    company_slug: str
+    assignee_user_ids: list[int]
+    slots: list[TaskSlotIn] = Field(min_length=1)
+    category: str = "general"  # must be a category defined for the company
+    title: str
+    maps_url: str = ""
+    patient_id: int | None = None
+    patient_name: str = ""
+    patient_address: str = ""
+    patient_phone: str = ""
+    bonus_details: str = ""
+
+class AdminRecurrenceIn(BaseModel):
+    company_slug: str
+    rule: str  # RRULE subset, e.g. "FREQ=WEEKLY;BYDAY=MO,WE,FR" (see app.recurrence)
+    dtstart: date
+    task_time: time | None = None
+    assignee_user_ids: list[int]
+    category: str = "general"
+    title: str
+    maps_url: str = ""
+    patient_id: int | None = None
+    patient_name: str = ""
+    patient_address: str = ""
+    patient_phone: str = ""
+    bonus_details: str = ""
+
+class AdminRecurrenceUpdateIn(BaseModel):
+    rule: str | None = None
+    dtstart: date | None = None
+    task_time: time | None = None
+    assignee_user_ids: list[int] | None = None
+    active: bool | None = None
+    category: str | None = None
+    title: str | None = None
+    maps_url: str | None = None
+    patient_id: int | None = None
+    patient_name: str | None = None
+    patient_address: str | None = None
+    patient_phone: str | None = None
+    bonus_details: str | None = None
+
+class RecurrenceOut(BaseModel):
+    id: int
+    rule: str
+    dtstart: date
+    task_time: time | None = None
+    category: str
+    title: str
+    active: bool
+    assignee_user_ids: list[int] = []
+    materialized_through: date | None = None
+
 
 class AdminCompanyOut(BaseModel):
     id: int
@@ -7,17 +7,23 @@ from passlib.context import CryptContext
 from fastapi import Request
 
 from app.settings import settings
+from app import hashing
 
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 
 ALGO = "HS256"
 TOKEN_TTL_MINUTES = 90 * 24 * 60  # 90 days (≈3 months)
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+# Both run on the bounded hashing pool (app.hashing) and may raise HashingBusy; await them from async endpoints.
+async def hash_password(password: str) -> str:
+    return await hashing.run(pwd_context.hash, password)
 
-def verify_password(password: str, hashed: str) -> bool:
-    return pwd_context.verify(password, hashed)
+async def verify_password(password: str, hashed: str) -> bool:
+    return await hashing.run(pwd_context.verify, password, hashed)
+
+async def hash_passwords(passwords: list[str]) -> list[str]:
+    """Hash many passwords in parallel (bulk provisioning)."""
+    return await hashing.map_parallel(pwd_context.hash, passwords)
 
 def create_token(user_id: int, role: str) -> str:
     now = datetime.now(timezone.utc)
@@ -45,3 +51,12 @@ def client_ip(request: Request) -> str:
     if xf:
         return xf.split(",")[0].strip()
     return request.client.host if request.client else ""
+
+def peer_ip(request: Request) -> str:
+    """Address the request reached our proxy from: the last X-Forwarded-For hop (appended by nginx
+    in the web container, see web/nginx.conf), else the socket peer. Unlike client_ip(), the caller
+    can't choose it, so use this for anything security-relevant such as rate limits."""
+    xf = request.headers.get("x-forwarded-for")
+    if xf:
+        return xf.rsplit(",", 1)[-1].strip()
+    return request.client.host if request.client else ""
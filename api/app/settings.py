@@ -7,6 +7,26 @@ class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=None)
 
     database_url: str = Field(alias="DATABASE_URL")
+
+    # Connection pool per engine and per worker process; size against max_connections (or PgBouncer's
+    # pool) as workers x engines x (DB_POOL_SIZE + DB_MAX_OVERFLOW). DB_POOL_RECYCLE=-1 disables recycling.
+    # With DB_POOL_PRE_PING off, every checkout saves a round trip, and DB_POOL_RECYCLE bounds how stale an
+    # idle connection can get.
+    db_pool_size: int = Field(default=5, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=10, alias="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(default=30.0, alias="DB_POOL_TIMEOUT")
+    db_pool_recycle: int = Field(default=1800, alias="DB_POOL_RECYCLE")
+    db_pool_pre_ping: bool = Field(default=True, alias="DB_POOL_PRE_PING")
+    # DATABASE_URL points at PgBouncer in transaction-pooling mode: no server-side prepared statements.
+    db_pgbouncer: bool = Field(default=False, alias="DB_PGBOUNCER")
+
+    # Optional streaming replica for read-only endpoints (empty = everything on the primary).
+    # Reads fall back to the primary while the measured lag exceeds REPLICA_MAX_LAG_SECONDS, and for
+    # REPLICA_STICKY_SECONDS after the client's own write (read-your-writes).
+    database_replica_url: str = Field(default="", alias="DATABASE_REPLICA_URL")
+    replica_max_lag_seconds: float = Field(default=5.0, alias="REPLICA_MAX_LAG_SECONDS")
+    replica_sticky_seconds: int = Field(default=10, alias="REPLICA_STICKY_SECONDS")
+    replica_lag_check_seconds: float = Field(default=2.0, alias="REPLICA_LAG_CHECK_SECONDS")
     jwt_secret: str = Field(default="change-me", alias="JWT_SECRET")
 
     cookie_secure: bool = Field(default=False, alias="COOKIE_SECURE")
@@ -24,6 +44,57 @@ class Settings(BaseSettings):
     redis_url: str = Field(default="redis://redis:6379/0", alias="REDIS_URL")
     push_queue_key: str = Field(default="taskflow:push:queue", alias="PUSH_QUEUE_KEY")
 
+    # Live task events (/api/events): Redis pub/sub channel prefix, per-stream backlog, keep-alive interval.
+    events_channel: str = Field(default="taskflow:events", alias="EVENTS_CHANNEL")
+    events_queue_size: int = Field(default=100, alias="EVENTS_QUEUE_SIZE")
+    events_keepalive_seconds: int = Field(default=20, alias="EVENTS_KEEPALIVE_SECONDS")
+
+    # Shared response cache for task-list windows. Keys are versioned, so the TTL only bounds how long
+    # superseded entries linger. It lives on its own Redis (allkeys-lru) so filling it can never evict or
+    # block the queue/stream/epoch keys on REDIS_URL; empty = share REDIS_URL (dev only).
+    cache_redis_url: str = Field(default="", alias="CACHE_REDIS_URL")
+    cache_enabled: bool = Field(default=True, alias="CACHE_ENABLED")
+    cache_ttl_seconds: int = Field(default=300, alias="CACHE_TTL_SECONDS")
+    cache_prefix: str = Field(default="taskflow:cache", alias="CACHE_PREFIX")
+
+    # Per-process metadata cache (company by slug, memberships, categories); invalidated over pub/sub.
+    meta_cache_ttl_seconds: int = Field(default=60, alias="META_CACHE_TTL_SECONDS")
+    meta_cache_size: int = Field(default=2048, alias="META_CACHE_SIZE")
+    meta_cache_channel: str = Field(default="taskflow:meta-invalidate", alias="META_CACHE_CHANNEL")
+
+    # Auth fast path: cached principals per worker, revoked through a per-user epoch in Redis.
+    # The TTL is the upper bound on how long a disabled user/role change can go unnoticed when Redis is down.
+    auth_cache_ttl_seconds: int = Field(default=60, alias="AUTH_CACHE_TTL_SECONDS")
+    auth_cache_size: int = Field(default=4096, alias="AUTH_CACHE_SIZE")
+    auth_epoch_prefix: str = Field(default="taskflow:auth:epoch", alias="AUTH_EPOCH_PREFIX")
+
+    # argon2 hashing pool (0 = one worker per CPU) and how many more calls may wait before 503.
+    hash_workers: int = Field(default=0, alias="HASH_WORKERS")
+    hash_queue_limit: int = Field(default=16, alias="HASH_QUEUE_LIMIT")
+
+    # Login throttles (failed attempts per window, kept in Redis), checked before any hashing.
+    login_window_seconds: int = Field(default=900, alias="LOGIN_WINDOW_SECONDS")
+    login_max_failures_per_ip: int = Field(default=50, alias="LOGIN_MAX_FAILURES_PER_IP")
+    login_max_failures_per_username: int = Field(default=10, alias="LOGIN_MAX_FAILURES_PER_USERNAME")
+
+    # Audit sink: "db" writes audit rows in the request transaction; "redis" appends them to a stream after
+    # commit for `python -m app.manage audit drain` to COPY in (credential/role changes stay transactional).
+    audit_sink: str = Field(default="db", alias="AUDIT_SINK")
+    audit_stream_key: str = Field(default="taskflow:audit", alias="AUDIT_STREAM_KEY")
+    audit_drain_batch: int = Field(default=5000, alias="AUDIT_DRAIN_BATCH")
+    # Entries another drainer took but hasn't acked for this long are claimed (it likely died). After
+    # AUDIT_DRAIN_MAX_DELIVERIES failed deliveries an entry moves to the AUDIT_DEAD_LETTER_KEY stream.
+    audit_drain_claim_idle_seconds: int = Field(default=60, alias="AUDIT_DRAIN_CLAIM_IDLE_SECONDS")
+    audit_drain_max_deliveries: int = Field(default=5, alias="AUDIT_DRAIN_MAX_DELIVERIES")
+    audit_dead_letter_key: str = Field(default="taskflow:audit:dead", alias="AUDIT_DEAD_LETTER_KEY")
+    # Per-process LRU of interned ip / user-agent string -> id (user_agents, client_ips tables).
+    audit_client_cache_size: int = Field(default=4096, alias="AUDIT_CLIENT_CACHE_SIZE")
+    # audit_logs is partitioned by month; `audit maintain` creates AUDIT_PARTITIONS_AHEAD months ahead and
+    # moves months older than AUDIT_RETENTION_MONTHS to gzip NDJSON files in AUDIT_ARCHIVE_DIR.
+    audit_archive_dir: str = Field(default="/data/audit-archive", alias="AUDIT_ARCHIVE_DIR")
+    audit_retention_months: int = Field(default=12, alias="AUDIT_RETENTION_MONTHS")
+    audit_partitions_ahead: int = Field(default=2, alias="AUDIT_PARTITIONS_AHEAD")
+
     bootstrap_root_username: str = Field(default="root", alias="BOOTSTRAP_ROOT_USERNAME")
     bootstrap_write_path: str = Field(default="/data/bootstrap_superadmin.txt", alias="BOOTSTRAP_WRITE_PATH")
 
@@ -0,0 +1,52 @@
+"""Login throttles: failed attempts per client IP and per username, counted in Redis.
+
+Checked before the user lookup and password hash, so a brute-force run costs one Redis round trip
+per attempt instead of an argon2 verify. Counters are fixed windows (LOGIN_WINDOW_SECONDS) that start
+at the first failure. If Redis is unavailable, logins are allowed (the hashing pool still bounds load).
+"""
+from __future__ import annotations
+
+from app.redis_client import get_redis
+from app.settings import settings
+
+
+def _keys(ip: str, username: str) -> tuple[str, str]:
+    return f"taskflow:login:ip:{ip}", f"taskflow:login:user:{username.strip().lower()}"
+
+
+def login_retry_after(ip: str, username: str) -> int | None:
+    """Seconds until the caller may try again, or None when the attempt is allowed."""
+    ip_key, user_key = _keys(ip, username)
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.get(ip_key)
+        pipe.ttl(ip_key)
+        pipe.get(user_key)
+        pipe.ttl(user_key)
+        ip_n, ip_ttl, user_n, user_ttl = pipe.execute()
+    except Exception:
+        return None
+    waits = []
+    if int(ip_n or 0) >= settings.login_max_failures_per_ip:
+        waits.append(ip_ttl)
+    if int(user_n or 0) >= settings.login_max_failures_per_username:
+        waits.append(user_ttl)
+    return max(max(waits), 1) if waits else None
+
+
+def record_login_failure(ip: str, username: str) -> None:
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for key in _keys(ip, username):
+            pipe.incr(key)
+            pipe.expire(key, settings.login_window_seconds, nx=True)
+        pipe.execute()
+    except Exception:
+        pass
+
+
+def clear_login_failures(username: str) -> None:
+    try:
+        get_redis().delete(_keys("", username)[1])
+    except Exception:
+        pass
@@ -0,0 +1,112 @@
+"""Write-endpoint latency (p50/p95/p99) with the configured audit sink, to compare AUDIT_SINK=db and =redis.
+
+Two kinds of clients run side by side for --duration seconds:
+  * employees toggling their own task done/undone (one COMPLETE/UNCOMPLETE_TASK row per request);
+  * admins re-saving a user's memberships across --companies companies (one ASSIGN_COMPANY row per
+    company per request, the audit-heaviest common write).
+The sink is server configuration, so run once per mode and compare:
+
+    AUDIT_SINK=db    -> python scripts/bench_audit_sink.py --json db.json
+    AUDIT_SINK=redis -> python scripts/bench_audit_sink.py --compare db.json
+
+With the redis sink the audit-drain service must be running, or the stream just grows.
+"""
+from __future__ import annotations
+
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import httpx
+
+import benchlib
+
+
+def setup(args, api: httpx.Client) -> tuple[str, list[str], list[tuple[str, str]], list[int]]:
+    """(company, membership slugs, (token, task code) per employee client, target user id per admin client)."""
+    prefix = benchlib.run_prefix("audit")
+    company = benchlib.create_company(api, prefix)
+    slugs = [company] + [benchlib.create_company(api, f"{prefix}-m{i}") for i in range(args.companies - 1)]
+    staff = benchlib.create_employees(api, prefix, args.employee_clients, company)
+    codes = benchlib.create_tasks(api, company, [u["id"] for u in staff], date.today(), "bench audit")
+    sessions = [(benchlib.login(args.base_url, u["username"], benchlib.EMPLOYEE_PASSWORD), code)
+                for u, code in zip(staff, codes)]
+    targets = [u["id"] for u in benchlib.create_employees(api, f"{prefix}-t", args.admin_clients, company)]
+    return company, slugs, sessions, targets
+
+
+def employee_loop(base_url: str, token: str, company: str, code: str, until: float) -> tuple[list[float], int]:
+    latencies, errors, done = [], 0, True
+    with benchlib.client(base_url, token, timeout=60) as api:
+        while time.perf_counter() < until:
+            start = time.perf_counter()
+            r = api.post(f"/api/company/{company}/tasks/{code}/done", json={"done": done})
+            if r.status_code == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+            done = not done
+    return latencies, errors
+
+
+def admin_loop(base_url: str, token: str, target: int, slugs: list[str], until: float) -> tuple[list[float], int]:
+    latencies, errors = [], 0
+    with benchlib.client(base_url, token, timeout=60) as api:
+        while time.perf_counter() < until:
+            start = time.perf_counter()
+            r = api.put(f"/api/admin/users/{target}/companies", json={"company_slugs": slugs})
+            if r.status_code == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+    return latencies, errors
+
+
+def active_sink(api: httpx.Client) -> str:
+    try:
+        return api.get("/api/stats/db").json()["audit"]["sink"]
+    except (httpx.HTTPError, KeyError, TypeError, ValueError):
+        return "unknown"
+
+
+def main() -> None:
+    p = benchlib.parser(__doc__.splitlines()[0])
+    p.add_argument("--employee-clients", type=int, default=40, help="concurrent employees toggling tasks")
+    p.add_argument("--admin-clients", type=int, default=8, help="concurrent admins saving memberships")
+    p.add_argument("--companies", type=int, default=10, help="companies per membership save")
+    p.add_argument("--duration", type=float, default=60, help="measured seconds")
+    p.add_argument("--warmup", type=float, default=5, help="unmeasured seconds first")
+    args = p.parse_args()
+
+    admin = benchlib.login(args.base_url, args.username, args.password)
+    with benchlib.client(args.base_url, admin) as api:
+        company, slugs, sessions, targets = setup(args, api)
+        label = args.label or f"AUDIT_SINK={active_sink(api)}"
+
+    workers = len(sessions) + len(targets)
+    with ThreadPoolExecutor(workers) as pool:
+        for seconds in (args.warmup, args.duration):  # the second (measured) pass is what's reported
+            until = time.perf_counter() + seconds
+            start = time.perf_counter()
+            futures = {"task_done": [pool.submit(employee_loop, args.base_url, t, company, c, until) for t, c in sessions],
+                       "user_companies": [pool.submit(admin_loop, args.base_url, admin, t, slugs, until) for t in targets]}
+            latencies, errors = defaultdict(list), defaultdict(int)
+            for name, fs in futures.items():
+                for f in fs:
+                    lat, err = f.result()
+                    latencies[name] += lat
+                    errors[name] += err
+            wall = time.perf_counter() - start
+
+    results = [{"endpoint": name, **benchlib.latency_summary(latencies[name]),
+                "rps": round(len(latencies[name]) / wall, 1), "errors": errors[name]} for name in futures]
+    print(f"{len(sessions)} employee + {len(targets)} admin clients, {args.duration:g}s [{label}]")
+    columns = ["endpoint", "count", "rps", "p50_ms", "p95_ms", "p99_ms", "max_ms", "errors"]
+    columns += benchlib.compare(results, args.compare, "endpoint", "p99_ms")
+    benchlib.print_table(results, columns)
+    benchlib.write_json(args.json_path, label, results)
+
+
+if __name__ == "__main__":
+    main()
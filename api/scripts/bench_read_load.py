@@ -0,0 +1,112 @@
+"""Requests/sec and latency of the hot read endpoints under many concurrent clients (default 500).
+
+Each client is an asyncio loop that, for --duration seconds, cycles through /api/companies, the
+company task list and one task detail as one of --employees logged-in employees, one request at a
+time, with no think time and no If-None-Match (every request does the full work). To compare the
+sync (threadpool) and async paths, run it against a build from before the async port and against
+this one:
+
+    python scripts/bench_read_load.py --label sync --json sync.json      # older build
+    python scripts/bench_read_load.py --label async --compare sync.json  # this build
+
+Start the API with CACHE_ENABLED=false to measure the database path rather than the Redis response
+cache, and keep the same worker count for both runs.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+import httpx
+
+import benchlib
+
+
+def setup(args) -> tuple[str, list[tuple[str, str]]]:
+    """Company slug and one (session token, task code) per employee, each with a week of tasks."""
+    admin = benchlib.login(args.base_url, args.username, args.password)
+    with benchlib.client(args.base_url, admin) as api:
+        prefix = benchlib.run_prefix("read")
+        company = benchlib.create_company(api, prefix)
+        staff = benchlib.create_employees(api, prefix, args.employees, company)
+        ids = [u["id"] for u in staff]
+        codes = []
+        for d in range(7):
+            for _ in range(args.tasks_per_day):
+                codes.append(benchlib.create_tasks(api, company, ids, date.today() + timedelta(days=d), "bench read"))
+    sessions = [(benchlib.login(args.base_url, u["username"], benchlib.EMPLOYEE_PASSWORD), codes[0][i])
+                for i, u in enumerate(staff)]
+    return company, sessions
+
+
+async def client_loop(http: httpx.AsyncClient, paths: list[tuple[str, str]], token: str, until: float,
+                      latencies: dict, errors: dict) -> None:
+    headers = benchlib.session_headers(token)
+    i = 0
+    while time.perf_counter() < until:
+        name, path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            r = await http.get(path, headers=headers)
+            ok = r.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        if ok:
+            latencies[name].append(time.perf_counter() - start)
+        else:
+            errors[name] += 1
+
+
+async def run(args, company: str, sessions: list[tuple[str, str]]) -> list[dict]:
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=httpx.Timeout(60, pool=None)) as http:
+        for seconds in (args.warmup, args.duration):  # the second (measured) pass is what's reported
+            latencies, errors = defaultdict(list), defaultdict(int)
+            until = time.perf_counter() + seconds
+            start = time.perf_counter()
+            loops = []
+            for c in range(args.clients):
+                token, code = sessions[c % len(sessions)]
+                paths = [
+                    ("companies", "/api/companies"),
+                    ("task_list", f"/api/company/{company}/tasks"),
+                    ("task_detail", f"/api/company/{company}/tasks/{code}"),
+                ]
+                loops.append(client_loop(http, paths, token, until, latencies, errors))
+            await asyncio.gather(*loops)
+            wall = time.perf_counter() - start
+
+    results = []
+    for name in ["companies", "task_list", "task_detail"]:
+        results.append({"endpoint": name, **benchlib.latency_summary(latencies[name]),
+                        "rps": round(len(latencies[name]) / wall, 1), "errors": errors[name]})
+    every = [x for v in latencies.values() for x in v]
+    results.append({"endpoint": "all", **benchlib.latency_summary(every),
+                    "rps": round(len(every) / wall, 1), "errors": sum(errors.values())})
+    return results
+
+
+def main() -> None:
+    p = benchlib.parser(__doc__.splitlines()[0])
+    p.add_argument("--clients", type=int, default=500, help="concurrent clients")
+    p.add_argument("--duration", type=float, default=60, help="measured seconds")
+    p.add_argument("--warmup", type=float, default=10, help="unmeasured seconds first")
+    p.add_argument("--employees", type=int, default=20, help="distinct logged-in employees the clients share")
+    p.add_argument("--tasks-per-day", type=int, default=3, help="tasks per employee per day, over a week")
+    args = p.parse_args()
+
+    company, sessions = setup(args)
+    results = asyncio.run(run(args, company, sessions))
+    print(f"{args.clients} clients, {args.duration:g}s" + (f" [{args.label}]" if args.label else ""))
+    columns = ["endpoint", "count", "rps", "p50_ms", "p95_ms", "p99_ms", "max_ms", "errors"]
+    columns += benchlib.compare(results, args.compare, "endpoint", "rps")
+    columns += benchlib.compare(results, args.compare, "endpoint", "p99_ms")
+    benchlib.print_table(results, columns)
+    benchlib.write_json(args.json_path, args.label, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""How many idle /api/events streams one API worker holds, and how fast an event still fans out to them.
+
+Opens SSE streams in steps of --step up to --max, all as the admin (who sees every company's events).
+After each step it creates one task in the benchmark company and times its arrival on every open stream.
+It stops early when more than --max-failures streams fail to open.
+
+Point it at a single uvicorn worker, not nginx, to measure the worker itself, e.g. from inside the
+compose network:
+
+    docker compose exec api python scripts/bench_sse_connections.py --base-url http://localhost:8000 --max 5000
+
+The client needs one file descriptor per stream: raise `ulimit -n` (both sides) above --max.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import date, timedelta
+
+import httpx
+
+import benchlib
+
+
+class Stream:
+    def __init__(self):
+        self.opened = asyncio.Event()
+        self.connect_s: float | None = None
+        self.error: str | None = None
+        self.events: list[float] = []  # perf_counter() of every `event: tasks` received
+
+
+async def hold(client: httpx.AsyncClient, s: Stream) -> None:
+    start = time.perf_counter()
+    try:
+        async with client.stream("GET", "/api/events") as r:
+            r.raise_for_status()
+            async for line in r.aiter_lines():
+                if not s.opened.is_set():  # the server's first line is "retry: ..."
+                    s.connect_s = time.perf_counter() - start
+                    s.opened.set()
+                elif line.startswith("event: tasks"):
+                    s.events.append(time.perf_counter())
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        s.error = f"{type(e).__name__}: {e}"
+    finally:
+        s.opened.set()
+
+
+async def fan_out(streams: list[Stream], api: httpx.Client, company: str, staff: list[int], day: date, timeout: float) -> list[float]:
+    """Create one task and return how long each open stream took to see it."""
+    live = [s for s in streams if s.error is None]
+    seen = [len(s.events) for s in live]
+    t0 = time.perf_counter()
+    await asyncio.to_thread(benchlib.create_tasks, api, company, staff, day, "sse marker")
+    deadline = t0 + timeout
+    while time.perf_counter() < deadline and any(len(s.events) == n for s, n in zip(live, seen)):
+        await asyncio.sleep(0.05)
+    return [s.events[n] - t0 for s, n in zip(live, seen) if len(s.events) > n]
+
+
+async def run(args) -> list[dict]:
+    token = benchlib.login(args.base_url, args.username, args.password)
+    api = benchlib.client(args.base_url, token)
+    prefix = benchlib.run_prefix("sse")
+    company = benchlib.create_company(api, prefix)
+    staff = [u["id"] for u in benchlib.create_employees(api, prefix, 1, company)]
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    timeout = httpx.Timeout(30, read=None, pool=None)
+    streams: list[Stream] = []
+    tasks: list[asyncio.Task] = []
+    results = []
+    async with httpx.AsyncClient(base_url=args.base_url, headers=benchlib.session_headers(token),
+                                 limits=limits, timeout=timeout) as client:
+        try:
+            target = 0
+            while target < args.max:
+                target = min(target + args.step, args.max)
+                new = [Stream() for _ in range(target - len(streams))]
+                streams += new
+                for i in range(0, len(new), args.batch):
+                    batch = new[i:i + args.batch]
+                    tasks += [asyncio.create_task(hold(client, s)) for s in batch]
+                    await asyncio.gather(*(s.opened.wait() for s in batch))
+
+                failed = [s for s in streams if s.error is not None]
+                fan = await fan_out(streams, api, company, staff, date.today() + timedelta(days=len(results) + 1), args.event_timeout)
+                open_now = len(streams) - len(failed)
+                connect = benchlib.latency_summary([s.connect_s for s in new if s.error is None and s.connect_s is not None])
+                delivery = benchlib.latency_summary(fan)
+                results.append({
+                    "streams": len(streams),
+                    "open": open_now,
+                    "failed": len(failed),
+                    "connect_p50_ms": connect.get("p50_ms", ""),
+                    "connect_p99_ms": connect.get("p99_ms", ""),
+                    "delivered": f"{len(fan)}/{open_now}",
+                    "event_p50_ms": delivery.get("p50_ms", ""),
+                    "event_p99_ms": delivery.get("p99_ms", ""),
+                })
+                print(results[-1], flush=True)
+                if len(failed) > args.max_failures:
+                    print(f"stopping: {len(failed)} streams failed, e.g. {failed[0].error}")
+                    break
+        finally:
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            api.close()
+    return results
+
+
+def main() -> None:
+    p = benchlib.parser(__doc__.splitlines()[0])
+    p.add_argument("--max", type=int, default=5000, help="streams to open in total")
+    p.add_argument("--step", type=int, default=500, help="streams added per step")
+    p.add_argument("--batch", type=int, default=100, help="connects in flight at once")
+    p.add_argument("--max-failures", type=int, default=50, help="stop once more streams than this have failed")
+    p.add_argument("--event-timeout", type=float, default=30, help="seconds to wait for the marker event per step")
+    args = p.parse_args()
+
+    results = asyncio.run(run(args))
+    print("/api/events idle streams" + (f" [{args.label}]" if args.label else ""))
+    columns = ["streams", "open", "failed", "connect_p50_ms", "connect_p99_ms", "delivered", "event_p50_ms", "event_p99_ms"]
+    columns += benchlib.compare(results, args.compare, "streams", "event_p99_ms")
+    benchlib.print_table(results, columns)
+    benchlib.write_json(args.json_path, args.label, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Latency of POST /api/admin/tasks/bulk as the assignee count grows.
+
+One task per assignee, so the old per-assignee path (nextval + flush + audit row each) grows by a few
+round trips per assignee while the batched one stays near flat. To compare, run against a
+build from before the change and against this one, saving the first run and passing it to the second:
+
+    python scripts/bench_task_bulk.py --label before --json before.json      # older build
+    python scripts/bench_task_bulk.py --label after --compare before.json    # this build
+
+Run it next to the API (same host or network) so HTTP overhead doesn't hide the database work.
+"""
+from __future__ import annotations
+
+import time
+from datetime import date, timedelta
+
+import benchlib
+
+
+def main() -> None:
+    p = benchlib.parser(__doc__.splitlines()[0])
+    p.add_argument("--assignees", default="1,5,10,20,40,80", help="comma-separated assignee counts")
+    p.add_argument("--repeat", type=int, default=20, help="requests per assignee count")
+    args = p.parse_args()
+    counts = sorted({int(x) for x in args.assignees.split(",")})
+
+    token = benchlib.login(args.base_url, args.username, args.password)
+    with benchlib.client(args.base_url, token) as api:
+        prefix = benchlib.run_prefix("bulk")
+        company = benchlib.create_company(api, prefix)
+        staff = [u["id"] for u in benchlib.create_employees(api, prefix, max(counts), company)]
+        benchlib.create_tasks(api, company, staff[:1], date.today(), "warm-up")
+
+        results = []
+        for n in counts:
+            latencies = []
+            for i in range(args.repeat):
+                # A new date per request keeps every call on the same (empty-day) footing.
+                day = date.today() + timedelta(days=1 + len(results) * args.repeat + i)
+                start = time.perf_counter()
+                benchlib.create_tasks(api, company, staff[:n], day, f"bench {n}x{i}")
+                latencies.append(time.perf_counter() - start)
+            row = {"assignees": n, **benchlib.latency_summary(latencies)}
+            row["ms_per_task"] = round(row["p50_ms"] / n, 2)
+            results.append(row)
+
+    columns = ["assignees", "p50_ms", "p95_ms", "max_ms", "ms_per_task"]
+    columns += benchlib.compare(results, args.compare, "assignees", "p50_ms")
+
+    print(f"POST /api/admin/tasks/bulk, {args.repeat} requests per row" + (f" [{args.label}]" if args.label else ""))
+    benchlib.print_table(results, columns)
+    benchlib.write_json(args.json_path, args.label, results)
+
+
+if __name__ == "__main__":
+    main()
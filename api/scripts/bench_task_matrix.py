@@ -0,0 +1,95 @@
+"""Load test for POST /api/admin/tasks/matrix (dates x assignees in one request).
+
+For each assignee count it sends --repeat matrices of --days dates each, from --concurrency parallel
+admin clients, and reports latency plus created tasks per second. The largest default shape (350 x 14
+= 4900 tasks) is just under crud.MAX_TASKS_PER_REQUEST. With --vs-bulk it also times the old way of
+scheduling the same rotation: one /api/admin/tasks/bulk call per date.
+
+    python scripts/bench_task_matrix.py --days 14 --assignees 10,50,100,350 --concurrency 4
+"""
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from itertools import count
+
+import benchlib
+
+_day_offsets = count(1)
+
+
+def rotation(days: int) -> list[date]:
+    # Fresh dates for every matrix, so each request starts from empty days like a new rotation would.
+    start = date.today() + timedelta(days=30 + next(_day_offsets) * days)
+    return [start + timedelta(days=i) for i in range(days)]
+
+
+def send_matrix(api, company: str, staff: list[int], days: int) -> float:
+    body = {
+        "company_slug": company, "assignee_user_ids": staff, "title": "bench rotation",
+        "slots": [{"task_date": d.isoformat(), "task_time": "09:00:00"} for d in rotation(days)],
+    }
+    start = time.perf_counter()
+    r = api.post("/api/admin/tasks/matrix", json=body)
+    r.raise_for_status()
+    assert len(r.json()["created"]) == len(staff) * days
+    return time.perf_counter() - start
+
+
+def send_per_day(api, company: str, staff: list[int], days: int) -> float:
+    start = time.perf_counter()
+    for d in rotation(days):
+        benchlib.create_tasks(api, company, staff, d, "bench rotation")
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    p = benchlib.parser(__doc__.splitlines()[0])
+    p.add_argument("--days", type=int, default=14, help="dates per matrix")
+    p.add_argument("--assignees", default="10,50,100,350", help="comma-separated assignee counts")
+    p.add_argument("--repeat", type=int, default=8, help="matrices per assignee count")
+    p.add_argument("--concurrency", type=int, default=4, help="parallel admin clients")
+    p.add_argument("--vs-bulk", action="store_true", help="also time one /tasks/bulk call per date")
+    args = p.parse_args()
+    counts = sorted({int(x) for x in args.assignees.split(",")})
+
+    token = benchlib.login(args.base_url, args.username, args.password)
+    with benchlib.client(args.base_url, token) as setup:
+        prefix = benchlib.run_prefix("matrix")
+        company = benchlib.create_company(setup, prefix)
+        staff = [u["id"] for u in benchlib.create_employees(setup, prefix, max(counts), company)]
+
+    modes = [("matrix", send_matrix)] + ([("bulk-per-day", send_per_day)] if args.vs_bulk else [])
+    results = []
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        clients = [benchlib.client(args.base_url, token, timeout=600) for _ in range(args.concurrency)]
+        try:
+            for n in counts:
+                for mode, send in modes:
+                    send(clients[0], company, staff[:n], args.days)  # warm-up
+                    start = time.perf_counter()
+                    futures = [pool.submit(send, clients[i % args.concurrency], company, staff[:n], args.days)
+                               for i in range(args.repeat)]
+                    latencies = [f.result() for f in futures]
+                    wall = time.perf_counter() - start
+                    tasks = n * args.days * args.repeat
+                    results.append({
+                        "mode": mode, "assignees": n, "tasks_per_req": n * args.days,
+                        **benchlib.latency_summary(latencies),
+                        "tasks_per_s": round(tasks / wall),
+                    })
+        finally:
+            for c in clients:
+                c.close()
+
+    print(f"{args.days} dates per request, {args.repeat} requests x {args.concurrency} clients"
+          + (f" [{args.label}]" if args.label else ""))
+    columns = ["mode", "assignees", "tasks_per_req", "p50_ms", "p95_ms", "p99_ms", "max_ms", "tasks_per_s"]
+    columns += benchlib.compare(results, args.compare, ("mode", "assignees"), "p99_ms")
+    benchlib.print_table(results, columns)
+    benchlib.write_json(args.json_path, args.label, results)
+
+
+if __name__ == "__main__":
+    main()
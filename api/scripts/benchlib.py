@@ -0,0 +1,133 @@
+"""Shared helpers for the benchmark scripts in this directory.
+
+The scripts drive a running API over HTTP (the web container's /api proxy or uvicorn directly), so the
+same script can be pointed at two builds to compare them. They log in as an admin (BENCH_USERNAME /
+BENCH_PASSWORD, e.g. the bootstrap root account) and create their own company and employees with a
+unique prefix; nothing existing is modified. Setup only uses long-standing endpoints (/api/admin/companies,
+/api/admin/users, /api/admin/tasks/bulk), so it also works against older builds.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import statistics
+import time
+from datetime import date
+
+import httpx
+
+COOKIE_NAME = "taskflow_session"
+EMPLOYEE_PASSWORD = "bench-password-1"
+
+
+def parser(description: str) -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description=description)
+    p.add_argument("--base-url", default=os.environ.get("BENCH_BASE_URL", "http://localhost:8002"),
+                   help="API origin (default: BENCH_BASE_URL or http://localhost:8002)")
+    p.add_argument("--username", default=os.environ.get("BENCH_USERNAME", "root"), help="admin login (BENCH_USERNAME)")
+    p.add_argument("--password", default=os.environ.get("BENCH_PASSWORD", ""), help="admin password (BENCH_PASSWORD)")
+    p.add_argument("--label", default="", help="name of this run in the output, e.g. the build under test")
+    p.add_argument("--json", dest="json_path", default="", help="also write the results to this file")
+    p.add_argument("--compare", default="", help="--json output of an earlier run (e.g. the old build) to compare with")
+    return p
+
+
+def login(base_url: str, username: str, password: str) -> str:
+    """Session token for the user (taken from Set-Cookie, so COOKIE_SECURE deployments work over http too)."""
+    r = httpx.post(f"{base_url}/api/auth/login", json={"username": username, "password": password}, timeout=30)
+    r.raise_for_status()
+    token = r.cookies.get(COOKIE_NAME)
+    if not token:
+        raise SystemExit(f"login as {username!r} returned no {COOKIE_NAME} cookie")
+    return token
+
+
+def session_headers(token: str) -> dict:
+    return {"Cookie": f"{COOKIE_NAME}={token}"}
+
+
+def client(base_url: str, token: str, **kwargs) -> httpx.Client:
+    return httpx.Client(base_url=base_url, headers=session_headers(token), timeout=kwargs.pop("timeout", 120), **kwargs)
+
+
+def run_prefix(name: str) -> str:
+    return f"bench-{name}-{int(time.time())}"
+
+
+def create_company(api: httpx.Client, slug: str) -> str:
+    api.post("/api/admin/companies", json={"slug": slug, "name": slug}).raise_for_status()
+    return slug
+
+
+def create_employees(api: httpx.Client, prefix: str, n: int, company_slug: str) -> list[dict]:
+    """n employees of the company: [{id, username}]. One request per user (argon2 on the server)."""
+    users = []
+    for i in range(n):
+        r = api.post("/api/admin/users", json={
+            "username": f"{prefix}-u{i}", "display_name": f"Bench {i}", "role": "employee",
+            "password": EMPLOYEE_PASSWORD, "company_slugs": [company_slug],
+        })
+        r.raise_for_status()
+        users.append({"id": r.json()["id"], "username": r.json()["username"]})
+    return users
+
+
+def create_tasks(api: httpx.Client, company_slug: str, assignee_ids: list[int], task_date: date, title: str) -> list[str]:
+    r = api.post("/api/admin/tasks/bulk", json={
+        "company_slug": company_slug, "assignee_user_ids": assignee_ids,
+        "task_date": task_date.isoformat(), "title": title,
+    })
+    r.raise_for_status()
+    return r.json()["created"]
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Nearest-rank percentile (p in 0..100) of a non-empty list."""
+    ordered = sorted(values)
+    k = max(0, math.ceil(p / 100 * len(ordered)) - 1)
+    return ordered[k]
+
+
+def latency_summary(seconds: list[float]) -> dict:
+    """count, mean, p50, p95, p99 and max of a list of latencies, in milliseconds."""
+    if not seconds:
+        return {"count": 0}
+    ms = [s * 1000 for s in seconds]
+    return {
+        "count": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 2),
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p95_ms": round(percentile(ms, 95), 2),
+        "p99_ms": round(percentile(ms, 99), 2),
+        "max_ms": round(max(ms), 2),
+    }
+
+
+def print_table(rows: list[dict], columns: list[str]) -> None:
+    widths = {c: max(len(c), *(len(str(r.get(c, ""))) for r in rows)) for c in columns}
+    print("  ".join(c.rjust(widths[c]) for c in columns))
+    for r in rows:
+        print("  ".join(str(r.get(c, "")).rjust(widths[c]) for c in columns))
+
+
+def write_json(path: str, label: str, results) -> None:
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"label": label, "results": results}, f, indent=2, default=str)
+
+
+def compare(results: list[dict], path: str, key: str | tuple[str, ...], metric: str) -> list[str]:
+    """Add before_<metric> and <metric>_ratio (before / now) to rows matching an earlier run on `key`; the new columns."""
+    if not path:
+        return []
+    keys = (key,) if isinstance(key, str) else key
+    with open(path, encoding="utf-8") as f:
+        before = {tuple(r[k] for k in keys): r for r in json.load(f)["results"]}
+    for row in results:
+        old, now = before.get(tuple(row[k] for k in keys), {}).get(metric), row.get(metric)
+        if isinstance(old, (int, float)):
+            row[f"before_{metric}"] = old
+            row[f"{metric}_ratio"] = round(old / now, 2) if isinstance(now, (int, float)) and now else ""
+    return [f"before_{metric}", f"{metric}_ratio"]
@@ -0,0 +1,117 @@
+"""/api/companies stays at a fixed number of round trips however many companies the caller sees.
+
+Counts every statement the endpoint sends (a before_cursor_execute listener on every engine) for a
+small and a large company list. The data is set up through the admin API. Needs TEST_DATABASE_URL
+(see conftest.py).
+"""
+from __future__ import annotations
+
+import os
+from contextlib import contextmanager
+from datetime import date, timedelta
+from itertools import count
+
+import pytest
+
+if not os.environ.get("TEST_DATABASE_URL"):
+    pytest.skip("TEST_DATABASE_URL is not set", allow_module_level=True)
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.deps import COOKIE_NAME
+from app.main import app
+from app.models import Role, User
+from app.security import create_token
+
+_ids = count()
+
+
+@pytest.fixture
+def client(pg_engine):
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def admin(pg_engine) -> dict:
+    """Cookie header of a fresh admin, for the setup requests."""
+    return session(make_user(pg_engine, Role.admin), Role.admin)
+
+
+@contextmanager
+def statements():
+    """Collect the SQL of every statement executed inside the block."""
+    seen: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        yield seen
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+
+
+def make_user(pg_engine, role: Role) -> int:
+    with Session(pg_engine) as db:
+        user = User(username=f"qc-user-{next(_ids)}", display_name="", password_hash="x", role=role)
+        db.add(user)
+        db.commit()
+        return user.id
+
+
+def session(user_id: int, role: Role) -> dict:
+    return {"Cookie": f"{COOKIE_NAME}={create_token(user_id, role.value)}"}
+
+
+def ok(resp) -> None:
+    assert resp.status_code == 200, resp.text
+
+
+def add_companies(client: TestClient, admin: dict, user_id: int, role: Role, slugs: list[str], n: int) -> list[str]:
+    """n more companies, each with the user's open tasks due yesterday and today; all of the user's slugs."""
+    today = date.today()
+    new = [f"qc-{next(_ids)}" for _ in range(n)]
+    for slug in new:
+        ok(client.post("/api/admin/companies", json={"slug": slug, "name": slug.upper()}, headers=admin))
+    slugs = slugs + new
+    if role == Role.employee:
+        ok(client.put(f"/api/admin/users/{user_id}/companies", json={"company_slugs": slugs}, headers=admin))
+    for slug in new:
+        for day in (today - timedelta(days=1), today):
+            ok(client.post("/api/admin/tasks/bulk", headers=admin, json={
+                "company_slug": slug, "assignee_user_ids": [user_id], "task_date": day.isoformat(), "title": "due",
+            }))
+    return slugs
+
+
+def get_companies(client: TestClient, user_id: int, role: Role) -> tuple[list[dict], list[str]]:
+    with statements() as seen:
+        resp = client.get("/api/companies", headers=session(user_id, role))
+    ok(resp)
+    return resp.json(), seen
+
+
+@pytest.mark.parametrize("role", [Role.employee, Role.admin])
+def test_companies_query_count_is_constant(client, admin, pg_engine, role):
+    user_id = make_user(pg_engine, role)
+    get_companies(client, user_id, role)  # warm-up: first-connect queries
+
+    slugs = add_companies(client, admin, user_id, role, [], 2)
+    small, small_sql = get_companies(client, user_id, role)
+    slugs = add_companies(client, admin, user_id, role, slugs, 40)
+    large, large_sql = get_companies(client, user_id, role)
+
+    if role == Role.employee:
+        assert len(small) == 2 and len(large) == 42
+    else:
+        assert len(large) >= len(small) + 40
+    mine = [c for c in large if c["slug"] in slugs]
+    assert len(mine) == 42
+    assert all(c["due_count"] == 2 and c["has_attention"] for c in mine)
+
+    assert len(small_sql) == len(large_sql), large_sql
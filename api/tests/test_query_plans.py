@@ -0,0 +1,194 @@
+"""EXPLAIN regression tests for the hot task queries (indexes from migrations 0013 and 0014).
+
+Seeds a dataset large enough that a sequential scan or a sort would be the planner's choice without
+the right index, then checks the plan of each *_query builder: the table is read through the expected
+index, and the admin grid's keyset pages are never fed into a Sort. Needs TEST_DATABASE_URL (see
+conftest.py).
+"""
+from __future__ import annotations
+
+import os
+from datetime import date, timedelta
+
+import pytest
+
+if not os.environ.get("TEST_DATABASE_URL"):
+    pytest.skip("TEST_DATABASE_URL is not set", allow_module_level=True)
+
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.models import Company, Role, TaskStatus, User, UserCompany
+
+COMPANIES = 40
+USERS_PER_COMPANY = 5
+DAYS = 1000  # one task per user per day, centred on today
+
+TODAY = date.today()
+INDEX_SCANS = ("Index Scan", "Index Only Scan")
+
+
+@pytest.fixture(scope="module")
+def seeded(pg_engine):
+    """(engine, company ids, user ids by company) over COMPANIES * USERS_PER_COMPANY * DAYS tasks."""
+    with Session(pg_engine) as db:
+        company_ids = list(db.execute(
+            insert(Company).returning(Company.id, sort_by_parameter_order=True),
+            [{"slug": f"plan-{c}", "name": f"Plan {c}", "active": True} for c in range(COMPANIES)],
+        ).scalars())
+        user_ids = list(db.execute(
+            insert(User).returning(User.id, sort_by_parameter_order=True),
+            [{"username": f"plan-user-{u}", "display_name": "", "password_hash": "x", "role": Role.employee}
+             for u in range(COMPANIES * USERS_PER_COMPANY)],
+        ).scalars())
+        # User u works for company u % COMPANIES.
+        db.execute(insert(UserCompany), [{"user_id": uid, "company_id": company_ids[u % COMPANIES]}
+                                         for u, uid in enumerate(user_ids)])
+
+        n = COMPANIES * USERS_PER_COMPANY * DAYS
+        params = {"n": n, "users": len(user_ids), "uids": user_ids, "cids": company_ids,
+                  "companies": COMPANIES, "first_day": TODAY - timedelta(days=DAYS // 2), "today": TODAY}
+        db.execute(text("""
+            INSERT INTO task_groups (company_id, title)
+            SELECT (CAST(:cids AS int[]))[1 + (g % :users) % :companies], 'Plan task ' || g
+            FROM generate_series(0, :n - 1) g
+            ORDER BY g
+        """), params)
+        db.execute(text("""
+            INSERT INTO tasks (task_code, company_id, assigned_user_id, category, task_date, task_time, group_id,
+                               status, deleted_at)
+            SELECT 'P' || lpad(g::text, 9, '0'),
+                   (CAST(:cids AS int[]))[1 + (g % :users) % :companies],
+                   (CAST(:uids AS int[]))[1 + g % :users],
+                   (ARRAY['general', 'visit', 'call'])[1 + g % 3],
+                   CAST(:first_day AS date) + CAST(g / :users AS int),
+                   CASE WHEN g % 7 = 0 THEN NULL ELSE make_time(CAST(8 + g % 10 AS int), 0, 0) END,
+                   grp.id,
+                   CAST(CASE WHEN CAST(:first_day AS date) + CAST(g / :users AS int) < CAST(:today AS date) AND g % 4 <> 0
+                             THEN 'done' ELSE 'todo' END AS taskstatus),
+                   CASE WHEN g % 50 = 0 THEN now() END
+            FROM generate_series(0, :n - 1) g
+            JOIN (SELECT id, row_number() OVER (ORDER BY id) - 1 AS g FROM task_groups WHERE title LIKE 'Plan task %') grp
+              USING (g)
+        """), params)
+        crud.rebuild_due_counters(db)
+        db.commit()
+
+    with pg_engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE"))
+    by_company = {cid: [uid for u, uid in enumerate(user_ids) if u % COMPANIES == i] for i, cid in enumerate(company_ids)}
+    return pg_engine, company_ids, by_company
+
+
+def explain(engine, stmt) -> dict:
+    compiled = stmt.compile(dialect=engine.dialect, compile_kwargs={"render_postcompile": True})
+    with engine.connect() as conn:
+        return conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params).scalar_one()[0]["Plan"]
+
+
+def walk(node: dict):
+    yield node
+    for child in node.get("Plans", []):
+        yield from walk(child)
+
+
+def scans(plan: dict, relation: str) -> list[dict]:
+    return [n for n in walk(plan) if n.get("Relation Name") == relation]
+
+
+def sorts_rows_of(plan: dict, relation: str) -> bool:
+    """Whether some Sort consumes `relation`'s rows directly (sorting an aggregate of them is fine)."""
+    def reaches(node: dict) -> bool:
+        if node.get("Relation Name") == relation:
+            return True
+        if node["Node Type"] == "Aggregate":
+            return False
+        return any(reaches(c) for c in node.get("Plans", []))
+
+    return any(n["Node Type"] in ("Sort", "Incremental Sort") and reaches(n) for n in walk(plan))
+
+
+def index_names(node: dict) -> set[str]:
+    """Indexes a scan node reads: its own, or its Bitmap Index Scan children's."""
+    if "Index Name" in node:
+        return {node["Index Name"]}
+    return {n["Index Name"] for n in walk(node) if n["Node Type"] == "Bitmap Index Scan"}
+
+
+def assert_index_plan(plan: dict, relation: str, index: str, direction: str | None = None, ordered: bool = True) -> None:
+    """`relation` is read only through `index`; if `ordered`, by an index scan whose order is the result's (no Sort).
+
+    Bounded reads pass ordered=False (the list windows, the grouped due counts): for a few hundred rows a
+    bitmap scan plus a small sort is a fair plan; what matters there is which index bounds the read.
+    """
+    found = scans(plan, relation)
+    assert found, f"{relation} not in plan"
+    for node in found:
+        allowed = INDEX_SCANS if ordered else INDEX_SCANS + ("Bitmap Heap Scan",)
+        assert node["Node Type"] in allowed, f"{relation}: {node['Node Type']}"
+        assert index_names(node) == {index}, f"{relation}: {index_names(node)}"
+        if direction:
+            assert node["Scan Direction"] == direction
+    if ordered:
+        assert not sorts_rows_of(plan, relation), f"{relation} rows are sorted"
+
+
+@pytest.mark.parametrize("role", [Role.employee, Role.admin])
+def test_due_counts_read_counter_index(seeded, role):
+    engine, company_ids, by_company = seeded
+    user = User(id=by_company[company_ids[0]][0], role=role)
+    plan = explain(engine, crud.companies_with_due_counts_query(user, TODAY))
+    assert_index_plan(plan, "task_due_counters", "task_due_counters_pkey", ordered=False)
+    assert not scans(plan, "tasks")
+
+
+def test_employee_window_uses_user_window_index(seeded):
+    engine, company_ids, by_company = seeded
+    cid = company_ids[3]
+    plan = explain(engine, crud.user_company_tasks_query(by_company[cid][0], cid, TODAY))
+    assert_index_plan(plan, "tasks", "ix_tasks_user_window", ordered=False)
+
+
+def test_company_window_uses_company_window_index(seeded):
+    engine, company_ids, _ = seeded
+    plan = explain(engine, crud.company_tasks_query(company_ids[5], TODAY))
+    assert_index_plan(plan, "tasks", "ix_tasks_company_window", ordered=False)
+
+
+def grid(**filters):
+    return crud.admin_tasks_query(date_from=TODAY - timedelta(days=365), date_to=TODAY, **filters)
+
+
+def test_admin_grid_one_company_walks_keyset_index(seeded):
+    engine, company_ids, _ = seeded
+    assert_index_plan(explain(engine, grid(company_id=company_ids[7])), "tasks", "ix_tasks_company_date_num", "Forward")
+    after = (TODAY - timedelta(days=200), 0)
+    stmt = grid(company_id=company_ids[7], after=after)
+    assert_index_plan(explain(engine, stmt), "tasks", "ix_tasks_company_date_num", "Forward")
+
+
+def test_admin_grid_all_companies_scans_live_index_backward(seeded):
+    engine, _, _ = seeded
+    assert_index_plan(explain(engine, grid()), "tasks", "ix_tasks_live_date_num", "Backward")
+    after = (TODAY - timedelta(days=30), 2**31 - 1)
+    assert_index_plan(explain(engine, grid(after=after)), "tasks", "ix_tasks_live_date_num", "Backward")
+
+
+def test_admin_grid_assignee_filter_uses_user_keyset_index(seeded):
+    engine, company_ids, by_company = seeded
+    cid = company_ids[9]
+    # One assignee's year is a few hundred rows: a bitmap read of the index is as good as walking it.
+    stmt = grid(company_id=cid, assigned_user_id=by_company[cid][1], deleted=None)
+    assert_index_plan(explain(engine, stmt), "tasks", "ix_tasks_company_user_date_num", ordered=False)
+
+
+def test_admin_grid_status_filter_walks_status_keyset_index(seeded):
+    engine, company_ids, _ = seeded
+    stmt = grid(company_id=company_ids[11], status=TaskStatus.todo)
+    assert_index_plan(explain(engine, stmt), "tasks", "ix_tasks_company_status_date_num", "Forward")
+
+
+def test_admin_grid_all_companies_with_deleted_scans_full_index_backward(seeded):
+    engine, _, _ = seeded
+    assert_index_plan(explain(engine, grid(deleted=None)), "tasks", "ix_tasks_date_num", "Backward")
@@ -0,0 +1,96 @@
+"""app.recurrence: rule parsing and occurrence expansion. Pure functions, no database."""
+from __future__ import annotations
+
+from datetime import date
+from itertools import islice
+
+import pytest
+
+from app.recurrence import Rule, _iter_dates, occurrences, parse_rule
+
+
+def test_parse_rule_defaults_and_prefix():
+    assert parse_rule("RRULE:FREQ=daily") == Rule(freq="DAILY")
+    assert parse_rule("FREQ=WEEKLY;INTERVAL=2;BYDAY=FR,MO,FR;COUNT=4") == Rule(
+        freq="WEEKLY", interval=2, byday=(0, 4), count=4)
+    assert parse_rule("FREQ=MONTHLY;UNTIL=20250331T000000Z").until == date(2025, 3, 31)
+
+
+@pytest.mark.parametrize("rule", [
+    "",
+    "FREQ=YEARLY",
+    "FREQ=DAILY;BYMONTH=1",
+    "FREQ=DAILY;INTERVAL=0",
+    "FREQ=DAILY;COUNT=x",
+    "FREQ=DAILY;COUNT=2;UNTIL=20250101",
+    "FREQ=DAILY;BYDAY=MO",
+    "FREQ=WEEKLY;BYDAY=XX",
+    "FREQ=WEEKLY;BYDAY",
+])
+def test_parse_rule_rejects(rule):
+    with pytest.raises(ValueError):
+        parse_rule(rule)
+
+
+def test_weekly_byday_starts_at_dtstart():
+    # 2025-01-01 is a Wednesday: that week's Monday is before dtstart and is skipped.
+    rule = parse_rule("FREQ=WEEKLY;BYDAY=MO,WE,FR")
+    assert list(islice(_iter_dates(rule, date(2025, 1, 1)), 5)) == [
+        date(2025, 1, 1), date(2025, 1, 3), date(2025, 1, 6), date(2025, 1, 8), date(2025, 1, 10)]
+
+
+def test_weekly_defaults_to_dtstart_weekday_and_interval():
+    rule = parse_rule("FREQ=WEEKLY;INTERVAL=2")
+    assert list(islice(_iter_dates(rule, date(2025, 1, 1)), 3)) == [
+        date(2025, 1, 1), date(2025, 1, 15), date(2025, 1, 29)]
+
+
+def test_count_counts_from_dtstart_not_window_start():
+    rule = parse_rule("FREQ=DAILY;COUNT=5")
+    assert occurrences(rule, date(2025, 1, 1), date(2025, 1, 1), date(2025, 12, 31)) == [
+        date(2025, 1, d) for d in range(1, 6)]
+    # Occurrences before the window still use up the count.
+    assert occurrences(rule, date(2025, 1, 1), date(2025, 1, 4), date(2025, 12, 31)) == [
+        date(2025, 1, 4), date(2025, 1, 5)]
+    assert occurrences(rule, date(2025, 1, 1), date(2025, 1, 6), date(2025, 12, 31)) == []
+
+
+def test_count_with_byday():
+    rule = parse_rule("FREQ=WEEKLY;BYDAY=TU,TH;COUNT=3")
+    assert occurrences(rule, date(2025, 1, 1), date(2025, 1, 1), date(2025, 2, 1)) == [
+        date(2025, 1, 2), date(2025, 1, 7), date(2025, 1, 9)]
+
+
+def test_until_is_inclusive():
+    rule = parse_rule("FREQ=DAILY;INTERVAL=3;UNTIL=20250107")
+    assert occurrences(rule, date(2025, 1, 1), date(2025, 1, 1), date(2025, 1, 31)) == [
+        date(2025, 1, 1), date(2025, 1, 4), date(2025, 1, 7)]
+
+
+def test_window_end_is_inclusive():
+    rule = parse_rule("FREQ=DAILY")
+    assert occurrences(rule, date(2025, 1, 1), date(2025, 1, 3), date(2025, 1, 4)) == [date(2025, 1, 3), date(2025, 1, 4)]
+
+
+def test_monthly_31st_skips_short_months():
+    rule = parse_rule("FREQ=MONTHLY")
+    assert occurrences(rule, date(2025, 1, 31), date(2025, 1, 1), date(2025, 8, 31)) == [
+        date(2025, 1, 31), date(2025, 3, 31), date(2025, 5, 31), date(2025, 7, 31), date(2025, 8, 31)]
+
+
+def test_monthly_29th_in_february_only_on_leap_years():
+    rule = parse_rule("FREQ=MONTHLY;INTERVAL=12")
+    assert occurrences(rule, date(2024, 2, 29), date(2024, 1, 1), date(2029, 1, 1)) == [date(2024, 2, 29), date(2028, 2, 29)]
+
+
+def test_monthly_count_counts_emitted_dates_only():
+    # Skipped short months are not occurrences, so they don't use up the count.
+    rule = parse_rule("FREQ=MONTHLY;COUNT=3")
+    assert occurrences(rule, date(2025, 1, 31), date(2025, 1, 1), date(2026, 1, 1)) == [
+        date(2025, 1, 31), date(2025, 3, 31), date(2025, 5, 31)]
+
+
+def test_monthly_interval_rolls_over_the_year():
+    rule = parse_rule("FREQ=MONTHLY;INTERVAL=5")
+    assert list(islice(_iter_dates(rule, date(2025, 10, 15)), 3)) == [
+        date(2025, 10, 15), date(2026, 3, 15), date(2026, 8, 15)]
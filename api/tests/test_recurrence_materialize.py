@@ -0,0 +1,141 @@
+"""crud recurring tasks against the database: materialize, edit the series, revive tombstones.
+
+Each test runs in a transaction that is rolled back. Needs TEST_DATABASE_URL (see conftest.py).
+"""
+from __future__ import annotations
+
+import os
+from datetime import date, time, timedelta
+
+import pytest
+
+if not os.environ.get("TEST_DATABASE_URL"):
+    pytest.skip("TEST_DATABASE_URL is not set", allow_module_level=True)
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.models import Company, Role, Task, TaskCategory, TaskDueCounter, TaskGroup, TaskStatus, User
+
+TODAY = date(2025, 6, 2)  # a Monday; passed explicitly, so the window doesn't depend on the run date
+AHEAD = crud.RECURRENCE_DAYS_AHEAD
+
+
+@pytest.fixture
+def db(pg_engine):
+    with Session(pg_engine) as session:
+        yield session
+        session.rollback()
+
+
+@pytest.fixture
+def setup(db):
+    """(company, admin, first employee, second employee)."""
+    company = Company(slug="recur", name="Recur", active=True)
+    admin = User(username="recur-admin", display_name="", password_hash="x", role=Role.admin)
+    a = User(username="recur-a", display_name="", password_hash="x", role=Role.employee)
+    b = User(username="recur-b", display_name="", password_hash="x", role=Role.employee)
+    db.add_all([company, admin, a, b])
+    db.flush()
+    db.add(TaskCategory(company_id=company.id, name="general"))
+    db.flush()
+    return company, admin, a, b
+
+
+def create(db, setup, *, rule="FREQ=DAILY", assignees=None):
+    company, admin, a, _ = setup
+    return crud.create_recurrence(
+        db, company=company, rule=rule, dtstart=TODAY, task_time=time(8), assignee_ids=assignees or [a.id],
+        category="general", title="Visit", maps_url="", patient_id=None, patient_name="P",
+        patient_address="1 Main", patient_phone="", bonus_details="", actor_user=admin, ip="", user_agent="", today=TODAY,
+    )
+
+
+def edit(db, setup, rec, *, changes=None, assignees=None):
+    crud.update_recurrence(db, rec, changes=changes or {}, assignee_ids=assignees, actor_user=setup[1],
+                           ip="", user_agent="", today=TODAY)
+
+
+def occurrences(db, rec) -> dict[tuple[date, int], Task]:
+    tasks = db.scalars(select(Task).where(Task.recurrence_id == rec.id).execution_options(populate_existing=True)).all()
+    return {(t.task_date, t.assigned_user_id): t for t in tasks}
+
+
+def open_count(db, user_id: int, day: date) -> int:
+    return db.scalar(select(TaskDueCounter.open_count).where(TaskDueCounter.user_id == user_id,
+                                                             TaskDueCounter.task_date == day)) or 0
+
+
+def test_materialize_fills_the_window_and_is_idempotent(db, setup):
+    _, _, a, _ = setup
+    rec = create(db, setup)
+    got = occurrences(db, rec)
+    assert sorted(got) == [(TODAY + timedelta(days=i), a.id) for i in range(AHEAD + 1)]
+    assert rec.materialized_through == TODAY + timedelta(days=AHEAD)
+    assert open_count(db, a.id, TODAY) == 1
+
+    # A single deleted occurrence stays deleted when the window is materialized again.
+    crud.soft_delete_task(db, got[(TODAY + timedelta(days=1), a.id)], actor_user=setup[1])
+    db.flush()
+    assert crud.materialize_recurrence(db, rec, today=TODAY) == []
+    assert crud.materialize_recurrence(db, rec, today=TODAY + timedelta(days=3)) != []
+    again = occurrences(db, rec)
+    assert again[(TODAY + timedelta(days=1), a.id)].deleted_at is not None
+    assert max(again)[0] == TODAY + timedelta(days=AHEAD + 3)
+
+
+def test_edit_rewrites_open_occurrences_only(db, setup):
+    _, _, a, _ = setup
+    rec = create(db, setup)
+    done = occurrences(db, rec)[(TODAY + timedelta(days=2), a.id)]
+    crud.set_task_status_fast(db, task_num=done.task_num, done=True, actor_user_id=a.id, ip="", user_agent="", assignee_id=a.id)
+
+    edit(db, setup, rec, changes={"title": "Checkup", "task_time": time(10)})
+    got = occurrences(db, rec)
+    open_task = got[(TODAY + timedelta(days=1), a.id)]
+    assert open_task.task_time == time(10)
+    assert db.get(TaskGroup, open_task.group_id).title == "Checkup"
+    # The completed occurrence keeps its own time.
+    assert got[(TODAY + timedelta(days=2), a.id)].task_time == time(8)
+
+
+def test_rule_change_retires_then_revives_occurrences(db, setup):
+    _, _, a, _ = setup
+    rec = create(db, setup)
+    ids = {k: t.id for k, t in occurrences(db, rec).items()}
+    tuesday = (TODAY + timedelta(days=1), a.id)
+
+    # Mondays only: the other open occurrences are soft-deleted and leave the due counters.
+    edit(db, setup, rec, changes={"rule": "FREQ=WEEKLY;BYDAY=MO"})
+    got = occurrences(db, rec)
+    assert sorted(k for k, t in got.items() if t.deleted_at is None) == [
+        (TODAY + timedelta(weeks=w), a.id) for w in range(3)]
+    assert got[tuesday].deleted_at is not None
+    assert open_count(db, a.id, tuesday[0]) == 0
+
+    # Back to daily: the same rows come back open, with the current template.
+    edit(db, setup, rec, changes={"rule": "FREQ=DAILY", "title": "Daily"})
+    got = occurrences(db, rec)
+    assert {k: t.id for k, t in got.items()} == ids
+    assert all(t.deleted_at is None and t.status == TaskStatus.todo for t in got.values())
+    assert db.get(TaskGroup, got[tuesday].group_id).title == "Daily"
+    assert open_count(db, a.id, tuesday[0]) == 1
+
+
+def test_readded_assignee_revives_but_single_deletions_stay(db, setup):
+    _, admin, a, b = setup
+    rec = create(db, setup, assignees=[a.id, b.id])
+    day3 = TODAY + timedelta(days=3)
+    crud.soft_delete_task(db, occurrences(db, rec)[(day3, a.id)], actor_user=admin)
+    db.flush()
+
+    edit(db, setup, rec, assignees=[a.id])
+    assert all(t.deleted_at is not None for (_, uid), t in occurrences(db, rec).items() if uid == b.id)
+
+    edit(db, setup, rec, assignees=[a.id, b.id])
+    got = occurrences(db, rec)
+    assert all(t.deleted_at is None for (_, uid), t in got.items() if uid == b.id)
+    # a's deleted occurrence wasn't added by this edit, so it stays deleted.
+    assert got[(day3, a.id)].deleted_at is not None
+    assert open_count(db, b.id, day3) == 1
@@ -0,0 +1,147 @@
+"""crud.apply_status_batch: the offline flush of (task_code, done, client_ts) toggles.
+
+Each test runs in a transaction that is rolled back. Needs TEST_DATABASE_URL (see conftest.py).
+"""
+from __future__ import annotations
+
+import json
+import os
+from datetime import date, datetime, timedelta
+
+import pytest
+
+if not os.environ.get("TEST_DATABASE_URL"):
+    pytest.skip("TEST_DATABASE_URL is not set", allow_module_level=True)
+
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app import audit, crud
+from app.models import AuditAction, AuditLog, Company, Role, Task, TaskDueCounter, TaskGroup, TaskStatus, User, task_num_seq
+from app.settings import settings
+from app.utils import format_task_code
+
+TODAY = date.today()
+
+
+@pytest.fixture
+def db(pg_engine):
+    with Session(pg_engine) as session:
+        yield session
+        session.rollback()
+
+
+@pytest.fixture
+def owner(db) -> tuple[int, int]:
+    """(company id, user id) of the employee flushing the batch."""
+    company_id = db.execute(insert(Company).returning(Company.id),
+                            {"slug": "batch", "name": "Batch", "active": True}).scalar_one()
+    user_id = db.execute(insert(User).returning(User.id),
+                         {"username": "batch-owner", "display_name": "", "password_hash": "x", "role": Role.employee}).scalar_one()
+    return company_id, user_id
+
+
+def make_task(db, company_id: int, user_id: int, *, changed_at: datetime | None = None) -> str:
+    group_id = db.execute(insert(TaskGroup).returning(TaskGroup.id), {"company_id": company_id, "title": "Batch"}).scalar_one()
+    num = db.execute(select(task_num_seq.next_value())).scalar_one()
+    code = format_task_code(num)
+    db.execute(insert(Task), {"task_num": num, "task_code": code, "company_id": company_id, "assigned_user_id": user_id,
+                              "category": "general", "task_date": TODAY, "group_id": group_id,
+                              "status_changed_at": changed_at})
+    counter = pg_insert(TaskDueCounter).values(user_id=user_id, company_id=company_id, task_date=TODAY, open_count=1)
+    db.execute(counter.on_conflict_do_update(index_elements=["user_id", "company_id", "task_date"],
+                                             set_={"open_count": TaskDueCounter.open_count + 1}))
+    return code
+
+
+def flush(db, user_id: int, items: list[tuple]) -> list[tuple[str, str | None]]:
+    results = crud.apply_status_batch(db, user_id=user_id, items=items, ip="10.0.0.1", user_agent="batch-test")
+    return [(r["result"], r["status"]) for r in results]
+
+
+def status_of(db, code: str) -> tuple[TaskStatus, datetime | None]:
+    return db.execute(select(Task.status, Task.status_changed_at).where(Task.task_code == code)).one()
+
+
+def test_last_writer_wins_on_client_ts(db, owner):
+    company_id, user_id = owner
+    changed = datetime.utcnow() - timedelta(hours=1)
+    older, newer = make_task(db, company_id, user_id, changed_at=changed), make_task(db, company_id, user_id, changed_at=changed)
+
+    assert flush(db, user_id, [(older, True, changed - timedelta(minutes=5)),
+                               (newer, True, changed + timedelta(minutes=5))]) == [("conflict", "todo"), ("applied", "done")]
+    assert status_of(db, older) == (TaskStatus.todo, changed)
+    assert status_of(db, newer) == (TaskStatus.done, changed + timedelta(minutes=5))
+    # The due counter follows the applied toggle only.
+    counter = db.execute(select(TaskDueCounter.open_count).where(TaskDueCounter.user_id == user_id)).scalar_one()
+    assert counter == 1
+
+
+def test_latest_toggle_in_the_batch_wins(db, owner):
+    company_id, user_id = owner
+    code = make_task(db, company_id, user_id)
+    t = datetime.utcnow() - timedelta(minutes=10)
+
+    # Input order doesn't matter, client_ts does: the middle item is the latest.
+    results = flush(db, user_id, [(code, True, t), (code, False, t + timedelta(minutes=2)), (code, True, t + timedelta(minutes=1))])
+    assert results == [("superseded", None), ("applied", "todo"), ("superseded", None)]
+    assert status_of(db, code) == (TaskStatus.todo, t + timedelta(minutes=2))
+
+
+def test_future_client_clock_is_clamped(db, owner):
+    company_id, user_id = owner
+    code = make_task(db, company_id, user_id)
+
+    before = datetime.utcnow()
+    assert flush(db, user_id, [(code, True, before + timedelta(days=1))]) == [("applied", "done")]
+    _, changed_at = status_of(db, code)
+    assert before <= changed_at <= datetime.utcnow()
+    # A later toggle from a correct clock still wins over the fast one.
+    assert flush(db, user_id, [(code, False, datetime.utcnow() + timedelta(seconds=1))]) == [("applied", "todo")]
+
+
+def test_conflict_not_found_and_forbidden(db, owner):
+    company_id, user_id = owner
+    other = db.execute(insert(User).returning(User.id),
+                       {"username": "batch-other", "display_name": "", "password_hash": "x", "role": Role.employee}).scalar_one()
+    now = datetime.utcnow()
+    mine = make_task(db, company_id, user_id, changed_at=now)
+    theirs = make_task(db, company_id, other)
+
+    results = flush(db, user_id, [
+        (mine, True, now - timedelta(minutes=1)),
+        (theirs, True, now),
+        ("T999999", True, now),
+        ("not-a-code", True, now),
+    ])
+    assert results == [("conflict", "todo"), ("forbidden", None), ("not_found", None), ("not_found", None)]
+    assert status_of(db, theirs)[0] == TaskStatus.todo
+
+
+def test_audit_rows_in_statement_with_db_sink(db, owner, monkeypatch):
+    monkeypatch.setattr(settings, "audit_sink", "db")
+    company_id, user_id = owner
+    done, undone = make_task(db, company_id, user_id), make_task(db, company_id, user_id)
+    db.execute(Task.__table__.update().where(Task.task_code == undone).values(status=TaskStatus.done))
+    flush(db, user_id, [(done, True, datetime.utcnow()), (undone, False, datetime.utcnow())])
+
+    rows = db.execute(select(AuditLog.action, AuditLog.meta, AuditLog.company_id)
+                      .where(AuditLog.actor_user_id == user_id).order_by(AuditLog.id)).all()
+    assert [(a, json.loads(m), c) for a, m, c in rows] == [
+        (AuditAction.COMPLETE_TASK, {"task_code": done, "batch": True}, company_id),
+        (AuditAction.UNCOMPLETE_TASK, {"task_code": undone, "batch": True}, company_id),
+    ]
+
+
+def test_audit_rows_queued_with_redis_sink(db, owner, monkeypatch):
+    monkeypatch.setattr(settings, "audit_sink", "redis")
+    company_id, user_id = owner
+    code = make_task(db, company_id, user_id)
+    flush(db, user_id, [(code, True, datetime.utcnow())])
+
+    assert not db.execute(select(AuditLog.id).where(AuditLog.actor_user_id == user_id)).first()
+    queued = db.info[audit._PENDING_KEY]
+    assert [(r["action"], json.loads(r["meta"]), r["ip"]) for r in queued] == [
+        (AuditAction.COMPLETE_TASK, {"task_code": code, "batch": True}, "10.0.0.1"),
+    ]
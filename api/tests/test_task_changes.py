@@ -0,0 +1,86 @@
+"""Delta sync (crud.list_task_changes) against writers that commit out of order.
+
+updated_seq is taken when a row is written, not when its transaction commits, so a cursor built from
+it alone would skip a slow writer that commits after a faster one. Needs TEST_DATABASE_URL (see
+conftest.py).
+"""
+from __future__ import annotations
+
+import os
+from datetime import date
+
+import pytest
+
+if not os.environ.get("TEST_DATABASE_URL"):
+    pytest.skip("TEST_DATABASE_URL is not set", allow_module_level=True)
+
+from sqlalchemy import insert, text, update
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.models import Company, Role, Task, TaskGroup, User
+
+TODAY = date.today()
+
+
+@pytest.fixture
+def two_tasks(pg_engine):
+    """(company id, [task id, task id]) for today, committed."""
+    with Session(pg_engine) as db:
+        company_id = db.execute(insert(Company).returning(Company.id),
+                                {"slug": "sync-race", "name": "Sync race", "active": True}).scalar_one()
+        user_id = db.execute(insert(User).returning(User.id),
+                             {"username": "sync-race", "display_name": "", "password_hash": "x", "role": Role.employee}).scalar_one()
+        task_ids = []
+        for n in range(2):
+            group_id = db.execute(insert(TaskGroup).returning(TaskGroup.id),
+                                  {"company_id": company_id, "title": f"Race {n}"}).scalar_one()
+            task_ids.append(db.execute(insert(Task).returning(Task.id), {
+                "task_code": f"R{n:09d}", "company_id": company_id, "assigned_user_id": user_id,
+                "category": "general", "task_date": TODAY, "group_id": group_id,
+            }).scalar_one())
+        db.commit()
+    yield company_id, task_ids
+    with Session(pg_engine) as db:
+        db.execute(text("DELETE FROM tasks WHERE company_id = :c"), {"c": company_id})
+        db.execute(text("DELETE FROM task_groups WHERE company_id = :c"), {"c": company_id})
+        db.execute(text("DELETE FROM companies WHERE id = :c"), {"c": company_id})
+        db.execute(text("DELETE FROM users WHERE id = :u"), {"u": user_id})
+        db.commit()
+
+
+def changes(pg_engine, company_id: int, cursor: str) -> tuple[set[int], str]:
+    _, xid, seq = crud.decode_sync_cursor(cursor)
+    with Session(pg_engine) as db:
+        tasks, next_cursor, has_more = crud.list_task_changes(db, company_id, since=(xid, seq), today=TODAY)
+        assert not has_more
+        return {t.id for t in tasks}, next_cursor
+
+
+def test_cursor_does_not_pass_a_writer_that_commits_later(pg_engine, two_tasks):
+    company_id, (slow_id, fast_id) = two_tasks
+    with Session(pg_engine) as db:
+        cursor = crud.task_sync_cursor(db, TODAY)
+
+    slow = Session(pg_engine)
+    try:
+        # The slow writer takes the lower updated_seq, then stays open while a later one commits.
+        slow.execute(update(Task).where(Task.id == slow_id).values(category="visit"))
+        with Session(pg_engine) as fast:
+            fast.execute(update(Task).where(Task.id == fast_id).values(category="visit"))
+            fast.commit()
+        seqs = dict(slow.execute(text("SELECT id, updated_seq FROM tasks WHERE id IN (:a, :b)"),
+                                 {"a": slow_id, "b": fast_id}).all())
+        assert seqs[slow_id] < seqs[fast_id]
+
+        # The fast commit is held back too: handing it out would move the cursor past the slow writer.
+        seen, cursor = changes(pg_engine, company_id, cursor)
+        assert seen == set()
+        slow.commit()
+    finally:
+        slow.close()
+
+    seen, cursor = changes(pg_engine, company_id, cursor)
+    assert seen == {slow_id, fast_id}
+    seen, _ = changes(pg_engine, company_id, cursor)
+    assert seen == set()
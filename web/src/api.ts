@@ -34,6 +34,16 @@ async function req<T>(path: string, opts: RequestInit = {}): Promise<T> {
   return (await res.text()) as unknown as T;
 }
 
+// Paged list endpoints return the next page's cursor in X-Next-Cursor (null = last page).
+async function reqPage<T>(path: string): Promise<{ rows: T[]; nextCursor: string | null }> {
+  const res = await fetch(`${API_BASE}${path}`, { credentials: "include" });
+  if (!res.ok) {
+    const txt = await res.text();
+    throw new Error(txt || res.statusText);
+  }
+  return { rows: (await res.json()) as T[], nextCursor: res.headers.get("X-Next-Cursor") };
+}
+
 // -------- Auth --------
 
 export async function login(username: string, password: string): Promise<{ ok: boolean }>;
@@ -72,15 +82,67 @@ export async function companyTasks(companySlug: string): Promise<any[]> {
   return req<any[]>(`/api/company/${encodeURIComponent(companySlug)}/tasks`);
 }
 
+export type TaskEvents = { company: string | null; resync: boolean; events: { type: string; task_code: string }[] };
+
+// Live task changes (Server-Sent Events). EventSource reconnects by itself; call close() to stop.
+export function taskEvents(onEvent: (e: TaskEvents) => void): EventSource {
+  const es = new EventSource(`${API_BASE}/api/events`, { withCredentials: true });
+  es.addEventListener("tasks", (m) => onEvent(JSON.parse((m as MessageEvent).data)));
+  return es;
+}
+
 export async function taskDetail(companySlug: string, taskCode: string): Promise<any> {
   return req<any>(`/api/company/${encodeURIComponent(companySlug)}/tasks/${encodeURIComponent(taskCode)}`);
 }
 
+// Done/undone toggles made without a connection are queued in localStorage and flushed
+// in one request to /api/tasks/status:batch once the browser is back online.
+type QueuedStatus = { task_code: string; done: boolean; client_ts: string };
+const STATUS_QUEUE_KEY = "taskflow:status-queue";
+
+function readStatusQueue(): QueuedStatus[] {
+  try {
+    return JSON.parse(localStorage.getItem(STATUS_QUEUE_KEY) || "[]");
+  } catch {
+    return [];
+  }
+}
+
+function writeStatusQueue(items: QueuedStatus[]) {
+  if (items.length) localStorage.setItem(STATUS_QUEUE_KEY, JSON.stringify(items));
+  else localStorage.removeItem(STATUS_QUEUE_KEY);
+}
+
 export async function markDone(companySlug: string, taskCode: string, done: boolean, note?: string): Promise<any> {
-  return req<any>(`/api/company/${encodeURIComponent(companySlug)}/tasks/${encodeURIComponent(taskCode)}/done`, {
+  const item: QueuedStatus = { task_code: taskCode, done, client_ts: new Date().toISOString() };
+  try {
+    return await req<any>(`/api/company/${encodeURIComponent(companySlug)}/tasks/${encodeURIComponent(taskCode)}/done`, {
+      method: "POST",
+      body: JSON.stringify({ done, note: note || "" }),
+    });
+  } catch (e) {
+    // fetch() only rejects with TypeError on network failure; HTTP errors are re-thrown as-is.
+    if (!(e instanceof TypeError)) throw e;
+    writeStatusQueue([...readStatusQueue(), item]);
+    return { ok: true, queued: true };
+  }
+}
+
+export async function flushStatusQueue(): Promise<any[]> {
+  const items = readStatusQueue();
+  if (!items.length) return [];
+  const out = await req<{ results: any[] }>("/api/tasks/status:batch", {
     method: "POST",
-    body: JSON.stringify({ done, note: note || "" }),
+    body: JSON.stringify({ items }),
   });
+  // Drop only what was sent; toggles queued meanwhile stay for the next flush.
+  writeStatusQueue(readStatusQueue().slice(items.length));
+  return out.results;
+}
+
+if (typeof window !== "undefined") {
+  window.addEventListener("online", () => { flushStatusQueue().catch(() => {}); });
+  if (navigator.onLine) flushStatusQueue().catch(() => {});
 }
 
 // -------- Stats --------
@@ -89,6 +151,32 @@ export async function statsAudit(limit: number = 200): Promise<any[]> {
   return req<any[]>(`/api/stats/audit?limit=${encodeURIComponent(String(limit))}`);
 }
 
+export type AuditFilters = {
+  actorUserId?: number;
+  action?: string;
+  companyId?: number;
+  taskId?: number;
+  since?: string;
+  until?: string;
+  includeArchive?: boolean;
+  cursor?: string | null;
+  limit?: number;
+};
+
+export async function statsAuditPage(f: AuditFilters = {}): Promise<{ rows: any[]; nextCursor: string | null }> {
+  const qs = new URLSearchParams();
+  if (f.actorUserId) qs.set("actor_user_id", String(f.actorUserId));
+  if (f.action) qs.set("action", f.action);
+  if (f.companyId) qs.set("company_id", String(f.companyId));
+  if (f.taskId) qs.set("task_id", String(f.taskId));
+  if (f.since) qs.set("since", f.since);
+  if (f.until) qs.set("until", f.until);
+  if (f.includeArchive) qs.set("include_archive", "true");
+  if (f.cursor) qs.set("cursor", f.cursor);
+  if (f.limit) qs.set("limit", String(f.limit));
+  return reqPage<any>(`/api/stats/audit?${qs.toString()}`);
+}
+
 // -------- Admin: Companies --------
 
 export async function adminCompanies(): Promise<any[]> {
@@ -104,8 +192,27 @@ export async function adminCreateCompany(slug: string, name: string): Promise<an
 
 // -------- Admin: Users --------
 
+// Every user (follows all pages); for pickers. The Users page itself uses adminUsersPage.
 export async function adminUsers(): Promise<any[]> {
-  return req<any[]>("/api/admin/users");
+  const all: any[] = [];
+  let cursor: string | null = null;
+  do {
+    const page: { rows: any[]; nextCursor: string | null } = await adminUsersPage("", cursor, 1000);
+    all.push(...page.rows);
+    cursor = page.nextCursor;
+  } while (cursor);
+  return all;
+}
+
+export async function adminUsersPage(
+  q: string = "",
+  cursor: string | null = null,
+  limit: number = 200
+): Promise<{ rows: any[]; nextCursor: string | null }> {
+  const qs = new URLSearchParams({ limit: String(limit) });
+  if (q) qs.set("q", q);
+  if (cursor) qs.set("cursor", cursor);
+  return reqPage<any>(`/api/admin/users?${qs.toString()}`);
 }
 
 export async function adminUserDetail(userId: number): Promise<any> {
@@ -116,6 +223,16 @@ export async function adminCreateUser(payload: any): Promise<any> {
   return req<any>("/api/admin/users", { method: "POST", body: JSON.stringify(payload) });
 }
 
+// Many users at once: pass {users: [...]} or a CSV string (header: username,password,display_name,role,company_slugs,mattermost_id).
+export async function adminCreateUsersBulk(payload: { users: any[] } | string): Promise<any> {
+  const csv = typeof payload === "string";
+  return req<any>("/api/admin/users:bulk", {
+    method: "POST",
+    body: csv ? payload : JSON.stringify(payload),
+    headers: csv ? { "Content-Type": "text/csv" } : {},
+  });
+}
+
 export async function adminResetPassword(userId: number): Promise<{ temp_password: string }> {
   return req<{ temp_password: string }>(`/api/admin/users/${userId}/reset_password`, { method: "POST" });
 }
@@ -151,9 +268,39 @@ export async function adminCreateTasksBulk(payload: any): Promise<any> {
   return req<any>("/api/admin/tasks/bulk", { method: "POST", body: JSON.stringify(payload) });
 }
 
+export async function adminCreateTasksMatrix(payload: any): Promise<any> {
+  return req<any>("/api/admin/tasks/matrix", { method: "POST", body: JSON.stringify(payload) });
+}
+
+export type AdminTaskFilters = {
+  includeDeleted?: boolean;
+  assignedUserId?: number;
+  status?: string;
+  category?: string;
+  dateFrom?: string;
+  dateTo?: string;
+  cursor?: string | null;
+  limit?: number;
+};
+
+// One page of the admin grid; pass nextCursor back as `cursor` for the following page (null = last page).
+export async function adminListTasksPage(
+  companySlug: string,
+  f: AdminTaskFilters = {}
+): Promise<{ rows: any[]; nextCursor: string | null }> {
+  const qs = new URLSearchParams({ company_slug: companySlug, include_deleted: f.includeDeleted ? "true" : "false" });
+  if (f.assignedUserId) qs.set("assigned_user_id", String(f.assignedUserId));
+  if (f.status) qs.set("status", f.status);
+  if (f.category) qs.set("category", f.category);
+  if (f.dateFrom) qs.set("date_from", f.dateFrom);
+  if (f.dateTo) qs.set("date_to", f.dateTo);
+  if (f.cursor) qs.set("cursor", f.cursor);
+  if (f.limit) qs.set("limit", String(f.limit));
+  return reqPage<any>(`/api/admin/tasks?${qs.toString()}`);
+}
+
 export async function adminListTasks(companySlug: string, includeDeleted: boolean = false): Promise<any[]> {
-  const qs = new URLSearchParams({ company_slug: companySlug, include_deleted: includeDeleted ? "true" : "false" });
-  return req<any[]>(`/api/admin/tasks?${qs.toString()}`);
+  return (await adminListTasksPage(companySlug, { includeDeleted })).rows;
 }
 
 export async function adminDeleteTask(taskCode: string): Promise<any> {
@@ -246,11 +393,14 @@ export const api = {
   myCompanies: companies,
   pushTest,
   companyTasks,
+  taskEvents,
   taskDetail,
   markDone,
+  flushStatusQueue,
 
   // stats
   statsAudit,
+  statsAuditPage,
 
   // admin: companies
   adminCompanies,
@@ -258,8 +408,10 @@ export const api = {
 
   // admin: users
   adminUsers,
+  adminUsersPage,
   adminUserDetail,
   adminCreateUser,
+  adminCreateUsersBulk,
   adminResetPassword,
   adminDisableUser,
   adminUpdateUser,
@@ -268,7 +420,9 @@ export const api = {
 
   // admin: tasks
   adminCreateTasksBulk,
+  adminCreateTasksMatrix,
   adminListTasks,
+  adminListTasksPage,
   adminDeleteTask,
   adminForceDoneTask,
 
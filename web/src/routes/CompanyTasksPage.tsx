@@ -53,6 +53,20 @@ export default function CompanyTasksPage() {
     })();
   }, [companySlug]);
 
+  // Live updates: reload the list when a task in this company changes.
+  React.useEffect(() => {
+    if (!companySlug) return;
+    const es = api.taskEvents(async (e) => {
+      if (e.company !== companySlug) return;
+      try {
+        setTasks(await api.companyTasks(companySlug));
+      } catch {
+        // keep the current list; the next event or page load retries
+      }
+    });
+    return () => es.close();
+  }, [companySlug]);
+
   const filteredTasks = hideCompleted ? tasks.filter(t => t.status !== "done") : tasks;
   const grouped = group(filteredTasks);
   const dates = Object.keys(grouped).sort();
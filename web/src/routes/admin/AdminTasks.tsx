@@ -50,8 +50,16 @@ export default function AdminTasks() {
   const [includeDeleted, setIncludeDeleted] = useState<boolean>(false);
 
   const [taskList, setTaskList] = useState<AdminTaskRow[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loadingTasks, setLoadingTasks] = useState(false);
 
+  // grid filters (applied server-side)
+  const [filterAssignee, setFilterAssignee] = useState<number | "">("");
+  const [filterStatus, setFilterStatus] = useState<string>("");
+  const [filterCategory, setFilterCategory] = useState<string>("");
+  const [filterFrom, setFilterFrom] = useState<string>("");
+  const [filterTo, setFilterTo] = useState<string>("");
+
   const [categories, setCategories] = useState<Category[]>([]);
   const [patients, setPatients] = useState<Patient[]>([]);
 
@@ -70,13 +78,23 @@ export default function AdminTasks() {
 
   const activeUsers = useMemo(() => users.filter((u) => !u.disabled), [users]);
 
-  async function refreshTasks(slug?: string) {
+  // First page (or, with `more`, the page after the rows already shown).
+  async function refreshTasks(slug?: string, more: boolean = false) {
     const s = slug ?? companySlug;
     if (!s) return;
     setLoadingTasks(true);
     try {
-      const rows = await api.adminListTasks(s, includeDeleted);
-      setTaskList(rows as any);
+      const page = await api.adminListTasksPage(s, {
+        includeDeleted,
+        assignedUserId: filterAssignee === "" ? undefined : filterAssignee,
+        status: filterStatus || undefined,
+        category: filterCategory || undefined,
+        dateFrom: filterFrom || undefined,
+        dateTo: filterTo || undefined,
+        cursor: more ? nextCursor : null,
+      });
+      setTaskList((prev) => (more ? [...prev, ...(page.rows as any)] : (page.rows as any)));
+      setNextCursor(page.nextCursor);
     } catch (e: any) {
       toast.error(String(e?.message ?? e));
     } finally {
@@ -98,7 +116,7 @@ export default function AdminTasks() {
   useEffect(() => {
     refreshTasks();
     // eslint-disable-next-line react-hooks/exhaustive-deps
-  }, [companySlug, includeDeleted]);
+  }, [companySlug, includeDeleted, filterAssignee, filterStatus, filterCategory, filterFrom, filterTo]);
 
   useEffect(() => {
     refreshCompanyMeta();
@@ -189,7 +207,7 @@ export default function AdminTasks() {
           <div className="row" style={{ gap: 12 }}>
             <label style={{ display: "flex", flexDirection: "column", gap: 6 }}>
               <span style={{ opacity: 0.85 }}>Company</span>
-              <select value={companySlug} onChange={(e) => setCompanySlug(e.target.value)}>
+              <select value={companySlug} onChange={(e) => { setCompanySlug(e.target.value); setFilterCategory(""); }}>
                 {companies.map((c) => (
                   <option key={c.id} value={c.slug}>
                     {c.name} ({c.slug})
@@ -212,6 +230,47 @@ export default function AdminTasks() {
             {loadingTasks ? "Refreshing..." : "Refresh"}
           </button>
         </div>
+
+        <div className="row" style={{ gap: 12, flexWrap: "wrap", marginTop: 10 }}>
+          <label style={{ display: "flex", flexDirection: "column", gap: 6 }}>
+            <span style={{ opacity: 0.85 }}>Assignee</span>
+            <select value={filterAssignee === "" ? "" : String(filterAssignee)} onChange={(e) => setFilterAssignee(e.target.value ? Number(e.target.value) : "")}>
+              <option value="">(all)</option>
+              {users.map((u) => (
+                <option key={u.id} value={u.id}>
+                  {u.display_name || u.username} (#{u.id})
+                </option>
+              ))}
+            </select>
+          </label>
+          <label style={{ display: "flex", flexDirection: "column", gap: 6 }}>
+            <span style={{ opacity: 0.85 }}>Status</span>
+            <select value={filterStatus} onChange={(e) => setFilterStatus(e.target.value)}>
+              <option value="">(all)</option>
+              <option value="todo">todo</option>
+              <option value="done">done</option>
+            </select>
+          </label>
+          <label style={{ display: "flex", flexDirection: "column", gap: 6 }}>
+            <span style={{ opacity: 0.85 }}>Category</span>
+            <select value={filterCategory} onChange={(e) => setFilterCategory(e.target.value)}>
+              <option value="">(all)</option>
+              {categories.map((c) => (
+                <option key={c.id} value={c.name}>
+                  {c.name}
+                </option>
+              ))}
+            </select>
+          </label>
+          <label style={{ display: "flex", flexDirection: "column", gap: 6 }}>
+            <span style={{ opacity: 0.85 }}>From</span>
+            <input type="date" value={filterFrom} onChange={(e) => setFilterFrom(e.target.value)} />
+          </label>
+          <label style={{ display: "flex", flexDirection: "column", gap: 6 }}>
+            <span style={{ opacity: 0.85 }}>To</span>
+            <input type="date" value={filterTo} onChange={(e) => setFilterTo(e.target.value)} />
+          </label>
+        </div>
       </div>
 
       <div className="grid2" style={{ marginTop: 16 }}>
@@ -335,7 +394,7 @@ export default function AdminTasks() {
         <div className="card">
           <div className="row" style={{ justifyContent: "space-between" }}>
             <h2 style={{ marginBottom: 0 }}>Current tasks</h2>
-            <span style={{ opacity: 0.8 }}>{taskList.length} shown</span>
+            <span style={{ opacity: 0.8 }}>{taskList.length} shown{nextCursor ? "+" : ""}</span>
           </div>
 
           <div style={{ marginTop: 10, overflow: "auto", maxHeight: 520 }}>
@@ -400,6 +459,13 @@ export default function AdminTasks() {
                 ) : null}
               </tbody>
             </table>
+            {nextCursor ? (
+              <div style={{ marginTop: 10, textAlign: "center" }}>
+                <button className="btn" onClick={() => refreshTasks(companySlug, true)} disabled={loadingTasks}>
+                  {loadingTasks ? "Loading..." : "Load more"}
+                </button>
+              </div>
+            ) : null}
           </div>
         </div>
       </div>
@@ -9,12 +9,17 @@ export default function AdminUsers() {
   const [err, setErr] = React.useState<string|null>(null);
   const [temp, setTemp] = React.useState<Record<number,string>>({});
   const [mmDraft, setMmDraft] = React.useState<Record<number,string>>({});
+  const [query, setQuery] = React.useState('');
+  const [nextCursor, setNextCursor] = React.useState<string|null>(null);
 
-  const load = React.useCallback(async ()=>{
+  // First page for the current search, or (more=true) the next page appended.
+  const load = React.useCallback(async (more: boolean = false)=>{
     try {
       setErr(null);
-      const uu = await api.adminUsers();
-      setUsers(uu);
+      const page = await api.adminUsersPage(query, more ? nextCursor : null);
+      const uu = page.rows;
+      setUsers(prev => more ? [...prev, ...uu] : uu);
+      setNextCursor(page.nextCursor);
       setMmDraft(prev => {
         const next = { ...prev };
         for (const u of uu) if (next[u.id] === undefined) next[u.id] = u.mattermost_id || "";
@@ -22,9 +27,13 @@ export default function AdminUsers() {
       });
     }
     catch(e:any) { setErr(e.message || 'Failed'); }
-  }, []);
+  }, [query, nextCursor]);
 
-  React.useEffect(()=>{ load(); }, [load]);
+  React.useEffect(()=>{
+    const t = setTimeout(()=>{ load(); }, 250);
+    return ()=>clearTimeout(t);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [query]);
 
   React.useEffect(() => {
     api.adminCompanies().then(setCompanies).catch(()=>{});
@@ -38,6 +47,12 @@ export default function AdminUsers() {
 
       {err && <div className="card"><span className="badge attn">Error: {err}</span></div>}
 
+      <div className="field" style={{maxWidth:360}}>
+        <label>Search</label>
+        <input value={query} onChange={e=>setQuery(e.target.value)} placeholder="username or display name" />
+      </div>
+      <div style={{height:12}} />
+
       <div className="list">
         {users.map(u => (
           <div key={u.id} className="card">
@@ -112,6 +127,12 @@ export default function AdminUsers() {
         ))}
       </div>
 
+      {nextCursor && (
+        <div className="row" style={{justifyContent:'center', marginTop:12}}>
+          <button className="btn" onClick={()=>load(true)}>Load more</button>
+        </div>
+      )}
+
       {editUser && (
         <div className="card" style={{marginTop:16}}>
           <div className="spread">
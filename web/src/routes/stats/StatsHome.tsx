@@ -1,21 +1,49 @@
 import React from 'react';
 import { api } from '../../api';
 
+const AUDIT_ACTIONS = [
+  'LOGIN', 'LOGOUT', 'CREATE_USER', 'RESET_PASSWORD', 'CHANGE_PASSWORD', 'DISABLE_USER', 'SET_ROLE', 'ASSIGN_COMPANY',
+  'CREATE_TASK', 'COMPLETE_TASK', 'UNCOMPLETE_TASK', 'DELETE_TASK', 'FORCE_DONE_TASK', 'UNFORCE_DONE_TASK',
+];
+
 export default function StatsHome() {
   const [rows, setRows] = React.useState<any[]>([]);
   const [err, setErr] = React.useState<string|null>(null);
+  const [nextCursor, setNextCursor] = React.useState<string|null>(null);
+  const [actor, setActor] = React.useState('');
+  const [action, setAction] = React.useState('');
+  const [companyId, setCompanyId] = React.useState('');
+  const [taskId, setTaskId] = React.useState('');
+  const [since, setSince] = React.useState('');
+  const [until, setUntil] = React.useState('');
+  const [includeArchive, setIncludeArchive] = React.useState(false);
+
+  // First page for the current filters, or (more=true) the next page appended.
+  async function load(more: boolean = false) {
+    try {
+      setErr(null);
+      const page = await api.statsAuditPage({
+        actorUserId: Number(actor) || undefined,
+        action: action || undefined,
+        companyId: Number(companyId) || undefined,
+        taskId: Number(taskId) || undefined,
+        // datetime-local is local time; the API compares in UTC.
+        since: since ? new Date(since).toISOString() : undefined,
+        until: until ? new Date(until).toISOString() : undefined,
+        includeArchive,
+        cursor: more ? nextCursor : null,
+      });
+      setRows(prev => more ? [...prev, ...page.rows] : page.rows);
+      setNextCursor(page.nextCursor);
+    } catch(e:any) {
+      setErr(e.message || 'Failed');
+    }
+  }
 
   React.useEffect(() => {
-    (async ()=>{
-      try {
-        setErr(null);
-        const r = await api.statsAudit(200);
-        setRows(r);
-      } catch(e:any) {
-        setErr(e.message || 'Failed');
-      }
-    })();
-  }, []);
+    load();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [action, since, until, includeArchive]);
 
   return (
     <div>
@@ -26,6 +54,21 @@ export default function StatsHome() {
       <div className="card">
         <div className="h2">Recent audit events</div>
         <div className="hr" />
+        <div className="row" style={{flexWrap:'wrap', gap:10, alignItems:'end'}}>
+          <div className="field"><label>Actor id</label><input value={actor} onChange={e=>setActor(e.target.value)} onBlur={()=>load()} /></div>
+          <div className="field"><label>Action</label>
+            <select value={action} onChange={e=>setAction(e.target.value)}>
+              <option value="">(all)</option>
+              {AUDIT_ACTIONS.map(a => <option key={a} value={a}>{a}</option>)}
+            </select>
+          </div>
+          <div className="field"><label>Company id</label><input value={companyId} onChange={e=>setCompanyId(e.target.value)} onBlur={()=>load()} /></div>
+          <div className="field"><label>Task id</label><input value={taskId} onChange={e=>setTaskId(e.target.value)} onBlur={()=>load()} /></div>
+          <div className="field"><label>From</label><input type="datetime-local" value={since} onChange={e=>setSince(e.target.value)} /></div>
+          <div className="field"><label>To</label><input type="datetime-local" value={until} onChange={e=>setUntil(e.target.value)} /></div>
+          <label style={{display:"flex", gap:8, alignItems:"center"}}><input type="checkbox" checked={includeArchive} onChange={e=>setIncludeArchive(e.target.checked)} /><span className="muted">Include archived months</span></label>
+        </div>
+        <div style={{height:12}} />
         <div style={{overflowX:'auto'}}>
           <table style={{width:'100%', borderCollapse:'collapse', fontSize:13}}>
             <thead>
@@ -57,6 +100,11 @@ export default function StatsHome() {
             </tbody>
           </table>
         </div>
+        {nextCursor && (
+          <div className="row" style={{justifyContent:'center', marginTop:12}}>
+            <button className="btn" onClick={()=>load(true)}>Load more</button>
+          </div>
+        )}
       </div>
     </div>
   );